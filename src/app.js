@@ -3,6 +3,9 @@
 // Configuration
 const CONFIG = {
     dataUrl: 'src/data/predictions.json',
+    shardsUrl: 'src/data/shards',
+    demoUrl: 'src/data/demo.json',
+    apiUrl: 'http://127.0.0.1:8765', // Local prediction service (src/python/service.py)
     updateDay: 5, // Friday
     leagues: {
         'premier': { name: 'Premier League', flag: '🏴󠁧󠁢󠁥󠁮󠁧󠁿', code: 'E0' },
@@ -21,7 +24,10 @@ let state = {
     schedine: null,
     currentLeague: 'all',
     myBets: [],
-    customSelections: []
+    customSelections: [],
+    manifest: null,
+    leagueMatches: {},
+    aggregates: null
 };
 
 // Initialize
@@ -30,11 +36,29 @@ document.addEventListener('DOMContentLoaded', () => {
     loadPredictions();
     initChart();
     setupEventListeners();
+    detectService();
 });
 
+// The custom builder needs the local prediction service: hide it when /health does not answer
+async function detectService() {
+    let available = false;
+    try {
+        const response = await fetch(`${CONFIG.apiUrl}/health`, { signal: AbortSignal.timeout(2000) });
+        available = response.ok;
+    } catch (error) {
+        available = false;
+    }
+    document.querySelectorAll('[onclick^="showCustomBuilder"]').forEach(el => {
+        el.classList.toggle('hidden', !available);
+    });
+}
+
 // Load predictions from JSON
 async function loadPredictions() {
     try {
+        // Prefer the sharded output: summary first, league matches lazily
+        if (await loadShardedPredictions()) return;
+
         const response = await fetch(CONFIG.dataUrl);
         if (!response.ok) {
             // If no data yet, load demo data
@@ -51,368 +75,108 @@ async function loadPredictions() {
     }
 }
 
-// Demo data for initial display
-function loadDemoData() {
-    const demoData = generateDemoData();
-    state.predictions = demoData.matches;
-    state.schedine = demoData.schedine;
-    updateUI();
-}
+// Load manifest and summary shards, then the matches needed by the current tab
+async function loadShardedPredictions() {
+    const response = await fetch(`${CONFIG.shardsUrl}/manifest.json?t=${Date.now()}`);
+    if (!response.ok) return false;
 
-// Generate demo predictions
-function generateDemoData() {
-    const teams = {
-        premier: [
-            { home: 'Liverpool', away: 'Tottenham', homeStrength: 85, awayStrength: 75 },
-            { home: 'Arsenal', away: 'Brighton', homeStrength: 82, awayStrength: 68 },
-            { home: 'Man City', away: 'Crystal Palace', homeStrength: 90, awayStrength: 60 },
-            { home: 'Chelsea', away: 'Brentford', homeStrength: 78, awayStrength: 65 }
-        ],
-        laliga: [
-            { home: 'Real Madrid', away: 'Getafe', homeStrength: 88, awayStrength: 55 },
-            { home: 'Barcelona', away: 'Las Palmas', homeStrength: 86, awayStrength: 52 },
-            { home: 'Atletico Madrid', away: 'Sevilla', homeStrength: 80, awayStrength: 70 }
-        ],
-        seriea: [
-            { home: 'Inter', away: 'Venezia', homeStrength: 85, awayStrength: 48 },
-            { home: 'Napoli', away: 'Monza', homeStrength: 82, awayStrength: 55 },
-            { home: 'Juventus', away: 'Cagliari', homeStrength: 80, awayStrength: 58 },
-            { home: 'Milan', away: 'Verona', homeStrength: 78, awayStrength: 52 }
-        ],
-        bundesliga: [
-            { home: 'Bayern Monaco', away: 'Hoffenheim', homeStrength: 88, awayStrength: 62 },
-            { home: 'Dortmund', away: 'Union Berlin', homeStrength: 80, awayStrength: 65 },
-            { home: 'Leverkusen', away: 'Mainz', homeStrength: 84, awayStrength: 60 }
-        ],
-        ligue1: [
-            { home: 'PSG', away: 'Montpellier', homeStrength: 90, awayStrength: 50 },
-            { home: 'Monaco', away: 'Lens', homeStrength: 75, awayStrength: 70 },
-            { home: 'Marsiglia', away: 'Nantes', homeStrength: 76, awayStrength: 58 }
-        ],
-        eredivisie: [
-            { home: 'PSV', away: 'Twente', homeStrength: 82, awayStrength: 68 },
-            { home: 'Ajax', away: 'Utrecht', homeStrength: 80, awayStrength: 65 }
-        ],
-        primeira: [
-            { home: 'Benfica', away: 'Braga', homeStrength: 82, awayStrength: 72 },
-            { home: 'Porto', away: 'Guimaraes', homeStrength: 80, awayStrength: 65 }
-        ]
-    };
+    state.manifest = await response.json();
 
-    const matches = [];
-    const today = new Date();
-    const saturday = new Date(today);
-    saturday.setDate(today.getDate() + (6 - today.getDay()));
-    const sunday = new Date(saturday);
-    sunday.setDate(saturday.getDate() + 1);
+    const [summary, schedine, aggregates] = await Promise.all([
+        fetchShard('summary'), fetchShard('schedine'), fetchShard('aggregates')
+    ]);
+    if (!summary) return false;
 
-    Object.entries(teams).forEach(([league, leagueTeams]) => {
-        leagueTeams.forEach((match, idx) => {
-            const prediction = calculatePrediction(match.homeStrength, match.awayStrength);
-            const isWeekend = idx % 2 === 0;
-            const matchDate = isWeekend ? saturday : sunday;
-            const hours = [13, 15, 18, 20, 21];
-
-            matches.push({
-                id: `${league}_${idx}`,
-                league: league,
-                leagueName: CONFIG.leagues[league].name,
-                leagueFlag: CONFIG.leagues[league].flag,
-                homeTeam: match.home,
-                awayTeam: match.away,
-                date: matchDate.toISOString().split('T')[0],
-                time: `${hours[idx % hours.length]}:00`,
-                prediction: prediction,
-                odds: generateOdds(prediction),
-                valueBets: findValueBets(prediction, generateOdds(prediction)),
-                confidence: Math.round(50 + Math.random() * 40)
-            });
-        });
-    });
+    state.schedine = schedine || {};
+    applyAggregates(aggregates, {});
+    updateUI();
 
-    // Generate schedine
-    const schedine = generateSchedine(matches);
+    await ensureLeaguesLoaded(state.currentLeague);
+    updateUI();
+    return true;
+}
 
-    return { matches, schedine };
+// Fetch a shard by name; the content hash in the URL keeps unchanged shards cached
+async function fetchShard(name) {
+    const entry = state.manifest && state.manifest.shards[name];
+    if (!entry) return null;
+    const response = await fetch(`${CONFIG.shardsUrl}/${entry.file}?v=${entry.hash}`);
+    return response.ok ? response.json() : null;
 }
 
-// Poisson-based prediction calculation
-function calculatePrediction(homeStrength, awayStrength) {
-    // Simplified Poisson model
-    const homeAdvantage = 1.35;
-    const avgGoals = 2.7;
-
-    const homeExpected = (homeStrength / 100) * avgGoals * homeAdvantage;
-    const awayExpected = (awayStrength / 100) * avgGoals * 0.9;
-
-    // Calculate probabilities using Poisson distribution
-    const probMatrix = [];
-    for (let h = 0; h <= 6; h++) {
-        probMatrix[h] = [];
-        for (let a = 0; a <= 6; a++) {
-            probMatrix[h][a] = poissonProb(h, homeExpected) * poissonProb(a, awayExpected);
-        }
-    }
+// Lazily load the match shards for one league (or all of them)
+async function ensureLeaguesLoaded(league) {
+    if (!state.manifest) return;
 
-    let pHome = 0, pDraw = 0, pAway = 0;
-    let pOver25 = 0, pBTTS = 0;
-    let pOver15 = 0, pOver05 = 0;
-
-    for (let h = 0; h <= 6; h++) {
-        for (let a = 0; a <= 6; a++) {
-            const p = probMatrix[h][a];
-            if (h > a) pHome += p;
-            else if (h === a) pDraw += p;
-            else pAway += p;
-
-            if (h + a > 2.5) pOver25 += p;
-            if (h + a > 1.5) pOver15 += p;
-            if (h + a > 0.5) pOver05 += p;
-            if (h > 0 && a > 0) pBTTS += p;
-        }
-    }
+    const names = Object.keys(state.manifest.shards)
+        .filter(name => name.startsWith('matches-'))
+        .map(name => name.slice('matches-'.length))
+        .filter(code => (league === 'all' || code === league) && !state.leagueMatches[code]);
 
-    // Find most likely score
-    let maxProb = 0, likelyScore = [1, 1];
-    for (let h = 0; h <= 4; h++) {
-        for (let a = 0; a <= 4; a++) {
-            if (probMatrix[h][a] > maxProb) {
-                maxProb = probMatrix[h][a];
-                likelyScore = [h, a];
-            }
-        }
-    }
+    const loaded = await Promise.all(names.map(code => fetchShard(`matches-${code}`)));
+    names.forEach((code, idx) => {
+        state.leagueMatches[code] = loaded[idx] || [];
+    });
 
-    return {
-        homeWin: Math.round(pHome * 100),
-        draw: Math.round(pDraw * 100),
-        awayWin: Math.round(pAway * 100),
-        over25: Math.round(pOver25 * 100),
-        over15: Math.round(pOver15 * 100),
-        over05: Math.round(pOver05 * 100),
-        btts: Math.round(pBTTS * 100),
-        likelyScore: likelyScore,
-        homeXG: homeExpected.toFixed(2),
-        awayXG: awayExpected.toFixed(2)
-    };
+    state.predictions = Object.values(state.leagueMatches).flat();
 }
 
-// Poisson probability function
-function poissonProb(k, lambda) {
-    return (Math.pow(lambda, k) * Math.exp(-lambda)) / factorial(k);
+// Demo data for initial display, precomputed by dashboard_aggregates.py --demo
+async function loadDemoData() {
+    try {
+        const response = await fetch(CONFIG.demoUrl);
+        if (!response.ok) return;
+        const data = await response.json();
+        shiftDemoDates(data.matches);
+        applyAggregates(data, data.matches);
+        state.schedine = data.schedine;
+        updateUI();
+    } catch (error) {
+        console.error('Error loading demo data:', error);
+    }
 }
 
-function factorial(n) {
-    if (n <= 1) return 1;
-    return n * factorial(n - 1);
-}
+// The demo file is generated once: move its match dates to the coming weekend
+function shiftDemoDates(leagueMatches) {
+    const matches = Object.values(leagueMatches).flat();
+    const first = matches.map(m => m.date).sort()[0];
+    if (!first) return;
 
-// Generate realistic odds based on prediction
-function generateOdds(prediction) {
-    const margin = 1.05; // 5% bookmaker margin
-
-    const homeOdds = Math.round((100 / prediction.homeWin * margin) * 100) / 100;
-    const drawOdds = Math.round((100 / prediction.draw * margin) * 100) / 100;
-    const awayOdds = Math.round((100 / prediction.awayWin * margin) * 100) / 100;
-    const over25Odds = Math.round((100 / prediction.over25 * margin) * 100) / 100;
-    const under25Odds = Math.round((100 / (100 - prediction.over25) * margin) * 100) / 100;
-    const bttsYesOdds = Math.round((100 / prediction.btts * margin) * 100) / 100;
-    const bttsNoOdds = Math.round((100 / (100 - prediction.btts) * margin) * 100) / 100;
-    const over15Odds = Math.round((100 / prediction.over15 * margin) * 100) / 100;
-
-    // Double chance
-    const dc1xOdds = Math.round((100 / (prediction.homeWin + prediction.draw) * margin) * 100) / 100;
-    const dc12Odds = Math.round((100 / (prediction.homeWin + prediction.awayWin) * margin) * 100) / 100;
-    const dcx2Odds = Math.round((100 / (prediction.draw + prediction.awayWin) * margin) * 100) / 100;
-
-    return {
-        home: Math.min(homeOdds, 15),
-        draw: Math.min(drawOdds, 10),
-        away: Math.min(awayOdds, 15),
-        over25: Math.min(over25Odds, 4),
-        under25: Math.min(under25Odds, 4),
-        over15: Math.min(over15Odds, 2),
-        bttsYes: Math.min(bttsYesOdds, 3),
-        bttsNo: Math.min(bttsNoOdds, 3),
-        dc1x: Math.min(dc1xOdds, 3),
-        dc12: Math.min(dc12Odds, 2),
-        dcx2: Math.min(dcx2Odds, 3)
+    const parse = iso => {
+        const [year, month, day] = iso.split('-').map(Number);
+        return new Date(year, month - 1, day);
     };
-}
+    const today = new Date();
+    const saturday = new Date(today.getFullYear(), today.getMonth(), today.getDate() + (6 - today.getDay()));
+    const offset = Math.round((saturday - parse(first)) / 86400000);
 
-// Find value bets
-function findValueBets(prediction, odds) {
-    const valueBets = [];
-    const minEdge = 0.03; // 3% minimum edge
-
-    // Check each market
-    const markets = [
-        { name: '1', prob: prediction.homeWin / 100, odds: odds.home },
-        { name: 'X', prob: prediction.draw / 100, odds: odds.draw },
-        { name: '2', prob: prediction.awayWin / 100, odds: odds.away },
-        { name: 'Over 2.5', prob: prediction.over25 / 100, odds: odds.over25 },
-        { name: 'Under 2.5', prob: (100 - prediction.over25) / 100, odds: odds.under25 },
-        { name: 'Over 1.5', prob: prediction.over15 / 100, odds: odds.over15 },
-        { name: 'BTTS Si', prob: prediction.btts / 100, odds: odds.bttsYes },
-        { name: 'BTTS No', prob: (100 - prediction.btts) / 100, odds: odds.bttsNo },
-        { name: 'DC 1X', prob: (prediction.homeWin + prediction.draw) / 100, odds: odds.dc1x },
-        { name: 'DC X2', prob: (prediction.draw + prediction.awayWin) / 100, odds: odds.dcx2 }
-    ];
-
-    markets.forEach(market => {
-        const expectedValue = (market.prob * market.odds) - 1;
-        if (expectedValue > minEdge) {
-            valueBets.push({
-                market: market.name,
-                odds: market.odds,
-                probability: Math.round(market.prob * 100),
-                edge: Math.round(expectedValue * 100)
-            });
-        }
+    matches.forEach(m => {
+        const date = parse(m.date);
+        date.setDate(date.getDate() + offset);
+        m.date = `${date.getFullYear()}-${String(date.getMonth() + 1).padStart(2, '0')}-${String(date.getDate()).padStart(2, '0')}`;
     });
-
-    return valueBets.sort((a, b) => b.edge - a.edge);
 }
 
-// Generate schedine with new 4-jackpot structure
-function generateSchedine(matches) {
-    const sortedMatches = [...matches].sort((a, b) => {
-        const aValue = a.valueBets.length > 0 ? a.valueBets[0].edge : 0;
-        const bValue = b.valueBets.length > 0 ? b.valueBets[0].edge : 0;
-        return bValue - aValue;
-    });
-
-    // Helper function to create selection
-    const createSelection = (match, selection, odds, probability) => ({
-        match: `${match.homeTeam} vs ${match.awayTeam}`,
-        league: match.leagueName,
-        flag: match.leagueFlag,
-        selection,
-        odds,
-        probability
-    });
-
-    // Schedina Media: 5 selezioni value bets
-    const media = [];
-    sortedMatches.forEach(match => {
-        if (media.length >= 5) return;
-        if (media.find(s => s.match.includes(match.homeTeam))) return;
-        const bestValue = match.valueBets[0];
-        if (bestValue && bestValue.odds >= 1.40 && bestValue.odds <= 2.00) {
-            media.push(createSelection(match, bestValue.market, bestValue.odds, bestValue.probability));
-        } else if (match.prediction.over25 > 55 && match.odds.over25 <= 1.90) {
-            media.push(createSelection(match, 'Over 2.5', match.odds.over25, match.prediction.over25));
-        }
-    });
-    // Fill if needed
-    sortedMatches.forEach(match => {
-        if (media.length >= 5) return;
-        if (!media.find(s => s.match.includes(match.homeTeam)) && match.prediction.btts > 55) {
-            media.push(createSelection(match, 'BTTS Si', match.odds.bttsYes, match.prediction.btts));
-        }
-    });
-
-    // Jackpot 1: Classic (Over 1.5 + DC) - 12 selections
-    const jackpot1 = [];
-    sortedMatches.forEach(match => {
-        if (jackpot1.length >= 12) return;
-        if (jackpot1.find(s => s.match.includes(match.homeTeam))) return;
-        if (match.prediction.over15 > 80) {
-            jackpot1.push(createSelection(match, 'Over 1.5', match.odds.over15, match.prediction.over15));
-        } else if (match.prediction.homeWin + match.prediction.draw > 75) {
-            jackpot1.push(createSelection(match, 'DC 1X', match.odds.dc1x, match.prediction.homeWin + match.prediction.draw));
-        } else if (match.prediction.draw + match.prediction.awayWin > 70) {
-            jackpot1.push(createSelection(match, 'DC X2', match.odds.dcx2, match.prediction.draw + match.prediction.awayWin));
-        }
-    });
-
-    // Jackpot 2: Goals (Over 2.5 + BTTS) - 12 selections
-    const jackpot2 = [];
-    sortedMatches.forEach(match => {
-        if (jackpot2.length >= 12) return;
-        if (jackpot2.find(s => s.match.includes(match.homeTeam))) return;
-        if (match.prediction.over25 > 55) {
-            jackpot2.push(createSelection(match, 'Over 2.5', match.odds.over25, match.prediction.over25));
-        } else if (match.prediction.btts > 50) {
-            jackpot2.push(createSelection(match, 'BTTS Si', match.odds.bttsYes, match.prediction.btts));
-        }
-    });
-
-    // Jackpot 3: Results (1X2 only) - 10 selections
-    const jackpot3 = [];
-    sortedMatches.forEach(match => {
-        if (jackpot3.length >= 10) return;
-        if (jackpot3.find(s => s.match.includes(match.homeTeam))) return;
-        if (match.prediction.homeWin > 50) {
-            jackpot3.push(createSelection(match, '1', match.odds.home, match.prediction.homeWin));
-        } else if (match.prediction.awayWin > 45) {
-            jackpot3.push(createSelection(match, '2', match.odds.away, match.prediction.awayWin));
-        }
-    });
+// Use precomputed aggregates: matches are already sorted per league and overall
+function applyAggregates(aggregates, leagueMatches) {
+    state.aggregates = aggregates || null;
+    state.leagueMatches = leagueMatches;
+    state.predictions = Object.values(state.leagueMatches).flat();
+}
 
-    // Jackpot 4: Mega (Mix everything) - 15 selections
-    const jackpot4 = [];
-    const usedMatches = new Set();
-    sortedMatches.forEach(match => {
-        if (jackpot4.length >= 15) return;
-        if (usedMatches.has(match.homeTeam)) return;
-        usedMatches.add(match.homeTeam);
-
-        if (jackpot4.length < 3 && match.prediction.over15 > 85) {
-            jackpot4.push(createSelection(match, 'Over 1.5', match.odds.over15, match.prediction.over15));
-        } else if (jackpot4.length < 6 && match.prediction.homeWin > 60) {
-            jackpot4.push(createSelection(match, '1', match.odds.home, match.prediction.homeWin));
-        } else if (jackpot4.length < 9 && match.prediction.over25 > 60) {
-            jackpot4.push(createSelection(match, 'Over 2.5', match.odds.over25, match.prediction.over25));
-        } else if (jackpot4.length < 12 && match.prediction.btts > 55) {
-            jackpot4.push(createSelection(match, 'BTTS Si', match.odds.bttsYes, match.prediction.btts));
-        } else if (match.prediction.homeWin + match.prediction.draw > 70) {
-            jackpot4.push(createSelection(match, 'DC 1X', match.odds.dc1x, match.prediction.homeWin + match.prediction.draw));
-        }
-    });
+// Matches for the current tab in precomputed order
+function currentMatches() {
+    const aggregates = state.aggregates;
+    if (!aggregates) {
+        return state.currentLeague === 'all'
+            ? state.predictions
+            : state.predictions.filter(m => m.league === state.currentLeague);
+    }
 
-    const calcOdds = (arr) => arr.reduce((acc, s) => acc * s.odds, 1);
+    if (state.currentLeague !== 'all') return state.leagueMatches[state.currentLeague] || [];
 
-    return {
-        media: {
-            selections: media,
-            totalOdds: calcOdds(media).toFixed(2),
-            stake: 3,
-            winRate: 18
-        },
-        jackpot1: {
-            name: 'Classic',
-            emoji: '🔴',
-            selections: jackpot1,
-            totalOdds: calcOdds(jackpot1).toFixed(2),
-            stake: 2,
-            winRate: 8
-        },
-        jackpot2: {
-            name: 'Goals',
-            emoji: '🔥',
-            selections: jackpot2,
-            totalOdds: calcOdds(jackpot2).toFixed(0),
-            stake: 1,
-            winRate: 0.8
-        },
-        jackpot3: {
-            name: 'Results',
-            emoji: '💎',
-            selections: jackpot3,
-            totalOdds: calcOdds(jackpot3).toFixed(0),
-            stake: 1,
-            winRate: 0.3
-        },
-        jackpot4: {
-            name: 'Mega',
-            emoji: '🚀',
-            selections: jackpot4,
-            totalOdds: calcOdds(jackpot4).toFixed(0),
-            stake: 1,
-            winRate: 0.05
-        }
-    };
+    const byId = new Map(state.predictions.map(m => [m.id, m]));
+    return aggregates.order.map(id => byId.get(id)).filter(Boolean);
 }
 
 // Update UI
@@ -428,10 +192,13 @@ function updateUI() {
 function updateStats() {
     if (!state.predictions) return;
 
-    document.getElementById('totalMatches').textContent = state.predictions.length;
-
-    const valueBetsCount = state.predictions.reduce((acc, m) => acc + m.valueBets.length, 0);
-    document.getElementById('valueBets').textContent = valueBetsCount;
+    // Aggregates cover every league, even those whose shards are not loaded yet
+    const stats = state.aggregates ? state.aggregates.stats : {
+        totalMatches: state.predictions.length,
+        valueBets: state.predictions.reduce((acc, m) => acc + m.valueBets.length, 0)
+    };
+    document.getElementById('totalMatches').textContent = stats.totalMatches;
+    document.getElementById('valueBets').textContent = stats.valueBets;
 
     // Calculate from my bets
     const bets = state.myBets.filter(b => b.result !== 'pending');
@@ -504,10 +271,7 @@ function updateMatches() {
     const container = document.getElementById('matchesContainer');
     if (!state.predictions) return;
 
-    let matches = state.predictions;
-    if (state.currentLeague !== 'all') {
-        matches = matches.filter(m => m.league === state.currentLeague);
-    }
+    const matches = currentMatches();
 
     container.innerHTML = matches.map(match => `
         <div class="match-card glass-card rounded-xl p-5 cursor-pointer" onclick="showMatchDetail('${match.id}')">
@@ -600,7 +364,8 @@ function showSchedina(type) {
         jackpot1: { title: 'Jackpot Classic 🔴', color: 'red' },
         jackpot2: { title: 'Jackpot Goals 🔥', color: 'orange' },
         jackpot3: { title: 'Jackpot Results 💎', color: 'cyan' },
-        jackpot4: { title: 'Jackpot Mega 🚀', color: 'pink' }
+        jackpot4: { title: 'Jackpot Mega 🚀', color: 'pink' },
+        custom: { title: 'Schedina Personalizzata 🛠️', color: 'blue' }
     };
 
     const config = colors[type] || { title: 'Schedina', color: 'blue' };
@@ -631,9 +396,27 @@ function showSchedina(type) {
     modal.classList.add('flex');
 }
 
-// Show custom builder
-function showCustomBuilder() {
-    alert('Custom Builder - Coming Soon!\n\nPotrai selezionare le partite e creare la tua schedina personalizzata.');
+// Show custom builder: built on demand by the local prediction service
+async function showCustomBuilder() {
+    const constraints = { legs: 4, min_probability: 60 };
+    if (state.currentLeague !== 'all') constraints.leagues = [state.currentLeague];
+
+    try {
+        const response = await fetch(`${CONFIG.apiUrl}/schedina`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(constraints)
+        });
+        const schedina = await response.json();
+        if (!response.ok || !schedina.selections.length) {
+            alert(`Nessuna schedina disponibile${schedina.error ? `: ${schedina.error}` : ''}`);
+            return;
+        }
+        state.schedine = { ...(state.schedine || {}), custom: schedina };
+        showSchedina('custom');
+    } catch (error) {
+        alert('Custom Builder non disponibile.\n\nAvvia il servizio locale: python src/python/service.py');
+    }
 }
 
 // Close modal
@@ -665,6 +448,14 @@ function filterLeague(league) {
     event.target.classList.add('tab-active');
     event.target.classList.remove('bg-dark-700');
 
+    if (state.manifest) {
+        ensureLeaguesLoaded(league).then(() => {
+            updateStats();
+            updateMatches();
+        });
+        return;
+    }
+
     updateMatches();
 }
 
@@ -0,0 +1,111 @@
+"""
+BetWise API Metrics - Token e latenza di ogni chiamata a Claude
+Registra per ogni risposta token di input/output, token letti e scritti
+nella prompt cache, latenza e time-to-first-token. A fine esecuzione salva
+un file per run e aggiunge un riepilogo allo storico, per seguire costi e
+tempi settimana dopo settimana.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from output_writer import write_json_atomic
+
+# Metrics configuration
+METRICS_CONFIG = {
+    "metrics_dir": "src/data/metrics",
+    "history_file": "history.jsonl",
+    # USD per million tokens (list prices): input, output, cache write, cache read
+    "pricing": {
+        "claude-sonnet-4": {"input": 3.0, "output": 15.0, "cache_write": 3.75, "cache_read": 0.30},
+    },
+}
+
+USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_creation_input_tokens", "cache_read_input_tokens")
+
+
+def _pricing(model: str) -> Optional[Dict]:
+    for prefix, prices in METRICS_CONFIG["pricing"].items():
+        if model.startswith(prefix):
+            return prices
+    return None
+
+
+def estimate_cost(model: str, usage: Dict) -> Optional[float]:
+    """Estimated USD cost of one response from its usage block"""
+    prices = _pricing(model)
+    if not prices:
+        return None
+    cost = (usage.get("input_tokens", 0) * prices["input"]
+            + usage.get("output_tokens", 0) * prices["output"]
+            + usage.get("cache_creation_input_tokens", 0) * prices["cache_write"]
+            + usage.get("cache_read_input_tokens", 0) * prices["cache_read"])
+    return round(cost / 1_000_000, 6)
+
+
+class RunMetrics:
+    """Thread-safe collector of per-call metrics for one run"""
+
+    def __init__(self):
+        self.started_at = datetime.now()
+        self.calls: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def record(self, label: str, model: str, usage: Optional[Dict], latency: float,
+               ttft: Optional[float] = None, stop_reason: Optional[str] = None, source: str = "api"):
+        usage = usage or {}
+        call = {
+            "label": label,
+            "model": model,
+            "source": source,  # "api" or "cache" (response cache hit, nothing billed)
+            "latency_s": round(latency, 3),
+            "ttft_s": round(ttft, 3) if ttft is not None else None,
+            "stop_reason": stop_reason,
+        }
+        call.update({field: int(usage.get(field) or 0) for field in USAGE_FIELDS})
+        call["cost_usd"] = estimate_cost(model, call) if source == "api" else 0.0
+        with self._lock:
+            self.calls.append(call)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            calls = list(self.calls)
+        api_calls = [c for c in calls if c["source"] == "api"]
+        ttfts = [c["ttft_s"] for c in api_calls if c["ttft_s"] is not None]
+        totals = {field: sum(c[field] for c in api_calls) for field in USAGE_FIELDS}
+        cacheable = totals["cache_read_input_tokens"] + totals["cache_creation_input_tokens"] + totals["input_tokens"]
+
+        return {
+            "run": self.started_at.isoformat(timespec="seconds"),
+            "week": self.started_at.strftime("%G-W%V"),
+            "calls": len(calls),
+            "api_calls": len(api_calls),
+            "cache_hits": len(calls) - len(api_calls),
+            **totals,
+            "prompt_cache_hit_rate": round(totals["cache_read_input_tokens"] / cacheable, 3) if cacheable else 0,
+            "max_latency_s": max((c["latency_s"] for c in api_calls), default=0),
+            "max_ttft_s": max(ttfts, default=None),
+            "cost_usd": round(sum(c["cost_usd"] or 0 for c in api_calls), 6),
+        }
+
+    def save(self, metrics_dir: str = None) -> Optional[Dict]:
+        """Write the per-run file and append the summary to the history; no-op without calls"""
+        if not self.calls:
+            return None
+        metrics_dir = metrics_dir or METRICS_CONFIG["metrics_dir"]
+        summary = self.summary()
+
+        run_path = os.path.join(metrics_dir, "runs", f"{self.started_at.strftime('%Y%m%d-%H%M%S')}.json")
+        write_json_atomic(run_path, {"summary": summary, "calls": self.calls}, volatile_fields=())
+
+        with open(os.path.join(metrics_dir, METRICS_CONFIG["history_file"]), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(summary, ensure_ascii=False) + "\n")
+
+        ttft = f", TTFT {summary['max_ttft_s']}s" if summary["max_ttft_s"] is not None else ""
+        print(f"📈 {summary['api_calls']} API calls: {summary['input_tokens']} in / "
+              f"{summary['output_tokens']} out / {summary['cache_read_input_tokens']} cached tokens, "
+              f"${summary['cost_usd']}{ttft}")
+        return summary
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+BetWise Archive - Storico compresso append-only delle previsioni settimanali
+Ogni esecuzione (predictor.py o claude_predictor.py) diventa un segmento
+gzip immutabile; un indice per weekend, anno, lega, squadra e mercato
+permette di rispondere alle query aprendo solo i segmenti rilevanti.
+"""
+
+import argparse
+import gzip
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from output_writer import content_hash, write_bytes_atomic
+from team_names import league_code, normalize_team_name, split_match
+
+# Archive configuration
+ARCHIVE_CONFIG = {
+    "archive_dir": "src/data/archive",
+    "index_file": "index.json",
+    "segments_dir": "segments",
+    "page_size": 10,  # Segments per dashboard history page
+}
+
+INDEX_FIELDS = ("weekend", "year", "league", "team", "market")
+
+
+def _paths(archive_dir: Optional[str]) -> Dict[str, str]:
+    archive_dir = archive_dir or ARCHIVE_CONFIG["archive_dir"]
+    return {
+        "dir": archive_dir,
+        "index": os.path.join(archive_dir, ARCHIVE_CONFIG["index_file"]),
+        "segments": os.path.join(archive_dir, ARCHIVE_CONFIG["segments_dir"]),
+    }
+
+
+def normalize_market(market: str) -> str:
+    return " ".join(market.strip().lower().split())
+
+
+def load_index(archive_dir: str = None) -> Dict:
+    try:
+        with open(_paths(archive_dir)["index"], 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"segments": [], "postings": {field: {} for field in INDEX_FIELDS}}
+
+
+def _save_index(index: Dict, archive_dir: str = None):
+    payload = json.dumps(index, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    write_bytes_atomic(_paths(archive_dir)["index"], payload)
+
+
+def extract_picks(document: Dict) -> List[Dict]:
+    """Flatten slip legs and value bets of a document into indexable pick records"""
+    picks = []
+
+    for slip_key, slip in (document.get("schedine") or {}).items():
+        for sel in slip.get("selections", []):
+            teams = split_match(sel.get("match", "")) or ("", "")
+            picks.append({
+                "kind": "slip",
+                "slip": slip_key,
+                "match": sel.get("match", ""),
+                "home": teams[0],
+                "away": teams[1],
+                "league": league_code(sel.get("league", "")),
+                "market": sel.get("selection", ""),
+                "odds": sel.get("odds"),
+                "probability": sel.get("probability"),
+            })
+
+    for match in document.get("matches", []):
+        home = match.get("home_team", match.get("homeTeam", ""))
+        away = match.get("away_team", match.get("awayTeam", ""))
+        for vb in match.get("value_bets", match.get("valueBets", [])):
+            picks.append({
+                "kind": "value_bet",
+                "slip": None,
+                "match": f"{home} vs {away}",
+                "home": home,
+                "away": away,
+                "league": league_code(match.get("league", "")),
+                "date": match.get("date"),
+                "market": vb.get("market", ""),
+                "odds": vb.get("odds"),
+                "probability": vb.get("probability"),
+                "edge": vb.get("edge"),
+            })
+
+    return picks
+
+
+def _document_year(document: Dict) -> str:
+    weekend = document.get("weekend", "")
+    last = weekend.split(" - ")[-1].split("/")
+    if len(last) == 3 and len(last[2]) == 4:
+        return last[2]
+    return (document.get("generated_at") or datetime.now().isoformat())[:4]
+
+
+def append_run(document: Dict, source: str, archive_dir: str = None) -> Optional[int]:
+    """
+    Append one run's output as a new compressed segment and index it.
+
+    Returns the segment id, or None when the identical document is already archived.
+    """
+    paths = _paths(archive_dir)
+    os.makedirs(paths["segments"], exist_ok=True)
+    index = load_index(archive_dir)
+
+    # Reruns that only differ in generated_at are the same document
+    digest = content_hash(document)
+    if any(seg["sha256"] == digest for seg in index["segments"]):
+        return None
+
+    picks = extract_picks(document)
+    segment_id = (index["segments"][-1]["id"] + 1) if index["segments"] else 1
+    filename = f"{segment_id:06d}.jsonl.gz"
+
+    # Line 0 is the full document, the following lines are the picks
+    lines = [json.dumps({"source": source, "document": document}, ensure_ascii=False)]
+    lines.extend(json.dumps(pick, ensure_ascii=False) for pick in picks)
+    payload = gzip.compress(("\n".join(lines) + "\n").encode("utf-8"), mtime=0)
+    write_bytes_atomic(os.path.join(paths["segments"], filename), payload)
+
+    weekend = document.get("weekend", "")
+    year = _document_year(document)
+    keys = {
+        "weekend": {weekend},
+        "year": {year},
+        "league": {p["league"] for p in picks if p["league"]},
+        "team": {normalize_team_name(t) for p in picks for t in (p["home"], p["away"]) if t},
+        "market": {normalize_market(p["market"]) for p in picks if p["market"]},
+    }
+    for field, values in keys.items():
+        postings = index["postings"].setdefault(field, {})
+        for value in values:
+            postings.setdefault(value, []).append(segment_id)
+
+    index["segments"].append({
+        "id": segment_id,
+        "file": f"{ARCHIVE_CONFIG['segments_dir']}/{filename}",
+        "source": source,
+        "generated_at": document.get("generated_at"),
+        "weekend": weekend,
+        "year": year,
+        "decision": document.get("decision"),
+        "picks": len(picks),
+        "sha256": digest,
+    })
+    index["page_size"] = ARCHIVE_CONFIG["page_size"]
+    index["pages"] = -(-len(index["segments"]) // ARCHIVE_CONFIG["page_size"])
+    _save_index(index, archive_dir)
+
+    return segment_id
+
+
+def _read_segment(segment: Dict, archive_dir: str = None) -> Iterator[Dict]:
+    path = os.path.join(_paths(archive_dir)["dir"], segment["file"])
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def iter_documents(archive_dir: str = None) -> Iterator[Dict]:
+    """Every archived document in append order (reads only line 0 of each segment)"""
+    for segment in load_index(archive_dir)["segments"]:
+        yield next(_read_segment(segment, archive_dir))["document"]
+
+
+def query(league: str = None, team: str = None, market: str = None, weekend: str = None,
+          year: str = None, archive_dir: str = None) -> List[Dict]:
+    """
+    Picks matching every given filter, e.g. query(team="Inter", market="Over 2.5", year="2026").
+
+    Candidate segments come from intersecting index postings; only those are decompressed.
+    """
+    index = load_index(archive_dir)
+    filters = {
+        "league": league_code(league) if league else None,
+        "team": normalize_team_name(team) if team else None,
+        "market": normalize_market(market) if market else None,
+        "weekend": weekend,
+        "year": str(year) if year else None,
+    }
+
+    candidates = None
+    for field, value in filters.items():
+        if value is None:
+            continue
+        ids = set(index["postings"].get(field, {}).get(value, []))
+        candidates = ids if candidates is None else candidates & ids
+    segments = [s for s in index["segments"] if candidates is None or s["id"] in candidates]
+
+    results = []
+    for segment in segments:
+        lines = _read_segment(segment, archive_dir)
+        next(lines)  # Skip the document line
+        for pick in lines:
+            if filters["league"] and pick["league"] != filters["league"]:
+                continue
+            if filters["team"] and filters["team"] not in (normalize_team_name(pick["home"]),
+                                                           normalize_team_name(pick["away"])):
+                continue
+            if filters["market"] and normalize_market(pick["market"]) != filters["market"]:
+                continue
+            results.append(dict(pick, segment=segment["id"], weekend=segment["weekend"],
+                                generated_at=segment["generated_at"]))
+
+    return results
+
+
+def archive_predictions(document: Dict, source: str) -> Optional[int]:
+    """Archive a run from a main(), never letting archive errors break the run"""
+    try:
+        segment_id = append_run(document, source)
+    except Exception as e:
+        print(f"Error archiving predictions: {e}")
+        return None
+
+    if segment_id:
+        print(f"🗄️ Archived as segment {segment_id}")
+    return segment_id
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="BetWise predictions archive")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add = subparsers.add_parser("add", help="Archive a predictions file")
+    add.add_argument("path", nargs="?", default="src/data/predictions.json")
+    add.add_argument("--source", default="manual")
+
+    find = subparsers.add_parser("query", help="Search archived picks")
+    for field in ("league", "team", "market", "weekend", "year"):
+        find.add_argument(f"--{field}")
+
+    args = parser.parse_args()
+
+    if args.command == "add":
+        with open(args.path, 'r', encoding='utf-8') as f:
+            document = json.load(f)
+        segment_id = append_run(document, args.source)
+        print(f"✅ Archived as segment {segment_id}" if segment_id else "ℹ️ Already archived")
+        return
+
+    picks = query(args.league, args.team, args.market, args.weekend, args.year)
+    for pick in picks:
+        print(f"{pick['weekend']} | {pick['match']} | {pick['market']} @{pick['odds']}")
+    print(f"\n🔎 {len(picks)} picks found")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+BetWise Backtest - Previsioni walk-forward sulle stagioni passate
+Ripercorre i risultati in ordine cronologico e registra, prima di ogni partita,
+le probabilità del modello Poisson, dei rating Elo e del mercato (quote senza margine).
+Le righe prodotte alimentano l'ensemble e il report di calibrazione.
+"""
+
+import argparse
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+from elo_ratings import EloRatings
+from predictor import (CONFIG, Prediction, TeamStats, calculate_prediction, iter_historical_data,
+                       parse_match_date, remove_margin, update_team_stats)
+
+# Backtest configuration
+BACKTEST_CONFIG = {
+    "min_played": 3,  # Skip fixtures until both teams have this many matches
+    "output_dir": "src/data/backtest",
+    "odds_columns": [("B365H", "B365D", "B365A"), ("AvgH", "AvgD", "AvgA"), ("PSH", "PSD", "PSA")],
+    "over_columns": [("B365>2.5", "B365<2.5"), ("Avg>2.5", "Avg<2.5")],
+}
+
+MARKETS = ["home", "draw", "away", "over25", "btts"]
+
+
+def prediction_probabilities(prediction: Prediction) -> Dict[str, float]:
+    """Market probabilities (0-1) from a Prediction"""
+    return {
+        "home": prediction.home_win / 100,
+        "draw": prediction.draw / 100,
+        "away": prediction.away_win / 100,
+        "over25": prediction.over_25 / 100,
+        "btts": prediction.btts / 100,
+    }
+
+
+def market_probabilities(row: Dict) -> Dict[str, float]:
+    """De-margined market probabilities from the first complete odds columns in a row"""
+    probs = {}
+
+    for columns in BACKTEST_CONFIG["odds_columns"]:
+        try:
+            odds = [float(row[c]) for c in columns]
+        except (KeyError, ValueError):
+            continue
+        fair = remove_margin(odds)
+        if fair:
+            probs.update(zip(("home", "draw", "away"), fair))
+            break
+
+    for columns in BACKTEST_CONFIG["over_columns"]:
+        try:
+            odds = [float(row[c]) for c in columns]
+        except (KeyError, ValueError):
+            continue
+        fair = remove_margin(odds)
+        if fair:
+            probs["over25"] = fair[0]
+            break
+
+    return probs
+
+
+def run_backtest(rows: Iterable[Dict], league_code: str, season: str,
+                 elo: Optional[EloRatings] = None) -> List[Dict]:
+    """
+    Walk forward through one season of results.
+
+    Team stats are updated incrementally after each match so every prediction
+    only sees the past. `elo` carries ratings from previous seasons.
+    """
+    teams: Dict[str, TeamStats] = {}
+    elo = elo if elo is not None else EloRatings()
+    elo.new_season(season)
+    min_played = BACKTEST_CONFIG["min_played"]
+    results = []
+
+    for row in rows:
+        home = row.get('HomeTeam', '')
+        away = row.get('AwayTeam', '')
+        if not home or not away:
+            continue
+        try:
+            home_goals = int(row.get('FTHG', ''))
+            away_goals = int(row.get('FTAG', ''))
+        except (ValueError, TypeError):
+            continue
+
+        if (home in teams and away in teams
+                and teams[home].played >= min_played and teams[away].played >= min_played):
+            sources = {
+                "poisson": prediction_probabilities(calculate_prediction(teams[home], teams[away])),
+                "elo": prediction_probabilities(elo.predict(home, away)),
+            }
+            market = market_probabilities(row)
+            if market:
+                sources["market"] = market
+
+            results.append({
+                "league": league_code,
+                "season": season,
+                "date": parse_match_date(row.get('Date', '')),
+                "home": home,
+                "away": away,
+                "home_goals": home_goals,
+                "away_goals": away_goals,
+                "sources": sources,
+            })
+
+        update_team_stats(teams, home, away, home_goals, away_goals)
+        elo.update(home, away, home_goals, away_goals)
+
+    return results
+
+
+def backtest_league(league_code: str, seasons: List[str]) -> List[Dict]:
+    """Backtest consecutive seasons of a league, carrying Elo ratings forward"""
+    elo = EloRatings()
+    rows = []
+    for season in seasons:
+        rows.extend(run_backtest(iter_historical_data(league_code, season), league_code, season, elo))
+    return rows
+
+
+def save_backtest(rows: List[Dict], league_code: str, output_dir: str = None) -> str:
+    """Write backtest rows as JSON lines"""
+    output_dir = output_dir or BACKTEST_CONFIG["output_dir"]
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, f"{league_code}.jsonl")
+
+    with open(path, 'w', encoding='utf-8') as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+    return path
+
+
+def load_backtest(league_code: str, output_dir: str = None) -> List[Dict]:
+    """Read backtest rows written by save_backtest"""
+    output_dir = output_dir or BACKTEST_CONFIG["output_dir"]
+    path = os.path.join(output_dir, f"{league_code}.jsonl")
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="BetWise walk-forward backtest")
+    parser.add_argument("--leagues", nargs="*", default=list(CONFIG["leagues"]))
+    parser.add_argument("--seasons", nargs="*", default=["2223", "2324", "2425"])
+    args = parser.parse_args()
+
+    print("🧪 BetWise Backtest - Starting...")
+    for code in args.leagues:
+        rows = backtest_league(code, args.seasons)
+        if not rows:
+            print(f"   ⚠️ No data available for {CONFIG['leagues'][code]['name']}")
+            continue
+        path = save_backtest(rows, code)
+        print(f"   📊 {CONFIG['leagues'][code]['name']}: {len(rows)} predictions → {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,297 @@
+"""
+BetWise Claude Fan-out - Analisi parallela per lega
+Invece di una sola richiesta enorme che analizza tutte le leghe e costruisce
+le schedine, invia una richiesta piccola per lega (con concorrenza limitata)
+che restituisce solo selezioni candidate; un combinatore locale decide
+GIOCARE/CAUTELA/SALTARE e compone le schedine in modo deterministico.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from claude_predictor import call_claude_api, extract_json_from_response
+from context_builder import CONTEXT_CONFIG, build_context
+from odds_store import load_movements
+from output_writer import write_json_atomic
+from resilience import Deadline
+from response_cache import ResponseCache
+
+# Fan-out configuration
+FANOUT_CONFIG = {
+    "max_workers": 3,
+    "max_tokens": 2500,
+    "metrics_path": "src/data/fanout_metrics.json",
+    "max_per_league": 4,  # Legs from the same league in one schedina
+}
+
+# Leagues analysed by Claude (same set as the main system prompt)
+FANOUT_LEAGUES = [
+    ("Premier League", "🏴󠁧󠁢󠁥󠁮󠁧󠁿"),
+    ("Serie A", "🇮🇹"),
+    ("La Liga", "🇪🇸"),
+    ("Bundesliga", "🇩🇪"),
+    ("Ligue 1", "🇫🇷"),
+]
+
+# Schedine built by the combiner: (key, name, emoji, legs, allowed market families)
+COMBINER_SLIPS = {
+    "GIOCARE": [
+        ("jackpot_classic", "Classic", "🔴", 12, ("over15", "dc")),
+        ("jackpot_goals", "Goals", "🔥", 12, ("over25", "btts")),
+        ("jackpot_results", "Results", "💎", 10, ("1x2",)),
+        ("jackpot_mega", "Mega", "🚀", 15, None),
+    ],
+    "CAUTELA": [
+        ("jackpot_safe", "Safe", "🟡", 8, ("over15", "dc")),
+        ("jackpot_risk", "Risk", "🟠", 8, None),
+    ],
+}
+STAKES = {"GIOCARE": 3, "CAUTELA": 2}
+
+LEAGUE_SYSTEM_PROMPT = """Sei BetWise, un TIPSTER PROFESSIONISTA di scommesse calcistiche.
+Analizzi UNA SOLA lega per il weekend indicato e restituisci SOLO selezioni
+candidate con value: le schedine vengono composte altrove.
+
+REGOLE:
+- Usa solo partite REALI del weekend indicato, con quote REALISTICHE
+- Al massimo 2 selezioni per partita, mercati: 1, X, 2, DC 1X, DC X2, DC 12,
+  Over 1.5, Over 2.5, Under 2.5, BTTS Si, BTTS No
+- "confidence" 0-100 = probabilità stimata che la selezione vinca
+- Segnala red flags (pausa nazionali, turnover per coppe, partite "morte")
+- Reasoning MAX 50 caratteri
+
+Rispondi SOLO con JSON:
+{
+  "league": "Serie A",
+  "active": true,
+  "matches_available": 10,
+  "red_flags": [],
+  "candidates": [
+    {"match": "Team A vs Team B", "selection": "Over 1.5", "odds": 1.25, "confidence": 82, "reasoning": "..."}
+  ]
+}
+"""
+
+
+def build_league_prompt(league: str, weekend: str, context: str = "") -> str:
+    prompt = f"""LEGA: {league}
+WEEKEND: {weekend}
+
+Elenca le partite reali di {league} in questo weekend e restituisci le selezioni
+candidate con value (da 8 a 20), incluse 2-3 "banker" a quota 1.10-1.30."""
+    if context:
+        prompt += f"""
+
+DATI DEL MODELLO STATISTICO (stime BetWise, non quote reali; i movimenti
+quote, se presenti, sono rilevazioni reali dei bookmaker):
+{context}"""
+    return prompt
+
+
+def market_family(selection: str) -> str:
+    """Coarse market group used to route candidates into schedine"""
+    m = " ".join(selection.strip().upper().split())
+    if m.startswith("OVER 1.5"):
+        return "over15"
+    if m.startswith(("OVER 2.5", "UNDER")):
+        return "over25"
+    if m.startswith(("BTTS", "GG", "NG", "GOAL", "NO GOAL")):
+        return "btts"
+    if m.startswith("DC") or m in ("1X", "X2", "12"):
+        return "dc"
+    if m in ("1", "X", "2"):
+        return "1x2"
+    return "other"
+
+
+def request_league(api_key: str, league: str, flag: str, weekend: str,
+                   cache: Optional[ResponseCache] = None, context: str = "",
+                   deadline: Optional[Deadline] = None) -> Dict:
+    """One per-league request; never raises, the result records success and timing"""
+    started = time.perf_counter()
+    response = call_claude_api(api_key, build_league_prompt(league, weekend, context), cache,
+                               system_prompt=LEAGUE_SYSTEM_PROMPT, max_tokens=FANOUT_CONFIG["max_tokens"],
+                               label=league, deadline=deadline)
+    seconds = round(time.perf_counter() - started, 3)
+
+    parsed = extract_json_from_response(response) if response else None
+    candidates = []
+    for cand in (parsed or {}).get("candidates", []):
+        try:
+            candidates.append({
+                "match": cand["match"],
+                "league": league,
+                "flag": flag,
+                "selection": cand["selection"],
+                "odds": float(cand["odds"]),
+                "confidence": int(cand.get("confidence", 50)),
+                "reasoning": str(cand.get("reasoning", ""))[:50],
+            })
+        except (KeyError, TypeError, ValueError):
+            continue
+
+    return {
+        "league": league,
+        "ok": parsed is not None,
+        "active": bool((parsed or {}).get("active", bool(candidates))),
+        "matches_available": int((parsed or {}).get("matches_available", 0) or 0),
+        "red_flags": list((parsed or {}).get("red_flags", [])),
+        "candidates": candidates,
+        "metrics": {
+            "league": league,
+            "seconds": seconds,
+            "ok": parsed is not None,
+            "response_chars": len(response or ""),
+            "candidates": len(candidates),
+        },
+    }
+
+
+def run_fanout(api_key: str, weekend: str, cache: Optional[ResponseCache] = None,
+               leagues: List[tuple] = None, max_workers: int = None,
+               model_output: Optional[Dict] = None, deadline: Optional[Deadline] = None) -> List[Dict]:
+    """
+    Per-league requests with bounded concurrency; results keep the league order.
+
+    With `model_output` each request gets its league's rows of the model
+    context and odds movements, splitting the token budget across leagues.
+    """
+    leagues = leagues or FANOUT_LEAGUES
+    max_workers = max_workers or FANOUT_CONFIG["max_workers"]
+    budget = CONTEXT_CONFIG["token_budget"] // len(leagues)
+    movements = load_movements() if model_output else None
+    contexts = {league: build_context(model_output, budget, [league], movements)[0] if model_output else ""
+                for league, _ in leagues}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(request_league, api_key, league, flag, weekend, cache, contexts[league], deadline)
+                   for league, flag in leagues]
+        return [future.result() for future in futures]
+
+
+def decide(results: List[Dict]) -> Dict:
+    """Apply the tipster criteria (at least 3 of 5) to the pooled league results"""
+    active = [r for r in results if r["active"] and r["ok"]]
+    candidates = [c for r in results for c in r["candidates"]]
+    matches = sum(r["matches_available"] for r in results)
+    red_flags = [flag for r in results for flag in r["red_flags"]]
+    leagues_with_picks = len({c["league"] for c in candidates})
+
+    criteria = [
+        len(active) >= 3,
+        matches >= 25,
+        len(candidates) >= 5,
+        leagues_with_picks >= 2,
+        not red_flags,
+    ]
+    met = sum(criteria)
+    if len(active) <= 2 or matches < 15:
+        decision = "SALTARE" if met < 3 else "CAUTELA"
+    else:
+        decision = "GIOCARE" if met >= 3 else "CAUTELA" if met == 2 else "SALTARE"
+
+    return {
+        "decision": decision,
+        "analysis": {
+            "leagues_active": len(active),
+            "matches_available": matches,
+            "value_bets_found": len(candidates),
+            "red_flags": red_flags,
+            "recommendation": f"{met}/5 criteri soddisfatti su {len(active)} leghe attive",
+        },
+    }
+
+
+def combine_candidates(candidates: List[Dict], decision: str) -> Dict:
+    """
+    Assemble the schedine for a decision from pooled candidates.
+
+    Deterministic: candidates are ranked by confidence, then odds, match and
+    selection; each schedina takes one leg per match and at most
+    max_per_league legs per league.
+    """
+    ranked = sorted(candidates, key=lambda c: (-c["confidence"], c["odds"], c["match"], c["selection"]))
+    stake = STAKES.get(decision, 0)
+    schedine = {}
+
+    for key, name, emoji, legs, families in COMBINER_SLIPS.get(decision, []):
+        selections, matches, per_league = [], set(), {}
+        for cand in ranked:
+            if len(selections) >= legs:
+                break
+            if cand["match"] in matches or per_league.get(cand["league"], 0) >= FANOUT_CONFIG["max_per_league"]:
+                continue
+            if families and market_family(cand["selection"]) not in families:
+                continue
+            selections.append({k: cand[k] for k in ("match", "league", "flag", "selection", "odds", "reasoning")})
+            matches.add(cand["match"])
+            per_league[cand["league"]] = per_league.get(cand["league"], 0) + 1
+
+        if not selections:
+            continue
+
+        total = 1.0
+        for sel in selections:
+            total *= sel["odds"]
+        schedine[key] = {
+            "name": name,
+            "emoji": emoji,
+            "selections": selections,
+            "totalOdds": f"{total:.2f}",
+            "stake": stake,
+            "potentialWin": f"€{stake * total:.0f}",
+        }
+
+    return schedine
+
+
+def build_predictions(results: List[Dict], weekend: str, next_analysis: str) -> Dict:
+    """Claude-schema predictions document from per-league results"""
+    verdict = decide(results)
+    candidates = [c for r in results for c in r["candidates"]]
+    schedine = combine_candidates(candidates, verdict["decision"])
+    if verdict["decision"] != "SALTARE" and not schedine:
+        verdict["decision"] = "SALTARE"
+
+    return {
+        "weekend": weekend,
+        "generated_at": datetime.now().isoformat(),
+        "decision": verdict["decision"],
+        "analysis": verdict["analysis"],
+        "next_analysis": next_analysis,
+        "schedine": schedine,
+    }
+
+
+def save_metrics(results: List[Dict], wall_seconds: float, path: str = None) -> Dict:
+    """Per-request timings next to the overall wall-clock time"""
+    requests = [r["metrics"] for r in results]
+    metrics = {
+        "generated_at": datetime.now().isoformat(),
+        "wall_seconds": round(wall_seconds, 3),
+        "sum_request_seconds": round(sum(m["seconds"] for m in requests), 3),
+        "requests": requests,
+    }
+    write_json_atomic(path or FANOUT_CONFIG["metrics_path"], metrics, volatile_fields=())
+
+    print(f"⏱️ Fan-out: {metrics['wall_seconds']}s wall, {metrics['sum_request_seconds']}s of requests")
+    for m in requests:
+        status = "✅" if m["ok"] else "❌"
+        print(f"   {status} {m['league']}: {m['seconds']}s, {m['candidates']} candidates")
+    return metrics
+
+
+def fanout_predictions(api_key: str, weekend: str, next_analysis: str,
+                       cache: Optional[ResponseCache] = None, model_output: Optional[Dict] = None,
+                       deadline: Optional[Deadline] = None) -> Optional[Dict]:
+    """Run the fan-out and the combiner; None when every league request failed"""
+    started = time.perf_counter()
+    results = run_fanout(api_key, weekend, cache, model_output=model_output, deadline=deadline)
+    save_metrics(results, time.perf_counter() - started)
+
+    if not any(r["ok"] for r in results):
+        return None
+    return build_predictions(results, weekend, next_analysis)
+
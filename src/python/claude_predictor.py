@@ -5,19 +5,33 @@ Uses Claude API to intelligently analyze weekend fixtures and generate jackpot s
 Runs every Friday at 19:00 via GitHub Actions.
 """
 
+import argparse
 import json
 import os
+import time
 import urllib.request
-import urllib.parse
 from datetime import datetime, timedelta
-from typing import Optional
-
-# Anthropic API configuration
-ANTHROPIC_API_URL = "https://api.anthropic.com/v1/messages"
+from typing import List, Optional
+
+from api_metrics import RunMetrics
+from archive import archive_predictions
+from output_writer import report_changed, write_json_atomic
+from claude_stream import IncrementalJSONParser, stream_messages
+from context_builder import build_context, load_model_output
+from odds_store import load_movements
+from resilience import Deadline, DeadlineExceeded, job_deadline, urlopen_with_retry
+from response_cache import ResponseCache, cache_key
+from schedine_validator import SelectionIndex, is_sendable, print_issues, validate_predictions, validate_schedina
+from shards import write_shards
+from subscribers import notify_subscribers
+from telegram_client import send_packed, send_telegram_message
+
+# Anthropic API configuration (ANTHROPIC_API_URL can point at a local stub server)
+ANTHROPIC_API_URL = os.environ.get("ANTHROPIC_API_URL", "https://api.anthropic.com/v1/messages")
 CLAUDE_MODEL = "claude-sonnet-4-20250514"  # Best balance of speed and intelligence
 
-# Telegram configuration
-TELEGRAM_API_URL = "https://api.telegram.org/bot{token}/sendMessage"
+# Token usage and latency of every call in this run
+RUN_METRICS = RunMetrics()
 
 # System prompt for Claude to act as betting analyst
 SYSTEM_PROMPT = """Sei BetWise, un TIPSTER PROFESSIONISTA di scommesse calcistiche.
@@ -217,52 +231,104 @@ Cerca VALUE, non certezze. Le quote basse non sono "sicure".
 """
 
 
-def call_claude_api(api_key: str, user_prompt: str) -> Optional[str]:
-    """Call Claude API with the given prompt."""
-    headers = {
+def api_headers(api_key: str) -> dict:
+    """Messages API request headers."""
+    return {
         "Content-Type": "application/json",
         "x-api-key": api_key,
         "anthropic-version": "2023-06-01"
     }
 
-    data = json.dumps({
+
+def build_payload(user_prompt: str, system_prompt: str = SYSTEM_PROMPT, max_tokens: int = 8000) -> dict:
+    """Messages API request body; the static system prompt is marked for prompt caching."""
+    return {
         "model": CLAUDE_MODEL,
-        "max_tokens": 8000,
-        "system": SYSTEM_PROMPT,
+        "max_tokens": max_tokens,
+        "system": [
+            {"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}
+        ],
         "messages": [
             {"role": "user", "content": user_prompt}
         ]
-    }).encode('utf-8')
+    }
+
+
+def call_claude_api(api_key: str, user_prompt: str, cache: Optional[ResponseCache] = None,
+                    system_prompt: str = SYSTEM_PROMPT, max_tokens: int = 8000,
+                    label: str = "weekend", deadline: Optional[Deadline] = None) -> Optional[str]:
+    """Call Claude API with the given prompt, serving fresh cached responses when a cache is given."""
+    started = time.perf_counter()
+    key = cache_key(CLAUDE_MODEL, system_prompt, user_prompt)
+    if cache:
+        cached = cache.get(key)
+        if cached is not None:
+            print(f"💾 Using cached response {key[:12]}")
+            RUN_METRICS.record(label, CLAUDE_MODEL, None, time.perf_counter() - started, source="cache")
+            return cached
+
+    data = json.dumps(build_payload(user_prompt, system_prompt, max_tokens)).encode('utf-8')
 
     try:
-        req = urllib.request.Request(ANTHROPIC_API_URL, data=data, headers=headers)
-        with urllib.request.urlopen(req, timeout=120) as response:
+        response = urlopen_with_retry(
+            lambda: urllib.request.Request(ANTHROPIC_API_URL, data=data, headers=api_headers(api_key)),
+            120, deadline, label=f"Claude {label}")
+        with response:
             result = json.loads(response.read().decode('utf-8'))
-            return result.get("content", [{}])[0].get("text", "")
+            text = result.get("content", [{}])[0].get("text", "")
     except Exception as e:
         print(f"Error calling Claude API: {e}")
         return None
 
-
-def send_telegram_message(bot_token: str, chat_id: str, message: str) -> bool:
-    """Send message via Telegram Bot API."""
-    url = TELEGRAM_API_URL.format(token=bot_token)
-
-    data = urllib.parse.urlencode({
-        "chat_id": chat_id,
-        "text": message,
-        "parse_mode": "HTML",
-        "disable_web_page_preview": True
-    }).encode('utf-8')
-
+    RUN_METRICS.record(label, result.get("model", CLAUDE_MODEL), result.get("usage"),
+                       time.perf_counter() - started, stop_reason=result.get("stop_reason"))
+
+    if cache and text:
+        cache.put(key, text, model=CLAUDE_MODEL)
+    return text
+
+
+def stream_claude_api(api_key: str, user_prompt: str, parser: IncrementalJSONParser,
+                      cache: Optional[ResponseCache] = None, deadline: Optional[Deadline] = None) -> Optional[str]:
+    """
+    Call Claude API in streaming mode, feeding text to `parser` as it arrives.
+
+    Returns the text received so far even when the stream breaks, so completed
+    parts can still be used; only complete responses are cached.
+    """
+    started = time.perf_counter()
+    key = cache_key(CLAUDE_MODEL, SYSTEM_PROMPT, user_prompt)
+    if cache:
+        cached = cache.get(key)
+        if cached is not None:
+            print(f"💾 Using cached response {key[:12]}")
+            RUN_METRICS.record("weekend", CLAUDE_MODEL, None, time.perf_counter() - started, source="cache")
+            parser.feed(cached)
+            return cached
+
+    chunks = []
+    meta = {}
+    ttft = None
     try:
-        req = urllib.request.Request(url, data=data)
-        with urllib.request.urlopen(req, timeout=10) as response:
-            result = json.loads(response.read().decode('utf-8'))
-            return result.get("ok", False)
+        for text in stream_messages(ANTHROPIC_API_URL, api_headers(api_key), build_payload(user_prompt),
+                                    timeout=120, meta=meta, deadline=deadline):
+            if ttft is None:
+                ttft = time.perf_counter() - started
+            chunks.append(text)
+            parser.feed(text)
+    except DeadlineExceeded as e:
+        print(f"⏱️ {e} - keeping the {len(chunks)} chunks received")
     except Exception as e:
-        print(f"Error sending Telegram message: {e}")
-        return False
+        print(f"Error streaming Claude API: {e}")
+
+    RUN_METRICS.record("weekend", CLAUDE_MODEL, meta.get("usage"), time.perf_counter() - started,
+                       ttft=ttft, stop_reason=meta.get("stop_reason"))
+    text = "".join(chunks)
+    if meta.get("stop_reason") == "max_tokens":
+        print("⚠️ Response hit max_tokens and was truncated")
+    if cache and parser.done:
+        cache.put(key, text, model=CLAUDE_MODEL)
+    return text or None
 
 
 def format_schedina_message(schedina: dict, name: str, emoji: str) -> str:
@@ -347,27 +413,8 @@ def extract_json_from_response(response: str) -> Optional[dict]:
     return None
 
 
-def main():
-    """Main execution."""
-    print("🎯 BetWise Claude Predictor - Starting...")
-    print(f"📅 Date: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-
-    # Get environment variables
-    claude_api_key = os.environ.get("ANTHROPIC_API_KEY")
-    telegram_token = os.environ.get("TELEGRAM_BOT_TOKEN")
-    telegram_chat_id = os.environ.get("TELEGRAM_CHAT_ID")
-
-    if not claude_api_key:
-        print("❌ ANTHROPIC_API_KEY not set")
-        return
-
-    if not telegram_token or not telegram_chat_id:
-        print("⚠️ Telegram credentials not configured")
-        # Continue anyway to generate predictions
-
-    # Calculate weekend dates (Friday/Saturday/Sunday)
-    today = datetime.now()
-
+def weekend_window(today: datetime) -> dict:
+    """Upcoming Friday-Sunday window and the next analysis date."""
     # Days until Friday (weekday 4)
     days_until_friday = (4 - today.weekday()) % 7
     if days_until_friday == 0 and today.weekday() == 4:
@@ -376,14 +423,25 @@ def main():
         days_until_friday = 7
 
     friday = today + timedelta(days=days_until_friday)
-    saturday = friday + timedelta(days=1)
     sunday = friday + timedelta(days=2)
 
     # Calculate next Thursday for "next_analysis"
     next_thursday = today + timedelta(days=7)
-    next_analysis_str = f"Giovedì {next_thursday.strftime('%d/%m/%Y')} alle 19:00"
 
-    weekend_str = f"{friday.strftime('%d/%m/%Y')} - {sunday.strftime('%d/%m/%Y')}"
+    return {
+        "friday": friday,
+        "saturday": friday + timedelta(days=1),
+        "sunday": sunday,
+        "weekend": f"{friday.strftime('%d/%m/%Y')} - {sunday.strftime('%d/%m/%Y')}",
+        "next_analysis": f"Giovedì {next_thursday.strftime('%d/%m/%Y')} alle 19:00",
+    }
+
+
+def build_user_prompt(today: datetime, context: str = "") -> str:
+    """Weekend analysis prompt for the given run date, with the model context table when given."""
+    window = weekend_window(today)
+    friday, saturday, sunday = window["friday"], window["saturday"], window["sunday"]
+    weekend_str, next_analysis_str = window["weekend"], window["next_analysis"]
     print(f"📆 Analyzing weekend: {weekend_str}")
 
     # Create prompt for Claude
@@ -418,20 +476,166 @@ Ricorda:
 - Se CAUTELA: vincita >€1000 con €2
 - Fornisci reasoning per ogni selezione (max 50 caratteri)"""
 
-    print("🤖 Calling Claude API for analysis...")
-    response = call_claude_api(claude_api_key, user_prompt)
+    if context:
+        user_prompt += f"""
+
+DATI DEL MODELLO STATISTICO (stime BetWise, non quote reali; i movimenti
+quote, se presenti, sono invece rilevazioni reali dei bookmaker):
+Usali come base quantitativa per probabilità e value; verifica sempre
+che la partita sia reale prima di inserirla in una schedina.
+{context}"""
+
+    return user_prompt
+
+
+# Schedine sent for each decision: (key, name, emoji)
+SCHEDINE_CONFIG = {
+    # Standard 4 schedine
+    "GIOCARE": [
+        ('jackpot_classic', 'Classic', '🔴'),
+        ('jackpot_goals', 'Goals', '🔥'),
+        ('jackpot_results', 'Results', '💎'),
+        ('jackpot_mega', 'Mega', '🚀'),
+    ],
+    # Cautela - 2 schedine ridotte
+    "CAUTELA": [
+        ('jackpot_safe', 'Safe', '🟡'),
+        ('jackpot_risk', 'Risk', '🟠'),
+    ],
+}
+
+
+def schedina_message(decision: str, key: str, schedina: dict,
+                     index: Optional[SelectionIndex] = None) -> Optional[str]:
+    """Telegram text for one schedina, validated and repaired first (None if it must not be sent)."""
+    config = {k: (name, emoji) for k, name, emoji in SCHEDINE_CONFIG.get(decision, [])}
+    if key not in config:
+        return None
+
+    name, emoji = config[key]
+    schedina, issues = validate_schedina(key, schedina, decision, index)
+    print_issues(issues)
+    if not is_sendable(issues):
+        print(f"⚠️ {name} not sent")
+        return None
+    return format_schedina_message(schedina, name, emoji)
+
 
-    if not response:
-        print("❌ Failed to get response from Claude")
-        return
+def send_schedina(telegram_token: str, telegram_chat_id: str, decision: str, key: str, schedina: dict,
+                  index: Optional[SelectionIndex] = None, weekend: Optional[str] = None) -> bool:
+    """Send one schedina if the decision calls for it, validated and repaired first."""
+    message = schedina_message(decision, key, schedina, index)
+    if not message:
+        return False
 
+    name = key.replace('jackpot_', '').title()
+    if send_telegram_message(telegram_token, telegram_chat_id, message, weekend=weekend):
+        print(f"✅ {name} sent")
+        return True
+    print(f"❌ Failed to send {name}")
+    return False
+
+
+class StreamForwarder:
+    """
+    IncrementalJSONParser callback sending the analysis and each schedina to
+    Telegram as soon as they close in the stream. `sent` records what went out
+    so process_response does not send it twice.
+    """
+
+    def __init__(self, telegram_token: Optional[str], telegram_chat_id: Optional[str]):
+        self.telegram_token = telegram_token
+        self.telegram_chat_id = telegram_chat_id
+        self.header = {}
+        self.sent = set()
+        self.index = SelectionIndex()  # Cross-schedina conflicts among the streamed ones
+
+    def __call__(self, path: tuple, value):
+        if not (self.telegram_token and self.telegram_chat_id):
+            return
+
+        if len(path) == 1 and path[0] != 'schedine':
+            self.header[path[0]] = value
+            if path[0] == 'analysis' and 'decision' in self.header:
+                # Decision and weekend precede the analysis in the output format
+                if send_telegram_message(self.telegram_token, self.telegram_chat_id,
+                                         format_analysis_message(self.header),
+                                         weekend=self.header.get('weekend', '')):
+                    print("✅ Analysis sent (streamed)")
+                    self.sent.add('analysis')
+                else:
+                    print("❌ Failed to send analysis (streamed) - retrying after the response")
+
+        elif len(path) == 2 and path[0] == 'schedine' and 'analysis' in self.sent:
+            if send_schedina(self.telegram_token, self.telegram_chat_id,
+                             self.header.get('decision', 'SALTARE'), path[1], value, self.index,
+                             weekend=self.header.get('weekend', '')):
+                self.sent.add(path[1])
+
+
+def process_response(response: str, telegram_token: Optional[str], telegram_chat_id: Optional[str],
+                     sent: set = frozenset(), partial: Optional[dict] = None) -> Optional[dict]:
+    """
+    Parse Claude's response, save it and send it to Telegram.
+
+    Parts listed in `sent` were already forwarded while streaming. `partial`
+    (from the streaming parser) is used when the full response does not parse.
+    """
     print("📊 Parsing Claude's analysis...")
-    predictions = extract_json_from_response(response)
+    predictions = extract_json_from_response(response or "")
+
+    if not predictions and partial and partial.get('decision'):
+        print(f"⚠️ Response truncated - using {len(partial.get('schedine', {}))} completed schedine")
+        predictions = partial
 
     if not predictions:
         print("❌ Failed to parse predictions JSON")
-        print(f"Raw response: {response[:500]}...")
-        return
+        print(f"Raw response: {(response or '')[:500]}...")
+        return None
+
+    return publish_predictions(predictions, telegram_token, telegram_chat_id, sent)
+
+
+def telegram_blocks(predictions: dict, sent: set = frozenset()) -> List[str]:
+    """Analysis, schedine and footer of validated predictions, skipping parts already `sent`."""
+    decision = predictions.get('decision', 'SALTARE')
+    blocks = []
+
+    # Always send analysis message first
+    if 'analysis' not in sent:
+        blocks.append(format_analysis_message(predictions))
+
+    # Only send schedine if decision is GIOCARE or CAUTELA
+    if decision in SCHEDINE_CONFIG:
+        schedine = predictions.get('schedine', {})
+
+        for key, name, emoji in SCHEDINE_CONFIG[decision]:
+            if schedine.get(key, {}).get('selections') and key not in sent:
+                blocks.append(format_schedina_message(schedine[key], name, emoji))
+
+        # Footer
+        stake = "€3" if decision == "GIOCARE" else "€2"
+        blocks.append(f"""━━━━━━━━━━━━━━━━━━━━━━
+
+💵 Puntata consigliata: {stake} per schedina
+🎯 Dashboard: https://erold90.github.io/betwise-dashboard/
+
+⚠️ <i>Gioca responsabilmente. Le previsioni sono basate su modelli AI e non garantiscono vincite.</i>
+
+🤖 BetWise + Claude AI""")
+
+    return blocks
+
+
+def publish_predictions(predictions: dict, telegram_token: Optional[str], telegram_chat_id: Optional[str],
+                        sent: set = frozenset()) -> dict:
+    """Validate and repair predictions, save them for the dashboard and send them to Telegram."""
+    report = validate_predictions(predictions)
+    predictions = report.document
+    predictions['validation'] = report.summary()
+    if report.issues:
+        print(f"🔎 Validation: {predictions['validation']}")
+        print_issues(report.issues)
 
     # Get decision
     decision = predictions.get('decision', 'SALTARE')
@@ -439,68 +643,154 @@ Ricorda:
 
     # Save predictions to file (even if SALTARE - for dashboard)
     output_path = "src/data/predictions.json"
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(predictions, f, indent=2, ensure_ascii=False)
+    changed = write_json_atomic(output_path, predictions)
+    report_changed(changed)
 
-    print(f"✅ Predictions saved to {output_path}")
+    if changed:
+        print(f"✅ Predictions saved to {output_path}")
+        write_shards(predictions)
+        archive_predictions(predictions, source="claude")
+    else:
+        print(f"ℹ️ Predictions unchanged - {output_path} not rewritten")
 
     # Send to Telegram if configured
     if telegram_token and telegram_chat_id:
         print("📱 Sending to Telegram...")
+        if decision not in SCHEDINE_CONFIG:
+            print("ℹ️ Decision is SALTARE - no schedine sent")
 
-        # Always send analysis message first
-        analysis_msg = format_analysis_message(predictions)
-        if send_telegram_message(telegram_token, telegram_chat_id, analysis_msg):
-            print("✅ Analysis sent")
-        else:
-            print("❌ Failed to send analysis")
-
-        # Only send schedine if decision is GIOCARE or CAUTELA
-        if decision in ["GIOCARE", "CAUTELA"]:
-            schedine = predictions.get('schedine', {})
-
-            if decision == "GIOCARE":
-                # Standard 4 schedine
-                schedine_config = [
-                    ('jackpot_classic', 'Classic', '🔴'),
-                    ('jackpot_goals', 'Goals', '🔥'),
-                    ('jackpot_results', 'Results', '💎'),
-                    ('jackpot_mega', 'Mega', '🚀'),
-                ]
-            else:
-                # Cautela - 2 schedine ridotte
-                schedine_config = [
-                    ('jackpot_safe', 'Safe', '🟡'),
-                    ('jackpot_risk', 'Risk', '🟠'),
-                ]
-
-            for key, name, emoji in schedine_config:
-                if key in schedine and schedine[key].get('selections'):
-                    message = format_schedina_message(schedine[key], name, emoji)
-                    if send_telegram_message(telegram_token, telegram_chat_id, message):
-                        print(f"✅ {name} sent")
-                    else:
-                        print(f"❌ Failed to send {name}")
-
-            # Send footer
-            stake = "€3" if decision == "GIOCARE" else "€2"
-            footer = f"""━━━━━━━━━━━━━━━━━━━━━━
+        # Pack analysis, schedine and footer into as few messages as fit
+        # (through the outbox: a rerun does not resend what was delivered)
+        send_packed(telegram_token, telegram_chat_id, telegram_blocks(predictions, sent),
+                    weekend=predictions.get('weekend', ''))
 
-💵 Puntata consigliata: {stake} per schedina
-🎯 Dashboard: https://erold90.github.io/betwise-dashboard/
+    # Other subscribers get the full set, filtered by the leagues they follow
+    if telegram_token:
+        notify_subscribers(telegram_token, predictions, telegram_blocks, exclude=[telegram_chat_id])
 
-⚠️ <i>Gioca responsabilmente. Le previsioni sono basate su modelli AI e non garantiscono vincite.</i>
+    return predictions
+
+
+def main():
+    """Main execution."""
+    parser = argparse.ArgumentParser(description="BetWise Claude predictor")
+    parser.add_argument("--replay", nargs="?", const="latest", metavar="KEY",
+                        help="Rerun parse, save and Telegram from a cached response (default: latest)")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the API")
+    parser.add_argument("--no-stream", action="store_true",
+                        help="Wait for the full response instead of streaming it")
+    parser.add_argument("--no-context", action="store_true",
+                        help="Do not include the statistical model output in the prompt")
+    parser.add_argument("--fanout", action="store_true",
+                        help="Concurrent per-league requests combined into schedine locally")
+    args = parser.parse_args()
+
+    print("🎯 BetWise Claude Predictor - Starting...")
+    print(f"📅 Date: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+
+    try:
+        return run(args)
+    finally:
+        RUN_METRICS.save()
+
+
+def run_fallback(model_output: Optional[dict], telegram_token: Optional[str],
+                 telegram_chat_id: Optional[str]) -> Optional[dict]:
+    """Publish schedine from the statistical model when Claude is unavailable."""
+    # Local import: fallback builds on claude_fanout, which builds on this module
+    from fallback import fallback_predictions
+
+    print("⚙️ Falling back to the statistical model...")
+    window = weekend_window(datetime.now())
+    predictions = fallback_predictions(window["weekend"], window["next_analysis"], model_output)
+    if not predictions:
+        print("❌ Fallback failed - no predictions this week")
+        return None
+    return publish_predictions(predictions, telegram_token, telegram_chat_id)
+
+
+def run(args: argparse.Namespace) -> Optional[dict]:
+    """
+    One predictor run for the parsed command line.
+
+    Claude calls retry under a job deadline; when they fail or the response
+    cannot be used, the statistical model's schedine are published instead.
+    """
+    deadline = job_deadline()
+
+    # Get environment variables
+    claude_api_key = os.environ.get("ANTHROPIC_API_KEY")
+    telegram_token = os.environ.get("TELEGRAM_BOT_TOKEN")
+    telegram_chat_id = os.environ.get("TELEGRAM_CHAT_ID")
+    cache = None if args.no_cache else ResponseCache()
+    sent, partial = frozenset(), None
+    model_output = None
 
-🤖 BetWise + Claude AI"""
+    if not telegram_token or not telegram_chat_id:
+        print("⚠️ Telegram credentials not configured")
+        # Continue anyway to generate predictions
 
-            send_telegram_message(telegram_token, telegram_chat_id, footer)
-            print("✅ All notifications sent!")
+    if args.replay:
+        cache = cache or ResponseCache()
+        entry = cache.latest() if args.replay == "latest" else cache.entry(args.replay)
+        if not entry:
+            print(f"❌ No cached response found for {args.replay}")
+            return
+        print(f"🔁 Replaying cached response {entry['key'][:12]}")
+        response = entry["response"]
+    else:
+        if not args.no_context:
+            print("🧮 Running statistical model for context...")
+            model_output = load_model_output()
+
+        if not claude_api_key:
+            print("❌ ANTHROPIC_API_KEY not set")
+            return run_fallback(model_output, telegram_token, telegram_chat_id)
+
+        if args.fanout:
+            # Local import: claude_fanout builds on this module
+            from claude_fanout import fanout_predictions
+
+            window = weekend_window(datetime.now())
+            print(f"🤖 Fan-out analysis of {window['weekend']}...")
+            predictions = fanout_predictions(claude_api_key, window["weekend"], window["next_analysis"], cache,
+                                             model_output, deadline)
+            if not predictions:
+                print("❌ Every league request failed")
+                return run_fallback(model_output, telegram_token, telegram_chat_id)
+            publish_predictions(predictions, telegram_token, telegram_chat_id)
+            print(f"\n✅ BetWise Claude Predictor completed! Decision: {predictions['decision']}")
+            return predictions
+
+        context = ""
+        if model_output:
+            context, report = build_context(model_output, movements=load_movements())
+            print(f"🧮 Model context: {report['rows']}/{report['rows_available']} matches, "
+                  f"{report['movers']} odds movers, "
+                  f"~{report['estimated_tokens']}/{report['token_budget']} tokens")
+
+        user_prompt = build_user_prompt(datetime.now(), context)
+
+        print(f"🤖 Calling Claude API for analysis (deadline {deadline.remaining():.0f}s)...")
+        if args.no_stream:
+            response = call_claude_api(claude_api_key, user_prompt, cache, deadline=deadline)
         else:
-            print("ℹ️ Decision is SALTARE - no schedine sent")
+            forwarder = StreamForwarder(telegram_token, telegram_chat_id)
+            stream_parser = IncrementalJSONParser(forwarder)
+            response = stream_claude_api(claude_api_key, user_prompt, stream_parser, cache, deadline)
+            sent, partial = forwarder.sent, stream_parser.partial()
+
+        if not response:
+            print("❌ Failed to get response from Claude")
+            return run_fallback(model_output, telegram_token, telegram_chat_id)
+
+    predictions = process_response(response, telegram_token, telegram_chat_id, sent, partial)
+    if not predictions:
+        if args.replay:
+            return None
+        return run_fallback(model_output, telegram_token, telegram_chat_id)
 
-    print(f"\n✅ BetWise Claude Predictor completed! Decision: {decision}")
+    print(f"\n✅ BetWise Claude Predictor completed! Decision: {predictions.get('decision', 'SALTARE')}")
     return predictions
 
 
@@ -0,0 +1,288 @@
+"""
+BetWise Claude Stream - Consumo in streaming (SSE) della Messages API
+Legge i server-sent events man mano che arrivano e passa il testo a un
+parser JSON incrementale, che segnala ogni valore appena chiuso (es.
+"analysis" o una singola schedina). Così analisi e schedine possono essere
+validate e inviate subito, e una risposta troncata non va persa del tutto.
+"""
+
+import json
+import re
+import urllib.request
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from resilience import Deadline, DeadlineExceeded, urlopen_with_retry
+
+Path = Tuple
+ValueCallback = Callable[[Path, object], None]
+
+WHITESPACE = " \t\r\n"
+STRING_SPECIAL = re.compile(r'["\\\\]')
+NON_WHITESPACE = re.compile(r"[^ \t\r\n]")
+DECODER = json.JSONDecoder()
+
+
+class StreamError(Exception):
+    """Error event received from the streaming API"""
+
+
+def iter_sse_events(lines: Iterable[bytes]) -> Iterator[Tuple[str, Dict]]:
+    """(event, data) pairs from a server-sent events byte stream"""
+    event, data = None, []
+    for raw in lines:
+        line = raw.decode('utf-8').rstrip("\r\n")
+        if not line:
+            if data:
+                yield event or "message", json.loads("\n".join(data))
+            event, data = None, []
+        elif line.startswith(":"):
+            continue  # Comment / keep-alive
+        elif line.startswith("event:"):
+            event = line[6:].strip()
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip())
+    if data:
+        yield event or "message", json.loads("\n".join(data))
+
+
+def iter_text_deltas(events: Iterable[Tuple[str, Dict]], meta: Dict = None) -> Iterator[str]:
+    """
+    Text chunks of a Messages API stream.
+
+    `meta` (optional) collects stop_reason and usage from message events.
+    """
+    meta = meta if meta is not None else {}
+    for event, data in events:
+        if event == "content_block_delta":
+            delta = data.get("delta", {})
+            if delta.get("type") == "text_delta":
+                yield delta.get("text", "")
+        elif event == "message_start":
+            meta["usage"] = dict(data.get("message", {}).get("usage", {}))
+        elif event == "message_delta":
+            meta["stop_reason"] = data.get("delta", {}).get("stop_reason")
+            meta.setdefault("usage", {}).update(data.get("usage", {}))
+        elif event == "error":
+            raise StreamError(data.get("error", {}).get("message", "stream error"))
+
+
+def stream_messages(url: str, headers: Dict, payload: Dict, timeout: int = 120,
+                    meta: Dict = None, deadline: Optional[Deadline] = None) -> Iterator[str]:
+    """
+    POST a streaming Messages API request and yield text deltas.
+
+    With streaming the timeout bounds the wait between chunks, not the whole
+    response; `deadline` bounds the whole response (DeadlineExceeded after the
+    chunk that crossed it). Opening the stream is retried; a stream broken
+    midway is not.
+    """
+    body = json.dumps(dict(payload, stream=True)).encode('utf-8')
+    headers = dict(headers, Accept="text/event-stream")
+    response = urlopen_with_retry(lambda: urllib.request.Request(url, data=body, headers=headers),
+                                  timeout, deadline, label="Claude stream")
+    with response:
+        for text in iter_text_deltas(iter_sse_events(response), meta):
+            yield text
+            if deadline and deadline.expired():
+                raise DeadlineExceeded("Claude stream: deadline reached while streaming")
+
+
+class _Frame:
+    __slots__ = ("kind", "start", "path", "key", "expect_key", "index")
+
+    def __init__(self, kind: str, start: int, path: Path):
+        self.kind = kind            # "object" or "array"
+        self.start = start
+        self.path = path
+        self.key = None
+        self.expect_key = kind == "object"
+        self.index = 0
+
+
+class IncrementalJSONParser:
+    """
+    Push parser for the first JSON object in a text stream.
+
+    feed() text chunks as they arrive; every value that closes at depth
+    <= max_depth is decoded and passed to on_value(path, value), e.g.
+    ("analysis",) or ("schedine", "jackpot_classic"). Text before the first
+    "{" (prose, code fences) is skipped.
+
+    `select(path)` replaces the depth rule to pick the emitted values. With
+    keep=False the parser neither stores values nor decodes the whole
+    document, and drops text no open selected value still needs, so memory
+    stays bounded by the largest selected value (for reading big files).
+    Selected values whose children are not selected are decoded in a single
+    json step when already fully buffered.
+    """
+
+    def __init__(self, on_value: Optional[ValueCallback] = None, max_depth: int = 2,
+                 select: Optional[Callable[[Path], bool]] = None, keep: bool = True):
+        self.on_value = on_value
+        self.max_depth = max_depth
+        self.select = select
+        self.keep = keep
+        self.text = ""
+        self.pos = 0
+        self.stack: List[_Frame] = []
+        self.started = False
+        self.done = False
+        self.in_string = False
+        self.escape = False
+        self.string_start = 0
+        self.scalar_start: Optional[int] = None
+        self.completed: Dict[Path, object] = {}
+        self.result = None
+
+    def feed(self, chunk: str):
+        if self.done:
+            return
+        self.text += chunk
+        text = self.text
+
+        while self.pos < len(text) and not self.done:
+            ch = text[self.pos]
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                    self.pos += 1
+                    continue
+                # Jump to the next quote or backslash instead of stepping through the string
+                special = STRING_SPECIAL.search(text, self.pos)
+                if special is None:
+                    self.pos = len(text)
+                    break
+                self.pos = special.start()
+                if text[self.pos] == "\\":
+                    self.escape = True
+                else:
+                    self.in_string = False
+                    self._string_closed(self.string_start, self.pos + 1)
+                self.pos += 1
+                continue
+
+            if ch in WHITESPACE and self.scalar_start is None:
+                skip = NON_WHITESPACE.search(text, self.pos)
+                self.pos = skip.start() if skip else len(text)
+                continue
+
+            if not self.started:
+                if ch == "{":
+                    self.started = True
+                    self.stack.append(_Frame("object", self.pos, ()))
+                self.pos += 1
+                continue
+
+            if self.scalar_start is not None and (ch in WHITESPACE or ch in ",]}"):
+                self._close_value(self.scalar_start, self.pos)
+                self.scalar_start = None
+
+            frame = self.stack[-1]
+            if ch in WHITESPACE or ch == ":":
+                if ch == ":":
+                    frame.expect_key = False
+            elif ch == ",":
+                if frame.kind == "object":
+                    frame.expect_key = True
+                else:
+                    frame.index += 1
+            elif ch == '"':
+                self.in_string = True
+                self.string_start = self.pos
+            elif ch in "{[":
+                path = self._child_path(frame)
+                if self._leaf(path):
+                    # Decode the whole value in one step when it is already buffered
+                    try:
+                        value, end = DECODER.raw_decode(text, self.pos)
+                    except ValueError:
+                        pass  # Not complete yet: scan it character by character
+                    else:
+                        self._emit(path, value)
+                        self.pos = end
+                        continue
+                kind = "object" if ch == "{" else "array"
+                self.stack.append(_Frame(kind, self.pos, path))
+            elif ch in "}]":
+                closed = self.stack.pop()
+                if not self.stack:
+                    self.done = True
+                    if self.keep:
+                        self.result = json.loads(text[closed.start:self.pos + 1])
+                        self._emit(closed.path, self.result)
+                else:
+                    self._emit_slice(closed.path, closed.start, self.pos + 1)
+            elif self.scalar_start is None:
+                self.scalar_start = self.pos
+            self.pos += 1
+
+        if not self.keep:
+            self._trim()
+
+    def _selected(self, path: Path) -> bool:
+        return self.select(path) if self.select else len(path) <= self.max_depth
+
+    def _leaf(self, path: Path) -> bool:
+        """Selected value none of whose children is selected"""
+        return self._selected(path) and not self._selected(path + (0,)) and not self._selected(path + ("",))
+
+    def _trim(self):
+        """Drop consumed text that no open selected value, string or scalar still needs"""
+        cut = self.pos
+        for frame in self.stack:
+            if frame.path and self._selected(frame.path):  # The root is not decoded without keep
+                cut = min(cut, frame.start)
+                break  # Outer frames start first
+        if self.in_string:
+            cut = min(cut, self.string_start)
+        if self.scalar_start is not None:
+            cut = min(cut, self.scalar_start)
+        if cut <= 0:
+            return
+        self.text = self.text[cut:]
+        self.pos -= cut
+        self.string_start -= cut
+        if self.scalar_start is not None:
+            self.scalar_start -= cut
+        for frame in self.stack:
+            frame.start -= cut
+
+    def _child_path(self, frame: _Frame) -> Path:
+        return frame.path + ((frame.key,) if frame.kind == "object" else (frame.index,))
+
+    def _string_closed(self, start: int, end: int):
+        frame = self.stack[-1]
+        if frame.kind == "object" and frame.expect_key:
+            frame.key = json.loads(self.text[start:end])
+        else:
+            self._close_value(start, end)
+
+    def _close_value(self, start: int, end: int):
+        self._emit_slice(self._child_path(self.stack[-1]), start, end)
+
+    def _emit_slice(self, path: Path, start: int, end: int):
+        if self._selected(path):
+            self._emit(path, json.loads(self.text[start:end]))
+
+    def _emit(self, path: Path, value):
+        if self.keep:
+            self.completed[path] = value
+        if self.on_value:
+            self.on_value(path, value)
+
+    def partial(self) -> Dict:
+        """Document rebuilt from the values completed so far (for truncated responses)"""
+        if self.result is not None:
+            return self.result
+        document: Dict = {}
+        for path, value in sorted(self.completed.items(), key=lambda item: len(item[0])):
+            if len(path) == 1:
+                document[path[0]] = value
+            elif len(path) == 2 and isinstance(path[0], str):
+                parent = document.setdefault(path[0], {} if isinstance(path[1], str) else [])
+                if isinstance(parent, dict):
+                    parent[path[1]] = value
+                elif isinstance(parent, list):
+                    parent.append(value)
+        return document
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+BetWise Context Builder - Contesto compatto dal modello statistico per Claude
+Serializza l'output di predictor.py (lambda, probabilità 1X2/Over/BTTS,
+quote e value bet) in una tabella densa ordinata per edge, fermandosi entro
+un budget di token configurabile, e riporta i token stimati usati. Con lo
+storico delle quote (odds_store) aggiunge i movimenti reali più marcati dei
+bookmaker: drift apertura→ultima quota e velocità recente.
+"""
+
+import argparse
+import json
+import math
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from odds_store import OddsMovement, OddsMovements, load_movements
+from predictor import build_predictions
+from team_names import league_code
+
+# Context configuration
+CONTEXT_CONFIG = {
+    "token_budget": 3000,
+    "chars_per_token": 3.2,  # Conservative estimate for Italian text, digits and separators
+    "value_bets_per_row": 3,
+    "movers_share": 0.25,  # Budget share the odds movements may take; what they leave goes to the model rows
+}
+
+MARKET_LABELS = {"home": "1", "draw": "X", "away": "2", "over25": "O2.5", "under25": "U2.5"}
+
+HEADER = ("# Modello Poisson/Elo BetWise - righe ordinate per edge\n"
+          "# lega|data ora|casa-trasferta|xG c-t|1 X 2 %|O1.5 O2.5 BTTS %|quote 1 X 2|value bet mercato@quota+edge%")
+
+MOVERS_HEADER = ("# Movimenti quote REALI (media bookmaker, rilevazioni settimanali) - drift negativo = quota in calo\n"
+                 "# lega|data|casa-trasferta|mercato|apertura→ultima|drift %|velocità %/h")
+
+
+def estimate_tokens(text: str) -> int:
+    """Token estimate without a tokenizer (rounded up, so budgets are not exceeded)"""
+    return math.ceil(len(text) / CONTEXT_CONFIG["chars_per_token"])
+
+
+def _best_edge(match: Dict) -> int:
+    bets = match.get("value_bets", match.get("valueBets", []))
+    return max((vb.get("edge", 0) for vb in bets), default=0)
+
+
+def _league_tag(match: Dict) -> str:
+    return league_code(match.get("league", "")) or match.get("league_name", "?")
+
+
+def format_row(match: Dict) -> str:
+    """One fixture as a pipe-separated row"""
+    p = match.get("prediction", {})
+    o = match.get("odds", {})
+    bets = match.get("value_bets", match.get("valueBets", []))
+    home = match.get("home_team", match.get("homeTeam", ""))
+    away = match.get("away_team", match.get("awayTeam", ""))
+
+    value = " ".join(f"{vb['market'].replace(' ', '')}@{vb['odds']}+{vb['edge']}"
+                     for vb in bets[:CONTEXT_CONFIG["value_bets_per_row"]])
+    return "|".join([
+        _league_tag(match),
+        f"{match.get('date', '')[5:]} {match.get('time', '')}",
+        f"{home}-{away}",
+        f"{p.get('homeXG', '')} {p.get('awayXG', '')}",
+        f"{p.get('homeWin', '')} {p.get('draw', '')} {p.get('awayWin', '')}",
+        f"{p.get('over15', '')} {p.get('over25', '')} {p.get('btts', '')}",
+        f"{o.get('home', '')} {o.get('draw', '')} {o.get('away', '')}",
+        value or "-",
+    ])
+
+
+def format_mover(key: str, market: str, movement: OddsMovement, match_date: str = "") -> str:
+    """One snapshotted market's movement as a pipe-separated row"""
+    league, home, away = key.split("|")
+    return "|".join([
+        league,
+        match_date[5:] or "-",
+        f"{home}-{away}",
+        MARKET_LABELS.get(market, market),
+        f"{movement.opening:.2f}→{movement.latest:.2f}",
+        f"{movement.drift_pct:+.1f}",
+        f"{movement.velocity:+.2f}",
+    ])
+
+
+def _fill(header: str, rows: List[str], budget: int) -> List[str]:
+    """Header and as many rows as fit in `budget` estimated tokens (nothing when no row fits)"""
+    lines = [header]
+    used = estimate_tokens(header)
+    for row in rows:
+        cost = estimate_tokens(row + "\n")
+        if used + cost > budget:
+            break
+        lines.append(row)
+        used += cost
+    return lines if len(lines) > 1 else []
+
+
+def build_context(output: Dict, token_budget: int = None, leagues: Optional[List[str]] = None,
+                  movements: Optional[OddsMovements] = None) -> Tuple[str, Dict]:
+    """
+    Model output as a compact table within `token_budget` estimated tokens.
+
+    With `movements`, the real odds of upcoming fixtures that moved most
+    (by absolute drift) come first, within movers_share of the budget. Model
+    rows are ranked by best value-bet edge (then confidence) and added until
+    the next one would exceed the rest. `leagues` optionally restricts both
+    to those league names. Returns (context, report).
+    """
+    token_budget = token_budget or CONTEXT_CONFIG["token_budget"]
+    matches = output.get("matches", [])
+    if leagues:
+        matches = [m for m in matches if m.get("league_name", m.get("leagueName")) in leagues]
+
+    movers = movements.movers(since=datetime.now().strftime("%Y-%m-%d")) if movements else []
+    if leagues:
+        codes = {league_code(name) for name in leagues}
+        movers = [m for m in movers if m[0].split("|")[0] in codes]
+    mover_lines = _fill(MOVERS_HEADER,
+                        [format_mover(key, market, movement, movements.dates.get(key, ""))
+                         for key, market, movement in movers],
+                        int(token_budget * CONTEXT_CONFIG["movers_share"]))
+
+    ranked = sorted(matches, key=lambda m: (-_best_edge(m), -m.get("confidence", 0), m.get("id", "")))
+    remaining = token_budget - (estimate_tokens("\n".join(mover_lines) + "\n") if mover_lines else 0)
+    model_lines = _fill(HEADER, [format_row(match) for match in ranked], remaining)
+
+    context = "\n".join(mover_lines + model_lines)
+    report = {
+        "rows": max(len(model_lines) - 1, 0),
+        "rows_available": len(matches),
+        "movers": max(len(mover_lines) - 1, 0),
+        "movers_available": len(movers),
+        "estimated_tokens": estimate_tokens(context) if context else 0,
+        "token_budget": token_budget,
+    }
+    return context, report
+
+
+def load_model_output(path: str = None) -> Optional[Dict]:
+    """Statistical pipeline output: from a predictor-format file, or computed fresh"""
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    try:
+        return build_predictions()
+    except Exception as e:
+        print(f"Error running the statistical model: {e}")
+        return None
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="BetWise model context for Claude")
+    parser.add_argument("--input", default=None, help="Predictor output JSON (default: run the model)")
+    parser.add_argument("--budget", type=int, default=CONTEXT_CONFIG["token_budget"])
+    args = parser.parse_args()
+
+    output = load_model_output(args.input)
+    if not output:
+        return
+
+    context, report = build_context(output, args.budget, movements=load_movements())
+    print(context)
+    print(f"\n🧮 {report['rows']}/{report['rows_available']} rows, "
+          f"{report['movers']}/{report['movers_available']} odds movers, "
+          f"~{report['estimated_tokens']}/{report['token_budget']} tokens")
+
+
+if __name__ == "__main__":
+    main()
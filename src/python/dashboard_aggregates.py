@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+BetWise Dashboard Aggregates - Dati pronti da visualizzare per la dashboard
+Precalcola in Python liste partite già ordinate per lega, riepiloghi per lega
+e top value bet per mercato e lega, così il browser non fa più calcoli di
+modello (neanche per i dati demo) e il primo rendering su mobile è immediato.
+"""
+
+import argparse
+import random
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from output_writer import write_json_atomic
+from predictions_reader import ValueBetRanking
+from predictor import CONFIG, find_value_bets, generate_odds, prediction_from_lambdas
+
+# Aggregates configuration
+AGGREGATES_CONFIG = {
+    "top_k": 10,
+    "demo_path": "src/data/demo.json",
+}
+
+# Dashboard league codes (app.js CONFIG.leagues) for the demo slate
+DEMO_FIXTURES = {
+    "premier": [("Liverpool", "Tottenham", 85, 75), ("Arsenal", "Brighton", 82, 68),
+                ("Man City", "Crystal Palace", 90, 60), ("Chelsea", "Brentford", 78, 65)],
+    "laliga": [("Real Madrid", "Getafe", 88, 55), ("Barcelona", "Las Palmas", 86, 52),
+               ("Atletico Madrid", "Sevilla", 80, 70)],
+    "seriea": [("Inter", "Venezia", 85, 48), ("Napoli", "Monza", 82, 55),
+               ("Juventus", "Cagliari", 80, 58), ("Milan", "Verona", 78, 52)],
+    "bundesliga": [("Bayern Monaco", "Hoffenheim", 88, 62), ("Dortmund", "Union Berlin", 80, 65),
+                   ("Leverkusen", "Mainz", 84, 60)],
+    "ligue1": [("PSG", "Montpellier", 90, 50), ("Monaco", "Lens", 75, 70), ("Marsiglia", "Nantes", 76, 58)],
+    "eredivisie": [("PSV", "Twente", 82, 68), ("Ajax", "Utrecht", 80, 65)],
+    "primeira": [("Benfica", "Braga", 82, 72), ("Porto", "Guimaraes", 80, 65)],
+}
+
+
+def _league_info(code: str) -> Dict:
+    for info in CONFIG["leagues"].values():
+        if info["code"] == code:
+            return info
+    return {"name": code, "flag": ""}
+
+
+def dashboard_match(match: Dict) -> Dict:
+    """A match in the camelCase shape rendered by app.js"""
+    return {
+        "id": match.get("id"),
+        "league": match.get("league", "other"),
+        "leagueName": match.get("league_name", match.get("leagueName", "")),
+        "leagueFlag": match.get("league_flag", match.get("leagueFlag", "")),
+        "homeTeam": match.get("home_team", match.get("homeTeam", "")),
+        "awayTeam": match.get("away_team", match.get("awayTeam", "")),
+        "date": match.get("date", ""),
+        "time": match.get("time", ""),
+        "prediction": match.get("prediction", {}),
+        "odds": match.get("odds", {}),
+        "valueBets": match.get("value_bets", match.get("valueBets", [])),
+        "confidence": match.get("confidence", 0),
+    }
+
+
+def build_aggregates(output: Dict, top_k: int = None) -> Dict:
+    """
+    Per-league sorted match lists, league summaries and top value bets
+    (overall, per market, per league) from a predictions document.
+    """
+    top_k = top_k or AGGREGATES_CONFIG["top_k"]
+    matches = [dashboard_match(m) for m in output.get("matches", [])]
+    matches.sort(key=lambda m: (m["date"], m["time"], -m["confidence"], m["id"] or ""))
+
+    by_league: Dict[str, List[Dict]] = {}
+    ranking = ValueBetRanking(top_k)
+    for match in matches:
+        by_league.setdefault(match["league"], []).append(match)
+        ranking.add_match(match)
+
+    leagues = {}
+    for code, items in by_league.items():
+        league_bets = [vb for m in items for vb in m["valueBets"]]
+        leagues[code] = {
+            "name": items[0]["leagueName"],
+            "flag": items[0]["leagueFlag"],
+            "matches": len(items),
+            "valueBets": len(league_bets),
+            "bestEdge": max((vb["edge"] for vb in league_bets), default=0),
+            "avgConfidence": round(sum(m["confidence"] for m in items) / len(items)),
+            "avgGoals": round(sum(float(m["prediction"].get("homeXG", 0)) + float(m["prediction"].get("awayXG", 0))
+                                  for m in items) / len(items), 2),
+        }
+
+    return {
+        "order": [m["id"] for m in matches],
+        "matches": by_league,
+        "leagues": leagues,
+        "topValueBets": ranking.top(),
+        "stats": {
+            "totalMatches": len(matches),
+            "valueBets": ranking.count,
+            "leagues": len(by_league),
+        },
+    }
+
+
+def build_demo_output(seed: int = 42) -> Dict:
+    """Demo slate in predictor output format, computed with the real model functions"""
+    rng = random.Random(seed)
+    today = datetime.now()
+    saturday = today + timedelta(days=(5 - today.weekday()) % 7)
+    sunday = saturday + timedelta(days=1)
+    hours = [13, 15, 18, 20, 21]
+
+    matches = []
+    for league, fixtures in DEMO_FIXTURES.items():
+        info = _league_info(league)
+        for idx, (home, away, home_strength, away_strength) in enumerate(fixtures):
+            lambda_home = home_strength / 100 * CONFIG["avg_goals"] * CONFIG["home_advantage"]
+            lambda_away = away_strength / 100 * CONFIG["avg_goals"] * 0.9
+            prediction = prediction_from_lambdas(lambda_home, lambda_away)
+            odds = generate_odds(prediction)
+            match_date = saturday if idx % 2 == 0 else sunday
+
+            matches.append({
+                "id": f"{league}_{idx}",
+                "league": league,
+                "league_name": info["name"],
+                "league_flag": info["flag"],
+                "home_team": home,
+                "away_team": away,
+                "date": match_date.strftime("%Y-%m-%d"),
+                "time": f"{hours[idx % len(hours)]}:00",
+                "prediction": {
+                    "homeWin": prediction.home_win,
+                    "draw": prediction.draw,
+                    "awayWin": prediction.away_win,
+                    "over25": prediction.over_25,
+                    "over15": prediction.over_15,
+                    "over05": prediction.over_05,
+                    "btts": prediction.btts,
+                    "likelyScore": list(prediction.likely_score),
+                    "homeXG": str(prediction.home_xg),
+                    "awayXG": str(prediction.away_xg)
+                },
+                "odds": odds,
+                "value_bets": [asdict(vb) for vb in find_value_bets(prediction, odds)],
+                "confidence": rng.randint(50, 90),
+            })
+
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "weekend": f"{saturday.strftime('%d/%m')} - {sunday.strftime('%d/%m')}",
+        "matches": matches,
+        "schedine": demo_schedine([dashboard_match(m) for m in matches]),
+    }
+
+
+def demo_schedine(matches: List[Dict]) -> Dict:
+    """The dashboard's media + four jackpot slips, built from dashboard-shaped matches"""
+    ordered = sorted(matches, key=lambda m: m["valueBets"][0]["edge"] if m["valueBets"] else 0, reverse=True)
+
+    def selection(match, market, odds, probability):
+        return {"match": f"{match['homeTeam']} vs {match['awayTeam']}", "league": match["leagueName"],
+                "flag": match["leagueFlag"], "selection": market, "odds": odds, "probability": probability}
+
+    def pick(limit, chooser, legs=None):
+        legs = legs if legs is not None else []
+        used = {leg["match"].split(" vs ")[0] for leg in legs}
+        for match in ordered:
+            if len(legs) >= limit:
+                break
+            if match["homeTeam"] in used:
+                continue
+            choice = chooser(match, len(legs))
+            if choice:
+                legs.append(selection(match, *choice))
+                used.add(match["homeTeam"])
+        return legs
+
+    def media_choice(m, n):
+        p, o = m["prediction"], m["odds"]
+        best = m["valueBets"][0] if m["valueBets"] else None
+        if best and 1.40 <= best["odds"] <= 2.00:
+            return best["market"], best["odds"], best["probability"]
+        if p["over25"] > 55 and o["over25"] <= 1.90:
+            return "Over 2.5", o["over25"], p["over25"]
+        return None
+
+    def media_fill(m, n):
+        if m["prediction"]["btts"] > 55:
+            return "BTTS Si", m["odds"]["bttsYes"], m["prediction"]["btts"]
+        return None
+
+    def classic_choice(m, n):
+        p, o = m["prediction"], m["odds"]
+        if p["over15"] > 80:
+            return "Over 1.5", o["over15"], p["over15"]
+        if p["homeWin"] + p["draw"] > 75:
+            return "DC 1X", o["dc1x"], p["homeWin"] + p["draw"]
+        if p["draw"] + p["awayWin"] > 70:
+            return "DC X2", o["dcx2"], p["draw"] + p["awayWin"]
+        return None
+
+    def goals_choice(m, n):
+        p, o = m["prediction"], m["odds"]
+        if p["over25"] > 55:
+            return "Over 2.5", o["over25"], p["over25"]
+        if p["btts"] > 50:
+            return "BTTS Si", o["bttsYes"], p["btts"]
+        return None
+
+    def results_choice(m, n):
+        p, o = m["prediction"], m["odds"]
+        if p["homeWin"] > 50:
+            return "1", o["home"], p["homeWin"]
+        if p["awayWin"] > 45:
+            return "2", o["away"], p["awayWin"]
+        return None
+
+    def mega_choice(m, n):
+        p, o = m["prediction"], m["odds"]
+        if n < 3 and p["over15"] > 85:
+            return "Over 1.5", o["over15"], p["over15"]
+        if n < 6 and p["homeWin"] > 60:
+            return "1", o["home"], p["homeWin"]
+        if n < 9 and p["over25"] > 60:
+            return "Over 2.5", o["over25"], p["over25"]
+        if n < 12 and p["btts"] > 55:
+            return "BTTS Si", o["bttsYes"], p["btts"]
+        if p["homeWin"] + p["draw"] > 70:
+            return "DC 1X", o["dc1x"], p["homeWin"] + p["draw"]
+        return None
+
+    def total(legs, decimals):
+        odds = 1.0
+        for leg in legs:
+            odds *= leg["odds"]
+        return f"{odds:.{decimals}f}"
+
+    media = pick(5, media_fill, pick(5, media_choice))
+    jackpot1 = pick(12, classic_choice)
+    jackpot2 = pick(12, goals_choice)
+    jackpot3 = pick(10, results_choice)
+    jackpot4 = pick(15, mega_choice)
+
+    return {
+        "media": {"selections": media, "totalOdds": total(media, 2), "stake": 3, "winRate": 18},
+        "jackpot1": {"name": "Classic", "emoji": "🔴", "selections": jackpot1,
+                     "totalOdds": total(jackpot1, 2), "stake": 2, "winRate": 8},
+        "jackpot2": {"name": "Goals", "emoji": "🔥", "selections": jackpot2,
+                     "totalOdds": total(jackpot2, 0), "stake": 1, "winRate": 0.8},
+        "jackpot3": {"name": "Results", "emoji": "💎", "selections": jackpot3,
+                     "totalOdds": total(jackpot3, 0), "stake": 1, "winRate": 0.3},
+        "jackpot4": {"name": "Mega", "emoji": "🚀", "selections": jackpot4,
+                     "totalOdds": total(jackpot4, 0), "stake": 1, "winRate": 0.05},
+    }
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="BetWise dashboard aggregates")
+    parser.add_argument("--demo", action="store_true", help="Regenerate the dashboard demo data")
+    args = parser.parse_args()
+
+    if args.demo:
+        output = build_demo_output()
+        demo = build_aggregates(output)
+        demo["schedine"] = output["schedine"]
+        demo["weekend"] = output["weekend"]
+        # Dates are moved to the coming weekend by app.js, so the file is only regenerated when the model changes
+        write_json_atomic(AGGREGATES_CONFIG["demo_path"], demo, volatile_fields=("generated_at", "weekend"),
+                          indent=None)
+        print(f"✅ Demo data saved to {AGGREGATES_CONFIG['demo_path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+BetWise Elo Ratings - Rating a gol con aggiornamenti incrementali O(1)
+Ogni risultato aggiorna solo le due squadre coinvolte. I rating vengono
+salvati tra un'esecuzione e l'altra e mappati su lambda di gol attesi,
+così mercati e value bet esistenti possono usarli direttamente.
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from predictor import (CONFIG, Prediction, iter_historical_data, parse_match_date,
+                       prediction_from_lambdas)
+
+# Elo configuration
+ELO_CONFIG = {
+    "initial_rating": 1500.0,
+    "k_factor": 20.0,
+    "home_advantage": 65.0,       # Rating points added to the home side
+    "season_carryover": 0.8,      # Share of the deviation from the mean kept across seasons
+    "goal_scale": 700.0,          # Rating difference per unit of log goal ratio
+    "ratings_path": "src/data/elo_ratings.json",
+    "first_season": 1993,
+}
+
+
+def season_codes(first_year: int, last_year: int) -> List[str]:
+    """football-data.co.uk season codes, e.g. 1993 -> '9394'"""
+    return [f"{y % 100:02d}{(y + 1) % 100:02d}" for y in range(first_year, last_year + 1)]
+
+
+def goal_multiplier(goal_diff: int) -> float:
+    """World Football Elo margin-of-victory multiplier"""
+    margin = abs(goal_diff)
+    if margin <= 1:
+        return 1.0
+    if margin == 2:
+        return 1.5
+    return (11 + margin) / 8
+
+
+class EloRatings:
+    """Goal-based Elo ratings for one league"""
+
+    def __init__(self, ratings: Optional[Dict[str, float]] = None,
+                 games: Optional[Dict[str, int]] = None,
+                 last_date: Optional[str] = None,
+                 last_season: Optional[str] = None,
+                 last_fixtures: Optional[List[str]] = None):
+        self.ratings = ratings or {}
+        self.games = games or {}
+        self.last_date = last_date
+        self.last_season = last_season
+        # "home|away" results already applied on last_date (None: unknown, skip the whole day)
+        self.last_fixtures = last_fixtures
+
+    def rating(self, team: str) -> float:
+        return self.ratings.get(team, ELO_CONFIG["initial_rating"])
+
+    def rating_diff(self, home: str, away: str) -> float:
+        """Home minus away rating, including home advantage"""
+        return self.rating(home) + ELO_CONFIG["home_advantage"] - self.rating(away)
+
+    def win_expectancy(self, home: str, away: str) -> float:
+        return 1 / (1 + 10 ** (-self.rating_diff(home, away) / 400))
+
+    def update(self, home: str, away: str, home_goals: int, away_goals: int) -> float:
+        """Apply one result in constant time, returns the rating change for the home side"""
+        expected = self.win_expectancy(home, away)
+        if home_goals > away_goals:
+            actual = 1.0
+        elif home_goals == away_goals:
+            actual = 0.5
+        else:
+            actual = 0.0
+
+        delta = ELO_CONFIG["k_factor"] * goal_multiplier(home_goals - away_goals) * (actual - expected)
+        self.ratings[home] = self.rating(home) + delta
+        self.ratings[away] = self.rating(away) - delta
+        self.games[home] = self.games.get(home, 0) + 1
+        self.games[away] = self.games.get(away, 0) + 1
+        return delta
+
+    def new_season(self, season: str):
+        """Regress every rating toward the mean at a season boundary"""
+        if self.last_season is not None and season != self.last_season:
+            mean = ELO_CONFIG["initial_rating"]
+            keep = ELO_CONFIG["season_carryover"]
+            for team, value in self.ratings.items():
+                self.ratings[team] = mean + (value - mean) * keep
+        self.last_season = season
+
+    def expected_goals(self, home: str, away: str) -> Tuple[float, float]:
+        """Map the rating difference to (lambda_home, lambda_away) around the league average"""
+        half = CONFIG["avg_goals"] / 2
+        ratio = math.exp(self.rating_diff(home, away) / ELO_CONFIG["goal_scale"])
+        lambda_home = max(0.3, min(4.0, half * ratio))
+        lambda_away = max(0.3, min(3.5, half / ratio))
+        return lambda_home, lambda_away
+
+    def predict(self, home: str, away: str) -> Prediction:
+        """Prediction in the same shape as calculate_prediction"""
+        return prediction_from_lambdas(*self.expected_goals(home, away))
+
+    def to_dict(self) -> Dict:
+        return {
+            "ratings": {t: round(r, 2) for t, r in sorted(self.ratings.items())},
+            "games": dict(sorted(self.games.items())),
+            "last_date": self.last_date,
+            "last_season": self.last_season,
+            "last_fixtures": self.last_fixtures,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "EloRatings":
+        return cls(
+            ratings=dict(data.get("ratings", {})),
+            games=dict(data.get("games", {})),
+            last_date=data.get("last_date"),
+            last_season=data.get("last_season"),
+            last_fixtures=data.get("last_fixtures"),
+        )
+
+
+def apply_results(elo: EloRatings, rows: Iterable[Dict], season: str) -> int:
+    """Stream result rows into the ratings, skipping anything already applied"""
+    elo.new_season(season)
+    cutoff = elo.last_date
+    done_on_cutoff = None if elo.last_fixtures is None else set(elo.last_fixtures)
+    applied = 0
+
+    for row in rows:
+        home = row.get('HomeTeam', '')
+        away = row.get('AwayTeam', '')
+        if not home or not away:
+            continue
+        try:
+            home_goals = int(row.get('FTHG', ''))
+            away_goals = int(row.get('FTAG', ''))
+        except (ValueError, TypeError):
+            continue
+
+        # Without a date a row cannot be told apart from one applied by a previous run
+        match_date = parse_match_date(row.get('Date', ''))
+        if not match_date:
+            continue
+        fixture = f"{home}|{away}"
+        if cutoff and (match_date < cutoff or (match_date == cutoff and
+                                               (done_on_cutoff is None or fixture in done_on_cutoff))):
+            continue
+
+        elo.update(home, away, home_goals, away_goals)
+        if elo.last_date is None or match_date > elo.last_date:
+            elo.last_date = match_date
+            elo.last_fixtures = []
+        if match_date == elo.last_date:
+            if elo.last_fixtures is None:
+                elo.last_fixtures = []
+            elo.last_fixtures.append(fixture)
+        applied += 1
+
+    return applied
+
+
+def load_ratings(path: str = None) -> Dict[str, EloRatings]:
+    """Load persisted ratings per league"""
+    path = path or ELO_CONFIG["ratings_path"]
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return {}
+
+    return {code: EloRatings.from_dict(state) for code, state in data.get("leagues", {}).items()}
+
+
+def save_ratings(leagues: Dict[str, EloRatings], path: str = None):
+    """Persist ratings per league"""
+    path = path or ELO_CONFIG["ratings_path"]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    output = {
+        "updated_at": datetime.now().isoformat(),
+        "leagues": {code: elo.to_dict() for code, elo in sorted(leagues.items())},
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2, ensure_ascii=False)
+
+
+def update_league(elo: EloRatings, league_code: str, seasons: List[str]) -> int:
+    """Stream the given seasons of a league into its ratings"""
+    applied = 0
+    for season in seasons:
+        applied += apply_results(elo, iter_historical_data(league_code, season), season)
+    return applied
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="BetWise Elo ratings")
+    parser.add_argument("--leagues", nargs="*", default=list(CONFIG["leagues"]))
+    parser.add_argument("--init", action="store_true",
+                        help="Rebuild ratings from every season since first_season")
+    parser.add_argument("--season", default="2425")
+    args = parser.parse_args()
+
+    print("📈 BetWise Elo Ratings - Starting...")
+    leagues = {} if args.init else load_ratings()
+    current_year = 2000 + int(args.season[:2])
+
+    start = time.perf_counter()
+    total = 0
+    for code in args.leagues:
+        elo = leagues.setdefault(code, EloRatings())
+        if args.init:
+            seasons = season_codes(ELO_CONFIG["first_season"], current_year)
+        else:
+            seasons = [args.season]
+        applied = update_league(elo, code, seasons)
+        total += applied
+        print(f"   🏟️ {CONFIG['leagues'][code]['name']}: {applied} results, {len(elo.ratings)} teams")
+
+    elapsed = time.perf_counter() - start
+    print(f"\n⚡ {total} results in {elapsed:.2f}s")
+
+    save_ratings(leagues)
+    print(f"✅ Ratings saved to {ELO_CONFIG['ratings_path']}")
+    return leagues
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+BetWise Ensemble - Blending di Poisson, rating Elo e probabilità di mercato
+I pesi vengono appresi per lega minimizzando la log-loss 1X2 sul backtest
+e salvati per lega/stagione, così la previsione settimanale li applica
+senza rifare il fit.
+"""
+
+import argparse
+import json
+import math
+import os
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from backtest import MARKETS, load_backtest, prediction_probabilities
+from predictor import CONFIG, Prediction
+
+# Ensemble configuration
+ENSEMBLE_CONFIG = {
+    "weights_path": "src/data/ensemble_weights.json",
+    "sources": ["poisson", "elo", "market"],
+    "prediction_sources": ["poisson", "elo"],  # The weekly run has no real bookmaker odds to de-margin
+    "grid_step": 0.05,
+    "min_rows": 50,  # Minimum rows for a source to take part in the fit
+}
+
+OUTCOMES = ("home", "draw", "away")
+EPSILON = 1e-12
+
+Blender = Callable[[str, str, Prediction], Prediction]
+
+
+def outcome_key(home_goals: int, away_goals: int) -> str:
+    if home_goals > away_goals:
+        return "home"
+    if home_goals == away_goals:
+        return "draw"
+    return "away"
+
+
+def _simplex_grid(n: int, step: float) -> List[Tuple[float, ...]]:
+    """All weight vectors of length n on a regular grid that sum to 1"""
+    units = round(1 / step)
+
+    def compose(remaining: int, slots: int):
+        if slots == 1:
+            yield (remaining,)
+            return
+        for i in range(remaining + 1):
+            for rest in compose(remaining - i, slots - 1):
+                yield (i,) + rest
+
+    return [tuple(u / units for u in combo) for combo in compose(units, n)]
+
+
+def fit_weights(rows: List[Dict], sources: List[str] = None, step: float = None) -> Optional[Dict]:
+    """
+    Grid-search blend weights minimizing 1X2 log-loss.
+
+    The probability each source gave to the actual outcome is extracted once
+    into one column per source; every candidate weight vector is then scored
+    with a single pass over those columns.
+    """
+    sources = sources or ENSEMBLE_CONFIG["sources"]
+    step = step or ENSEMBLE_CONFIG["grid_step"]
+
+    available = [s for s in sources
+                 if sum(1 for r in rows if s in r["sources"]) >= ENSEMBLE_CONFIG["min_rows"]]
+    if not available:
+        return None
+
+    columns = [[] for _ in available]
+    for row in rows:
+        if not all(s in row["sources"] for s in available):
+            continue
+        outcome = outcome_key(row["home_goals"], row["away_goals"])
+        for col, source in zip(columns, available):
+            col.append(row["sources"][source].get(outcome, 0.0))
+
+    n = len(columns[0])
+    if n == 0:
+        return None
+
+    row_probs = list(zip(*columns))
+    best_weights, best_loss = None, float("inf")
+    for weights in _simplex_grid(len(available), step):
+        loss = -sum(math.log(max(sum(w * p for w, p in zip(weights, probs)), EPSILON))
+                    for probs in row_probs) / n
+        if loss < best_loss:
+            best_weights, best_loss = weights, loss
+
+    baseline = {s: round(-sum(math.log(max(p, EPSILON)) for p in col) / n, 5)
+                for s, col in zip(available, columns)}
+
+    return {
+        "weights": {s: round(w, 4) for s, w in zip(available, best_weights)},
+        "log_loss": round(best_loss, 5),
+        "baseline": baseline,
+        "rows": n,
+        "fitted_at": datetime.now().isoformat(),
+    }
+
+
+def load_weights(path: str = None) -> Dict[str, Dict]:
+    """Load cached weights keyed by 'league/season'"""
+    path = path or ENSEMBLE_CONFIG["weights_path"]
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_weights(cache: Dict[str, Dict], path: str = None):
+    path = path or ENSEMBLE_CONFIG["weights_path"]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(dict(sorted(cache.items())), f, indent=2, ensure_ascii=False)
+
+
+def get_weights(league_code: str, season: str, rows: Optional[List[Dict]] = None,
+                refit: bool = False) -> Optional[Dict[str, float]]:
+    """Cached weights for a league/season, fitting from `rows` on a cache miss"""
+    cache = load_weights()
+    key = f"{league_code}/{season}"
+
+    if key in cache and "prediction" in cache[key] and not refit:
+        return cache[key]["weights"]
+    if not rows:
+        return None
+
+    fitted = fit_weights(rows)
+    if not fitted:
+        return None
+    # Weights over the sources available at prediction time, fitted and scored on their own
+    fitted["prediction"] = fit_weights(rows, ENSEMBLE_CONFIG["prediction_sources"])
+    cache[key] = fitted
+    save_weights(cache)
+    return fitted["weights"]
+
+
+def prediction_weights(entry: Dict) -> Optional[Dict[str, float]]:
+    """Weights the weekly run blends with, from a cached league/season entry"""
+    return (entry.get("prediction") or {}).get("weights")
+
+
+def _normalized(weights: Dict[str, float], present: Tuple[str, ...]) -> Dict[str, float]:
+    """Renormalize weights over the sources that are actually present"""
+    total = sum(weights.get(s, 0.0) for s in present)
+    if total <= 0:
+        return {}
+    return {s: weights.get(s, 0.0) / total for s in present}
+
+
+def blend_fixtures(fixtures: List[Dict[str, Dict[str, float]]],
+                   weights: Dict[str, float]) -> List[Dict[str, float]]:
+    """
+    Blend per-source market probabilities for many fixtures at once.
+
+    Each fixture maps source -> {market: probability}. Normalized weights are
+    computed once per combination of present sources and reused.
+    """
+    norm_cache: Dict[Tuple[str, ...], Dict[str, float]] = {}
+    blended = []
+
+    for sources in fixtures:
+        result = {}
+        for market in MARKETS:
+            present = tuple(s for s in sorted(sources) if market in sources[s])
+            if present not in norm_cache:
+                norm_cache[present] = _normalized(weights, present)
+            norm = norm_cache[present]
+            if norm:
+                result[market] = sum(w * sources[s][market] for s, w in norm.items())
+
+        outcome_total = sum(result.get(o, 0.0) for o in OUTCOMES)
+        if outcome_total > 0:
+            for o in OUTCOMES:
+                result[o] = result.get(o, 0.0) / outcome_total
+        blended.append(result)
+
+    return blended
+
+
+def blend_prediction(poisson: Prediction, weights: Dict[str, float],
+                     elo: Optional[Prediction] = None,
+                     market: Optional[Dict[str, float]] = None) -> Prediction:
+    """Blend a single fixture into a Prediction that find_value_bets can consume"""
+    sources = {"poisson": prediction_probabilities(poisson)}
+    models = {"poisson": poisson}
+    if elo is not None:
+        sources["elo"] = prediction_probabilities(elo)
+        models["elo"] = elo
+    if market:
+        sources["market"] = market
+
+    probs = blend_fixtures([sources], weights)[0]
+    model_weights = _normalized(weights, tuple(models)) or {"poisson": 1.0}
+
+    def model_avg(field: str) -> float:
+        return sum(w * getattr(models[s], field) for s, w in model_weights.items())
+
+    return Prediction(
+        home_win=round(probs.get("home", poisson.home_win / 100) * 100),
+        draw=round(probs.get("draw", poisson.draw / 100) * 100),
+        away_win=round(probs.get("away", poisson.away_win / 100) * 100),
+        over_25=round(probs.get("over25", poisson.over_25 / 100) * 100),
+        over_15=round(model_avg("over_15")),
+        over_05=round(model_avg("over_05")),
+        btts=round(probs.get("btts", poisson.btts / 100) * 100),
+        likely_score=poisson.likely_score,
+        home_xg=round(model_avg("home_xg"), 2),
+        away_xg=round(model_avg("away_xg"), 2)
+    )
+
+
+def league_blender(league_code: str) -> Optional[Blender]:
+    """
+    Blender for the weekly run using the most recent prediction-time weights of
+    a league and the persisted Elo ratings. Returns None when nothing has been fitted.
+    """
+    from elo_ratings import load_ratings
+
+    cache = load_weights()
+    keys = sorted(k for k in cache if k.startswith(f"{league_code}/") and prediction_weights(cache[k]))
+    if not keys:
+        return None
+    weights = prediction_weights(cache[keys[-1]])
+
+    elo = load_ratings().get(league_code)
+
+    def blend(home: str, away: str, prediction: Prediction) -> Prediction:
+        elo_prediction = elo.predict(home, away) if elo and "elo" in weights else None
+        return blend_prediction(prediction, weights, elo_prediction)
+
+    return blend
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="BetWise ensemble weight fitting")
+    parser.add_argument("--leagues", nargs="*", default=list(CONFIG["leagues"]))
+    parser.add_argument("--refit", action="store_true")
+    args = parser.parse_args()
+
+    print("🧬 BetWise Ensemble - Fitting blend weights...")
+    for code in args.leagues:
+        rows = load_backtest(code)
+        if not rows:
+            print(f"   ⚠️ No backtest rows for {CONFIG['leagues'][code]['name']} (run backtest.py first)")
+            continue
+
+        by_season: Dict[str, List[Dict]] = {}
+        for row in rows:
+            by_season.setdefault(row["season"], []).append(row)
+
+        for season, season_rows in sorted(by_season.items()):
+            weights = get_weights(code, season, season_rows, refit=args.refit)
+            label = ", ".join(f"{s}={w:.2f}" for s, w in (weights or {}).items()) or "not enough data"
+            predict = prediction_weights(load_weights().get(f"{code}/{season}", {}))
+            if predict:
+                label += " | weekly: " + ", ".join(f"{s}={w:.2f}" for s, w in predict.items())
+            print(f"   ⚖️ {CONFIG['leagues'][code]['name']} {season}: {label}")
+
+    print(f"✅ Weights cached in {ENSEMBLE_CONFIG['weights_path']}")
+
+
+if __name__ == "__main__":
+    main()
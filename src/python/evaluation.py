@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+BetWise Evaluation - Scoring e calibrazione delle probabilità
+Calcola Brier score, log-loss, ranked probability score e curve di
+affidabilità per mercato e lega sulle righe di backtest, e stima un
+calibratore opzionale (isotonico o Platt) applicato in fase di previsione.
+"""
+
+import argparse
+import bisect
+import json
+import math
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from backtest import load_backtest
+from predictor import CONFIG, Prediction
+
+# Evaluation configuration
+EVAL_CONFIG = {
+    "bins": 10,
+    "report_path": "src/data/evaluation_report.json",
+    "calibration_path": "src/data/calibration.json",
+    "min_calibration_rows": 200,
+}
+
+OUTCOMES = ("home", "draw", "away")
+BINARY_MARKETS = ("home", "draw", "away", "over25", "btts")
+EPSILON = 1e-12
+
+
+class _Accumulator:
+    """Running sums for one (league, source) pair"""
+
+    def __init__(self, bins: int):
+        self.bins = bins
+        self.n_1x2 = 0
+        self.brier_1x2 = 0.0
+        self.logloss_1x2 = 0.0
+        self.rps = 0.0
+        self.binary = {m: [0, 0.0, 0.0] for m in ("over25", "btts")}  # n, brier, logloss
+        # market -> bin -> [count, sum_pred, hits]
+        self.reliability = {m: [[0, 0.0, 0] for _ in range(bins)] for m in BINARY_MARKETS}
+
+    def add(self, probs: Dict[str, float], outcome: str, hits: Dict[str, bool]):
+        if all(o in probs for o in OUTCOMES):
+            p = [probs[o] for o in OUTCOMES]
+            y = [1.0 if o == outcome else 0.0 for o in OUTCOMES]
+            self.n_1x2 += 1
+            self.brier_1x2 += sum((pi - yi) ** 2 for pi, yi in zip(p, y))
+            self.logloss_1x2 -= math.log(max(probs[outcome], EPSILON))
+            # Ranked probability score over the ordered outcomes home < draw < away
+            cum_p = cum_y = 0.0
+            rps = 0.0
+            for pi, yi in zip(p[:-1], y[:-1]):
+                cum_p += pi
+                cum_y += yi
+                rps += (cum_p - cum_y) ** 2
+            self.rps += rps / (len(p) - 1)
+
+        for market in ("over25", "btts"):
+            if market in probs:
+                hit = hits[market]
+                stats = self.binary[market]
+                prob = probs[market]
+                stats[0] += 1
+                stats[1] += (prob - hit) ** 2
+                stats[2] -= math.log(max(prob if hit else 1 - prob, EPSILON))
+
+        for market in BINARY_MARKETS:
+            if market in probs:
+                prob = probs[market]
+                cell = self.reliability[market][min(int(prob * self.bins), self.bins - 1)]
+                cell[0] += 1
+                cell[1] += prob
+                cell[2] += hits[market]
+
+    def merge(self, other: "_Accumulator"):
+        """Fold another accumulator into this one"""
+        self.n_1x2 += other.n_1x2
+        self.brier_1x2 += other.brier_1x2
+        self.logloss_1x2 += other.logloss_1x2
+        self.rps += other.rps
+        for market, stats in other.binary.items():
+            for i, value in enumerate(stats):
+                self.binary[market][i] += value
+        for market, cells in other.reliability.items():
+            for mine, theirs in zip(self.reliability[market], cells):
+                for i, value in enumerate(theirs):
+                    mine[i] += value
+
+    def report(self) -> Dict:
+        result = {}
+        if self.n_1x2:
+            result["1x2"] = {
+                "n": self.n_1x2,
+                "brier": round(self.brier_1x2 / self.n_1x2, 5),
+                "log_loss": round(self.logloss_1x2 / self.n_1x2, 5),
+                "rps": round(self.rps / self.n_1x2, 5),
+            }
+        for market, (n, brier, logloss) in self.binary.items():
+            if n:
+                result[market] = {"n": n, "brier": round(brier / n, 5), "log_loss": round(logloss / n, 5)}
+
+        result["reliability"] = {
+            market: [
+                {
+                    "bin": [round(i / self.bins, 2), round((i + 1) / self.bins, 2)],
+                    "n": count,
+                    "avg_predicted": round(sum_pred / count, 4),
+                    "hit_rate": round(hits / count, 4),
+                }
+                for i, (count, sum_pred, hits) in enumerate(cells) if count
+            ]
+            for market, cells in self.reliability.items()
+        }
+        return result
+
+
+def row_outcomes(row: Dict) -> Tuple[str, Dict[str, bool]]:
+    """1X2 outcome and the hit flag of every binary market for a backtest row"""
+    hg, ag = row["home_goals"], row["away_goals"]
+    outcome = "home" if hg > ag else "draw" if hg == ag else "away"
+    hits = {"home": outcome == "home", "draw": outcome == "draw", "away": outcome == "away",
+            "over25": hg + ag > 2, "btts": hg > 0 and ag > 0}
+    return outcome, hits
+
+
+def evaluate(rows: Iterable[Dict], bins: int = None) -> Dict:
+    """
+    Score every source per league in a single pass over the rows.
+
+    Each row adds to a per-(league, source) accumulator and the cross-league
+    totals are merged at the end, so the cost is linear in the number of
+    predictions.
+    """
+    bins = bins or EVAL_CONFIG["bins"]
+    accumulators: Dict[Tuple[str, str], _Accumulator] = {}
+
+    for row in rows:
+        outcome, hits = row_outcomes(row)
+        league = row["league"]
+        for source, probs in row["sources"].items():
+            key = (league, source)
+            acc = accumulators.get(key)
+            if acc is None:
+                acc = accumulators[key] = _Accumulator(bins)
+            acc.add(probs, outcome, hits)
+
+    totals: Dict[Tuple[str, str], _Accumulator] = {}
+    for (league, source), acc in accumulators.items():
+        total = totals.setdefault(("all", source), _Accumulator(bins))
+        total.merge(acc)
+    accumulators.update(totals)
+
+    report: Dict[str, Dict] = {}
+    for (league, source), acc in sorted(accumulators.items()):
+        report.setdefault(league, {})[source] = acc.report()
+    return report
+
+
+def add_ensemble_source(rows: List[Dict]) -> List[Dict]:
+    """
+    Add the blended 'ensemble' source to rows whose league has cached weights.
+
+    Rows are blended like the weekly run blends: prediction-time weights over
+    the sources it has, so the market column never leaks into the ensemble.
+    """
+    from ensemble import blend_fixtures, load_weights, prediction_weights
+
+    cache = load_weights()
+    by_key: Dict[str, List[Dict]] = {}
+    for row in rows:
+        by_key.setdefault(f"{row['league']}/{row['season']}", []).append(row)
+
+    for key, key_rows in by_key.items():
+        weights = prediction_weights(cache.get(key, {}))
+        if not weights:
+            continue
+        blended = blend_fixtures([{s: p for s, p in r["sources"].items() if s in weights} for r in key_rows],
+                                 weights)
+        for row, probs in zip(key_rows, blended):
+            row["sources"]["ensemble"] = probs
+
+    return rows
+
+
+def fit_platt(preds: List[float], hits: List[int], iterations: int = 50) -> Dict:
+    """Platt scaling on the logit of the raw probability, fitted with Newton's method"""
+    xs = [math.log(max(p, 1e-6) / max(1 - p, 1e-6)) for p in preds]
+    a, b = 1.0, 0.0
+
+    for _ in range(iterations):
+        g_a = g_b = h_aa = h_ab = h_bb = 0.0
+        for x, y in zip(xs, hits):
+            q = 1 / (1 + math.exp(-(a * x + b)))
+            w = q * (1 - q)
+            g_a += (q - y) * x
+            g_b += q - y
+            h_aa += w * x * x
+            h_ab += w * x
+            h_bb += w
+        det = h_aa * h_bb - h_ab * h_ab
+        if abs(det) < EPSILON:
+            break
+        step_a = (h_bb * g_a - h_ab * g_b) / det
+        step_b = (h_aa * g_b - h_ab * g_a) / det
+        a -= step_a
+        b -= step_b
+        if abs(step_a) < 1e-8 and abs(step_b) < 1e-8:
+            break
+
+    return {"method": "platt", "a": round(a, 6), "b": round(b, 6)}
+
+
+def fit_isotonic(preds: List[float], hits: List[int]) -> Dict:
+    """Isotonic regression (pool adjacent violators) stored as a step function"""
+    pairs = sorted(zip(preds, hits))
+    # Each block: [max_pred, sum_hits, count]
+    blocks: List[List[float]] = []
+    for p, y in pairs:
+        blocks.append([p, float(y), 1])
+        while len(blocks) > 1 and blocks[-2][1] / blocks[-2][2] >= blocks[-1][1] / blocks[-1][2]:
+            last = blocks.pop()
+            blocks[-1][0] = last[0]
+            blocks[-1][1] += last[1]
+            blocks[-1][2] += last[2]
+
+    return {
+        "method": "isotonic",
+        "thresholds": [round(b[0], 6) for b in blocks],
+        "values": [round(b[1] / b[2], 6) for b in blocks],
+    }
+
+
+def calibrate_probability(prob: float, calibrator: Dict) -> float:
+    """Apply a fitted calibrator to a single probability"""
+    if calibrator["method"] == "platt":
+        x = math.log(max(prob, 1e-6) / max(1 - prob, 1e-6))
+        return 1 / (1 + math.exp(-(calibrator["a"] * x + calibrator["b"])))
+
+    thresholds = calibrator["thresholds"]
+    idx = min(bisect.bisect_left(thresholds, prob), len(thresholds) - 1)
+    return calibrator["values"][idx]
+
+
+def fit_calibrators(rows: List[Dict], source: str, method: str = "isotonic") -> Dict[str, Dict]:
+    """Fit one calibrator per market for a source"""
+    preds = {m: [] for m in BINARY_MARKETS}
+    hits = {m: [] for m in BINARY_MARKETS}
+
+    for row in rows:
+        probs = row["sources"].get(source)
+        if not probs:
+            continue
+        _, actual = row_outcomes(row)
+        for market in BINARY_MARKETS:
+            if market in probs:
+                preds[market].append(probs[market])
+                hits[market].append(int(actual[market]))
+
+    fit = fit_platt if method == "platt" else fit_isotonic
+    return {market: fit(preds[market], hits[market]) for market in BINARY_MARKETS
+            if len(preds[market]) >= EVAL_CONFIG["min_calibration_rows"]}
+
+
+def apply_calibration(prediction: Prediction, calibrators: Dict[str, Dict]) -> Prediction:
+    """Calibrate a Prediction's 1X2, Over 2.5 and BTTS probabilities"""
+    raw = {
+        "home": prediction.home_win / 100,
+        "draw": prediction.draw / 100,
+        "away": prediction.away_win / 100,
+        "over25": prediction.over_25 / 100,
+        "btts": prediction.btts / 100,
+    }
+    cal = {m: calibrate_probability(p, calibrators[m]) if m in calibrators else p
+           for m, p in raw.items()}
+
+    total = sum(cal[o] for o in OUTCOMES) or 1.0
+    return Prediction(
+        home_win=round(cal["home"] / total * 100),
+        draw=round(cal["draw"] / total * 100),
+        away_win=round(cal["away"] / total * 100),
+        over_25=round(cal["over25"] * 100),
+        over_15=max(prediction.over_15, round(cal["over25"] * 100)),
+        over_05=prediction.over_05,
+        btts=round(cal["btts"] * 100),
+        likely_score=prediction.likely_score,
+        home_xg=prediction.home_xg,
+        away_xg=prediction.away_xg
+    )
+
+
+def load_calibration(path: str = None) -> Dict[str, Dict]:
+    path = path or EVAL_CONFIG["calibration_path"]
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f).get("leagues", {})
+    except FileNotFoundError:
+        return {}
+
+
+def league_calibrator(league_code: str, source: str) -> Optional[Dict[str, Dict]]:
+    """Calibrators for a league, only if they were fitted on the given source"""
+    from ensemble import ENSEMBLE_CONFIG
+
+    entry = load_calibration().get(league_code)
+    if not entry or entry.get("source") != source:
+        return None
+    if source == "ensemble" and entry.get("blend") != ENSEMBLE_CONFIG["prediction_sources"]:
+        return None  # Fitted on a blend the weekly run does not produce
+    return entry["markets"]
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="BetWise probability evaluation and calibration")
+    parser.add_argument("--leagues", nargs="*", default=list(CONFIG["leagues"]))
+    parser.add_argument("--calibrate", choices=["isotonic", "platt"], default=None,
+                        help="Also fit calibrators applied at prediction time")
+    args = parser.parse_args()
+
+    print("📏 BetWise Evaluation - Starting...")
+    rows = []
+    for code in args.leagues:
+        rows.extend(load_backtest(code))
+
+    if not rows:
+        print("⚠️ No backtest rows found (run backtest.py first)")
+        return
+
+    add_ensemble_source(rows)
+    report = evaluate(rows)
+
+    for source, metrics in report.get("all", {}).items():
+        if "1x2" in metrics:
+            m = metrics["1x2"]
+            print(f"   📊 {source}: Brier {m['brier']} | LogLoss {m['log_loss']} | RPS {m['rps']} (n={m['n']})")
+
+    output = {"generated_at": datetime.now().isoformat(), "predictions": len(rows), "report": report}
+    os.makedirs(os.path.dirname(EVAL_CONFIG["report_path"]), exist_ok=True)
+    with open(EVAL_CONFIG["report_path"], 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2, ensure_ascii=False)
+    print(f"✅ Report saved to {EVAL_CONFIG['report_path']}")
+
+    if args.calibrate:
+        from ensemble import ENSEMBLE_CONFIG
+
+        calibration = {}
+        for code in args.leagues:
+            league_rows = [r for r in rows if r["league"] == code]
+            # Calibrate what predictor.main actually publishes
+            source = "ensemble" if any("ensemble" in r["sources"] for r in league_rows) else "poisson"
+            markets = fit_calibrators(league_rows, source, args.calibrate)
+            if markets:
+                calibration[code] = {"source": source, "markets": markets}
+                if source == "ensemble":
+                    calibration[code]["blend"] = ENSEMBLE_CONFIG["prediction_sources"]
+                print(f"   🎯 {CONFIG['leagues'][code]['name']}: {args.calibrate} on {source}")
+
+        with open(EVAL_CONFIG["calibration_path"], 'w', encoding='utf-8') as f:
+            json.dump({"generated_at": datetime.now().isoformat(), "leagues": calibration},
+                      f, indent=2, ensure_ascii=False)
+        print(f"✅ Calibrators saved to {EVAL_CONFIG['calibration_path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+BetWise Fallback - Schedine dal modello statistico quando Claude non risponde
+Converte l'output di predictor.py in selezioni candidate e le passa allo
+stesso combinatore del fan-out, producendo un documento nello schema di
+claude_predictor: il job settimanale pubblica sempre qualcosa.
+"""
+
+from typing import Dict, List, Optional
+
+from claude_fanout import build_predictions as combine_predictions
+from predictor import build_predictions as run_model
+
+# Fallback configuration
+FALLBACK_CONFIG = {
+    "min_probability": 55,  # Markets below this model probability are not candidates
+    "min_odds": 1.05,
+}
+
+
+def _market_probabilities(prediction: Dict, odds: Dict) -> List[tuple]:
+    p = prediction
+    return [
+        ("1", p["homeWin"], odds.get("home")),
+        ("X", p["draw"], odds.get("draw")),
+        ("2", p["awayWin"], odds.get("away")),
+        ("DC 1X", p["homeWin"] + p["draw"], odds.get("dc1x")),
+        ("DC X2", p["draw"] + p["awayWin"], odds.get("dcx2")),
+        ("Over 1.5", p["over15"], odds.get("over15")),
+        ("Over 2.5", p["over25"], odds.get("over25")),
+        ("Under 2.5", 100 - p["over25"], odds.get("under25")),
+        ("BTTS Si", p["btts"], odds.get("bttsYes")),
+        ("BTTS No", 100 - p["btts"], odds.get("bttsNo")),
+    ]
+
+
+def model_results(output: Dict) -> List[Dict]:
+    """Per-league results in the fan-out shape, with model markets as candidates"""
+    by_league: Dict[str, Dict] = {}
+    for match in output.get("matches", []):
+        name = match.get("league_name", match.get("leagueName", ""))
+        result = by_league.setdefault(name, {
+            "league": name, "ok": True, "active": True,
+            "matches_available": 0, "red_flags": [], "candidates": [],
+        })
+        result["matches_available"] += 1
+
+        home = match.get("home_team", match.get("homeTeam", ""))
+        away = match.get("away_team", match.get("awayTeam", ""))
+        edges = {vb["market"]: vb["edge"] for vb in match.get("value_bets", match.get("valueBets", []))}
+
+        for market, probability, odds in _market_probabilities(match["prediction"], match.get("odds", {})):
+            if probability < FALLBACK_CONFIG["min_probability"] or not odds or odds < FALLBACK_CONFIG["min_odds"]:
+                continue
+            edge = edges.get(market)
+            result["candidates"].append({
+                "match": f"{home} vs {away}",
+                "league": name,
+                "flag": match.get("league_flag", match.get("leagueFlag", "")),
+                "selection": market,
+                "odds": odds,
+                "confidence": probability,
+                "reasoning": f"Modello {probability}%" + (f", edge +{edge}%" if edge else ""),
+            })
+
+    return list(by_league.values())
+
+
+def fallback_predictions(weekend: str, next_analysis: str, model_output: Optional[Dict] = None) -> Optional[Dict]:
+    """Claude-schema predictions built from the statistical pipeline alone"""
+    if model_output is None:
+        try:
+            model_output = run_model()
+        except Exception as e:
+            print(f"Error running the statistical model: {e}")
+            return None
+
+    results = model_results(model_output)
+    if not results:
+        return None
+
+    predictions = combine_predictions(results, weekend, next_analysis)
+    predictions["fallback"] = True
+    predictions["analysis"]["recommendation"] = (
+        "⚙️ Schedine dal modello statistico (analisi Claude non disponibile). "
+        + predictions["analysis"]["recommendation"]
+    )
+    return predictions
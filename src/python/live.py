@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+BetWise Live - Aggiornamento durante il weekend
+Interroga periodicamente la fonte dei risultati (football-data.co.uk o un
+feed compatibile), individua solo le righe nuove e le applica alle
+statistiche in modo incrementale; ricalcola le previsioni delle sole
+partite che coinvolgono le squadre interessate, chiude le schedine in
+corso con la logica della reconciliation e pubblica le differenze invece
+dei file completi. Il comando replay simula un weekend in locale.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from dataclasses import asdict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+from odds_store import load_movements
+from output_writer import write_json_atomic
+from predictor import (CONFIG, TeamStats, build_team_stats, parse_csv, predict_fixture,
+                       prediction_fields, update_team_stats)
+from reconciliation import LOST, PENDING, UNKNOWN, VOID, WON, ResultsIndex, settle_market, weekend_dates
+from team_names import league_code, match_key, normalize_team_name
+
+# Live configuration
+LIVE_CONFIG = {
+    "source": os.environ.get("BETWISE_LIVE_SOURCE", CONFIG["data_url"]),  # {season} and {league} placeholders
+    "season": "2425",
+    "interval": 300,  # Seconds between polls
+    "predictions_path": CONFIG["output_path"],
+    "output_dir": "src/data/live",  # head.json + one numbered diff per round
+    "timeout": 10,
+}
+
+RowKey = Tuple[str, str, str]
+
+
+def row_key(row: Dict) -> Optional[RowKey]:
+    """(date, home, away) of a played match row, None for fixtures without a score"""
+    home, away = row.get('HomeTeam', ''), row.get('AwayTeam', '')
+    if not home or not away or not row.get('FTHG', '').strip() or not row.get('FTAG', '').strip():
+        return None
+    return row.get('Date', ''), home, away
+
+
+class LeagueFeed:
+    """
+    One league's results source, read incrementally: conditional requests
+    (ETag / Last-Modified) and, since the CSV only grows, parsing of the
+    appended tail only.
+    """
+
+    def __init__(self, code: str, url: str):
+        self.code = code
+        self.url = url
+        self.etag: Optional[str] = None
+        self.modified: Optional[str] = None
+        self.text = ""
+        self.header = ""
+        self.seen: set = set()
+
+    def _download(self) -> Optional[str]:
+        headers = {'User-Agent': 'Mozilla/5.0'}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.modified:
+            headers['If-Modified-Since'] = self.modified
+        try:
+            with urllib.request.urlopen(urllib.request.Request(self.url, headers=headers),
+                                        timeout=LIVE_CONFIG["timeout"]) as response:
+                self.etag = response.headers.get('ETag')
+                self.modified = response.headers.get('Last-Modified')
+                return response.read().decode('utf-8', errors='ignore')
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return None
+            raise
+
+    def poll(self) -> List[Dict]:
+        """Rows with a result that were not returned by an earlier poll, in file order"""
+        text = self._download()
+        if text is None or text == self.text:
+            return []
+
+        if self.text and text.startswith(self.text) and self.text.endswith('\n'):
+            rows = parse_csv(self.header + text[len(self.text):])  # Appended lines only
+        else:
+            rows = parse_csv(text)
+            self.header = text[:text.find('\n') + 1]
+        self.text = text
+
+        new_rows = []
+        for row in rows:
+            key = row_key(row)
+            if key and key not in self.seen:
+                self.seen.add(key)
+                new_rows.append(row)
+        return new_rows
+
+
+class LiveLeague:
+    """Resident stats and model of one league, updated one result at a time"""
+
+    def __init__(self, code: str, rows: List[Dict]):
+        from ensemble import league_blender
+        from evaluation import league_calibrator
+
+        self.code = code
+        self.team_stats: Dict[str, TeamStats] = build_team_stats(rows)
+        self.names = {normalize_team_name(team): team for team in self.team_stats}
+        self.blend = league_blender(code)
+        self.calibrators = league_calibrator(code, "ensemble" if self.blend else "poisson")
+
+    def apply(self, rows: List[Dict]) -> set:
+        """Incremental stats update; returns the teams whose stats changed"""
+        affected = set()
+        for row in rows:
+            try:
+                home_goals, away_goals = int(row['FTHG']), int(row['FTAG'])
+            except (KeyError, ValueError):
+                continue
+            update_team_stats(self.team_stats, row['HomeTeam'], row['AwayTeam'], home_goals, away_goals)
+            affected.update((row['HomeTeam'], row['AwayTeam']))
+            self.names.setdefault(normalize_team_name(row['HomeTeam']), row['HomeTeam'])
+            self.names.setdefault(normalize_team_name(row['AwayTeam']), row['AwayTeam'])
+        return affected
+
+    def team(self, name: str) -> Optional[str]:
+        return name if name in self.team_stats else self.names.get(normalize_team_name(name))
+
+
+class LiveWeekend:
+    """
+    A published predictions document kept up to date during its weekend.
+
+    Each poll() applies the new results and returns the list of changes:
+    match results (with their value bets settled), updated predictions of
+    fixtures whose teams just played, settled schedina legs and closed slips.
+    """
+
+    def __init__(self, document: Dict, source: str = None, season: str = None):
+        self.document = document
+        self.source = source or LIVE_CONFIG["source"]
+        self.season = season or LIVE_CONFIG["season"]
+        self.dates = weekend_dates(document)
+        self.index = ResultsIndex()
+        self.leagues: Dict[str, LiveLeague] = {}
+        self.legs: Dict[Tuple[str, int], Dict] = {}
+        self.slips: Dict[str, str] = {}
+        self.movements = load_movements()
+
+        codes = set()
+        for match in document.get("matches", []):
+            codes.add(league_code(match.get("league", "")))
+        for slip in (document.get("schedine") or {}).values():
+            for sel in slip.get("selections", []) if isinstance(slip, dict) else []:
+                codes.add(league_code(sel.get("league", "")))
+        self.feeds = {code: LeagueFeed(code, self.source.format(season=self.season, league=code))
+                      for code in sorted(c for c in codes if c)}
+
+    def _match_teams(self, match: Dict) -> Tuple[str, str]:
+        return match.get("home_team", match.get("homeTeam", "")), match.get("away_team", match.get("awayTeam", ""))
+
+    def _match_dates(self, match: Dict) -> List[str]:
+        return [match["date"]] if match.get("date") else self.dates
+
+    def poll(self) -> List[Dict]:
+        changes: List[Dict] = []
+        affected: Dict[str, set] = {}
+
+        for code, feed in self.feeds.items():
+            try:
+                rows = feed.poll()
+            except Exception as e:
+                print(f"Error polling {code}: {e}")
+                continue
+            if not rows:
+                continue
+            self.index.add_rows(code, rows)
+            if code not in self.leagues:
+                self.leagues[code] = LiveLeague(code, rows)  # First poll: baseline, nothing to recompute
+            else:
+                affected[code] = self.leagues[code].apply(rows)
+
+        changes += self._update_matches(affected)
+        changes += self._settle_schedine()
+        return changes
+
+    def _update_matches(self, affected: Dict[str, set]) -> List[Dict]:
+        changes = []
+        for match in self.document.get("matches", []):
+            if match.get("result"):
+                continue
+            code = league_code(match.get("league", ""))
+            league = self.leagues.get(code)
+            if league is None:
+                continue
+            home, away = self._match_teams(match)
+
+            score = self.index.lookup(code, self._match_dates(match), normalize_team_name(home),
+                                      normalize_team_name(away))
+            if score:
+                settled = {vb["market"]: settle_market(vb["market"], *score)
+                           for vb in match.get("value_bets", match.get("valueBets", []))}
+                match["result"] = {"score": list(score), "value_bets": settled}
+                changes.append({"op": "result", "id": match.get("id"), "score": list(score), "value_bets": settled})
+                continue
+
+            teams = affected.get(code, ())
+            home_team, away_team = league.team(home), league.team(away)
+            if not teams or not home_team or not away_team or not ({home_team, away_team} & teams):
+                continue
+            movement = self.movements.get(code, home_team, away_team) if self.movements else None
+            prediction, odds, value_bets, confidence = predict_fixture(
+                league.team_stats[home_team], league.team_stats[away_team], league.blend, league.calibrators,
+                movement)
+            fields = {"prediction": prediction_fields(prediction), "odds": odds,
+                      "value_bets": [asdict(vb) for vb in value_bets], "confidence": confidence}
+            fields = {k: v for k, v in fields.items() if match.get(k) != v}
+            if fields:
+                match.update(fields)
+                changes.append({"op": "update", "id": match.get("id"), "fields": fields})
+        return changes
+
+    def _settle_schedine(self) -> List[Dict]:
+        changes = []
+        for slip_key, slip in (self.document.get("schedine") or {}).items():
+            if not isinstance(slip, dict) or slip_key in self.slips:
+                continue
+            statuses = []
+            for i, sel in enumerate(slip.get("selections", [])):
+                leg = self.legs.get((slip_key, i))
+                if leg is None:
+                    key = match_key(sel.get("match", ""))
+                    score = self.index.lookup(league_code(sel.get("league", "")), self.dates, *key) if key else None
+                    if score:
+                        leg = {"status": settle_market(sel.get("selection", ""), *score), "score": list(score)}
+                        self.legs[(slip_key, i)] = leg
+                        changes.append({"op": "leg", "slip": slip_key, "leg": i, **leg})
+                statuses.append(leg["status"] if leg else PENDING)
+
+            if LOST in statuses:
+                status = LOST
+            elif statuses and all(s in (WON, VOID) for s in statuses):
+                status = WON
+            elif statuses and PENDING not in statuses:
+                status = UNKNOWN  # A leg on a market reconciliation cannot settle
+            else:
+                continue
+            self.slips[slip_key] = status
+            changes.append({"op": "slip", "slip": slip_key, "status": status})
+        return changes
+
+    def summary(self) -> Dict:
+        """Slip statuses for the head file (pending slips included)"""
+        return {key: self.slips.get(key, PENDING) for key, slip in (self.document.get("schedine") or {}).items()
+                if isinstance(slip, dict)}
+
+
+class DiffPublisher:
+    """Numbered diff files plus a head.json the dashboard polls for the latest seq"""
+
+    def __init__(self, weekend: str, output_dir: str = None):
+        self.weekend = weekend
+        self.output_dir = output_dir or LIVE_CONFIG["output_dir"]
+        self.head_path = os.path.join(self.output_dir, "head.json")
+        self.seq = 0
+        try:
+            with open(self.head_path, 'r', encoding='utf-8') as f:
+                head = json.load(f)
+        except (FileNotFoundError, ValueError):
+            head = {}
+        if head.get("weekend") == weekend:
+            self.seq = head.get("seq", 0)
+        elif os.path.isdir(self.output_dir):
+            # A new weekend starts from an empty log
+            for filename in os.listdir(self.output_dir):
+                if filename.split(".")[0].isdigit():
+                    os.remove(os.path.join(self.output_dir, filename))
+
+    def publish(self, changes: List[Dict], slips: Dict[str, str]) -> int:
+        self.seq += 1
+        now = datetime.now().isoformat(timespec="seconds")
+        write_json_atomic(os.path.join(self.output_dir, f"{self.seq}.json"),
+                          {"seq": self.seq, "weekend": self.weekend, "at": now, "changes": changes}, indent=None)
+        write_json_atomic(self.head_path, {"seq": self.seq, "weekend": self.weekend, "updated_at": now,
+                                           "slips": slips})
+        return self.seq
+
+
+def load_document(path: str) -> Dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def run_poller(args):
+    document = load_document(args.predictions)
+    live = LiveWeekend(document, args.source, args.season)
+    publisher = DiffPublisher(document.get("weekend", ""), args.output_dir)
+    print(f"📡 Live mode for {document.get('weekend', '?')}: {', '.join(live.feeds)} every {args.interval}s")
+
+    rounds = 0
+    while True:
+        started, cpu_started = time.perf_counter(), time.process_time()
+        changes = live.poll()
+        cpu_ms = (time.process_time() - cpu_started) * 1000
+        rounds += 1
+
+        counts: Dict[str, int] = {}
+        for change in changes:
+            counts[change["op"]] = counts.get(change["op"], 0) + 1
+        if changes:
+            seq = publisher.publish(changes, live.summary())
+            detail = ", ".join(f"{n} {op}" for op, n in sorted(counts.items()))
+            print(f"🔄 Round {rounds}: {detail} -> diff {seq} ({cpu_ms:.1f} ms CPU, "
+                  f"{(time.perf_counter() - started) * 1000:.0f} ms total)")
+        else:
+            print(f"   Round {rounds}: no changes ({cpu_ms:.1f} ms CPU)")
+
+        open_slips = [k for k, status in live.summary().items() if status == PENDING]
+        if (args.rounds and rounds >= args.rounds) or (args.until_settled and live.slips and not open_slips):
+            break
+        time.sleep(args.interval)
+
+
+class ReplayFeed:
+    """
+    Stand-in results source: the base CSVs plus the weekend's fixtures of a
+    predictions document, whose scores (drawn from the predicted xG) are
+    revealed a few at a time.
+    """
+
+    def __init__(self, document: Dict, base: str, season: str, step: int, every: float, seed: int = 0):
+        self.step = step
+        self.every = every
+        self.started = time.monotonic()
+        self.base: Dict[str, str] = {}
+        self.results: List[Tuple[str, str]] = []  # (league code, CSV line) in kick-off order
+        rng = random.Random(seed)
+
+        def poisson(lam: float) -> int:
+            limit, k, p = math.exp(-lam), 0, 1.0
+            while True:
+                p *= rng.random()
+                if p < limit:
+                    return k
+                k += 1
+
+        matches = sorted(document.get("matches", []), key=lambda m: (m.get("date", ""), m.get("time", "")))
+        for match in matches:
+            code = league_code(match.get("league", ""))
+            if not code:
+                continue
+            if code not in self.base:
+                with urllib.request.urlopen(base.format(season=season, league=code), timeout=10) as response:
+                    self.base[code] = response.read().decode('utf-8', errors='ignore').rstrip('\n') + '\n'
+            header = self.base[code].split('\n', 1)[0].split(',')
+            prediction = match.get("prediction", {})
+            values = {
+                "Date": datetime.strptime(match["date"], "%Y-%m-%d").strftime("%d/%m/%Y"),
+                "HomeTeam": match.get("home_team", match.get("homeTeam", "")),
+                "AwayTeam": match.get("away_team", match.get("awayTeam", "")),
+                "FTHG": str(poisson(float(prediction.get("homeXG", 1.4)))),
+                "FTAG": str(poisson(float(prediction.get("awayXG", 1.1)))),
+            }
+            self.results.append((code, ",".join(values.get(column, "") for column in header)))
+
+    def revealed(self) -> int:
+        rounds = int((time.monotonic() - self.started) / self.every) if self.every else len(self.results)
+        return min(len(self.results), rounds * self.step)
+
+    def csv(self, code: str) -> Optional[Tuple[str, int]]:
+        if code not in self.base:
+            return None
+        revealed = self.revealed()
+        lines = [line for c, line in self.results[:revealed] if c == code]
+        return self.base[code] + "".join(f"{line}\n" for line in lines), revealed
+
+
+def run_replay(args):
+    feed = ReplayFeed(load_document(args.predictions), args.base, args.season, args.step, args.every, args.seed)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            code = self.path.split("?")[0].rstrip("/").rsplit("/", 1)[-1].replace(".csv", "")
+            served = feed.csv(code)
+            if served is None:
+                self.send_response(404)
+                self.end_headers()
+                return
+            text, revealed = served
+            etag = f'"{code}-{revealed}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            body = text.encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/csv")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), Handler)
+    print(f"🎬 Replaying {len(feed.results)} results, {args.step} every {args.every}s "
+          f"on http://127.0.0.1:{args.port}/{{season}}/{{league}}.csv")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        while feed.revealed() < len(feed.results):
+            time.sleep(0.5)
+        time.sleep(args.linger)
+    except KeyboardInterrupt:
+        pass
+    server.shutdown()
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="BetWise live weekend updates")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    poll = sub.add_parser("poll", help="Poll results and publish diffs")
+    poll.add_argument("--source", default=LIVE_CONFIG["source"], help="Results URL with {season} and {league}")
+    poll.add_argument("--season", default=LIVE_CONFIG["season"])
+    poll.add_argument("--interval", type=float, default=LIVE_CONFIG["interval"])
+    poll.add_argument("--rounds", type=int, default=0, help="Stop after this many polls (0 = never)")
+    poll.add_argument("--until-settled", action="store_true", help="Stop once every schedina is closed")
+    poll.add_argument("--predictions", default=LIVE_CONFIG["predictions_path"])
+    poll.add_argument("--output-dir", default=LIVE_CONFIG["output_dir"])
+
+    replay = sub.add_parser("replay", help="Serve a simulated weekend of results locally")
+    replay.add_argument("--predictions", default=LIVE_CONFIG["predictions_path"])
+    replay.add_argument("--base", default=CONFIG["data_url"], help="URL of the pre-weekend CSVs (file:// works)")
+    replay.add_argument("--season", default=LIVE_CONFIG["season"])
+    replay.add_argument("--port", type=int, default=8850)
+    replay.add_argument("--step", type=int, default=2, help="Results revealed at a time")
+    replay.add_argument("--every", type=float, default=5, help="Seconds between reveals")
+    replay.add_argument("--seed", type=int, default=0)
+    replay.add_argument("--linger", type=float, default=30, help="Seconds to keep serving after the last result")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "replay":
+            run_replay(args)
+        else:
+            run_poller(args)
+    except KeyboardInterrupt:
+        print("\n👋 Stopped")
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+BetWise Message Packer - Meno messaggi Telegram per ogni invio
+Unisce blocchi consecutivi (analisi, schedine, value bet, footer) in
+messaggi fino al limite di 4096 caratteri di Telegram senza mai spezzare
+una schedina; un blocco più lungo del limite viene diviso su confini HTML
+sicuri, chiudendo e riaprendo i tag aperti tra un messaggio e l'altro.
+"""
+
+import re
+from typing import Iterator, List, Tuple
+
+# Packing configuration
+PACKER_CONFIG = {
+    "max_length": 4096,  # Telegram sendMessage limit (UTF-16 code units)
+    "separator": "\n\n",
+}
+
+TAG_RE = re.compile(r"<(/?)([a-zA-Z-]+)[^>]*>")
+TOKEN_RE = re.compile(r"<[^>]*>|\s+|[^\s<]+|<")
+
+
+def text_length(text: str) -> int:
+    """Length as Telegram counts it (UTF-16 code units; markup counted too, so it errs on the safe side)"""
+    return len(text.encode('utf-16-le')) // 2
+
+
+def _apply_tags(stack: List[Tuple[str, str]], unit: str) -> List[Tuple[str, str]]:
+    """Open-tag stack after `unit`: (name, opening tag) pairs"""
+    stack = list(stack)
+    for tag in TAG_RE.finditer(unit):
+        name = tag.group(2).lower()
+        if not tag.group(1):
+            stack.append((name, tag.group(0)))
+        elif any(n == name for n, _ in stack):
+            while stack and stack.pop()[0] != name:
+                pass
+    return stack
+
+
+def _closing(stack: List[Tuple[str, str]]) -> str:
+    return "".join(f"</{name}>" for name, _ in reversed(stack))
+
+
+def _hard_cut(word: str, size: int) -> Iterator[str]:
+    """Cut an over-long word without breaking an &entity;"""
+    while len(word) > size:
+        cut = size
+        amp = word.rfind("&", max(0, cut - 8), cut)
+        if amp > 0 and ";" in word[amp:amp + 10] and word.index(";", amp) >= cut:
+            cut = amp
+        yield word[:cut]
+        word = word[cut:]
+    if word:
+        yield word
+
+
+def _units(block: str, limit: int) -> Iterator[str]:
+    """Pieces of `block` to split between: whole lines, or words and tags of over-long lines"""
+    for line in block.splitlines(keepends=True):
+        if text_length(line) <= limit // 2:
+            yield line
+            continue
+        for token in TOKEN_RE.findall(line):
+            if token.startswith("<") or text_length(token) <= limit // 2:
+                yield token
+            else:
+                yield from _hard_cut(token, limit // 4)
+
+
+def split_html(block: str, limit: int = None) -> List[str]:
+    """
+    Split one HTML message into parts within `limit`, at line (or word)
+    boundaries, never inside a tag or entity. Tags open at a split point are
+    closed at the end of the part and reopened at the start of the next.
+    """
+    limit = limit or PACKER_CONFIG["max_length"]
+    parts = []
+    current, has_text, stack = "", False, []
+
+    for unit in _units(block, limit):
+        if not has_text and not unit.strip():
+            continue  # No leading blank lines in a part
+        new_stack = _apply_tags(stack, unit)
+        if has_text and text_length(current + unit + _closing(new_stack)) > limit:
+            parts.append(current.rstrip() + _closing(stack))
+            current = "".join(opening for _, opening in stack)
+            has_text = False
+            if not unit.strip():
+                continue
+            new_stack = _apply_tags(stack, unit)
+        current += unit
+        has_text = has_text or bool(TAG_RE.sub("", unit).strip())
+        stack = new_stack
+
+    if has_text:
+        parts.append(current.rstrip() + _closing(stack))
+    return parts
+
+
+def pack_messages(blocks: List[str], limit: int = None, separator: str = None) -> List[str]:
+    """
+    Pack blocks, in order, into as few messages as fit within `limit`.
+
+    A block is never split unless it alone exceeds the limit, in which case
+    its split_html parts are packed like separate blocks.
+    """
+    limit = limit or PACKER_CONFIG["max_length"]
+    separator = PACKER_CONFIG["separator"] if separator is None else separator
+
+    messages = []
+    current = ""
+    for block in blocks:
+        block = (block or "").strip("\n")
+        if not block:
+            continue
+        pieces = [block] if text_length(block) <= limit else split_html(block, limit)
+        for piece in pieces:
+            candidate = f"{current}{separator}{piece}" if current else piece
+            if text_length(candidate) <= limit:
+                current = candidate
+            else:
+                messages.append(current)
+                current = piece
+
+    if current:
+        messages.append(current)
+    return messages
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+BetWise Odds Store - Storico dei movimenti di quota
+Ogni rilevazione delle quote (ad esempio fixtures.csv di football-data.co.uk,
+scaricato più volte durante la settimana) viene aggiunta a un log binario
+append-only; in memoria ogni coppia partita/mercato è una serie su array
+compatti (tempo, quota) che registra solo i cambi di quota. Da qui drift
+apertura→ultima quota e velocità recente, usati per le value bet e per le
+schedine (quota in calo = soldi informati).
+"""
+
+import argparse
+import json
+import os
+import struct
+import time
+import urllib.request
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from output_writer import write_json_atomic
+from predictor import parse_csv, parse_match_date
+from team_names import league_code, normalize_team_name
+
+# Odds store configuration
+ODDS_CONFIG = {
+    "dir": os.environ.get("BETWISE_ODDS_DIR", ".cache/odds"),
+    "source": "https://www.football-data.co.uk/fixtures.csv",
+    "velocity_window_hours": 6,
+    "keep_days": 10,  # compact drops fixtures played more than this many days ago
+    # Market (generate_odds key) -> fixtures.csv columns, first available wins
+    "columns": {
+        "home": ("AvgH", "B365H", "PSH"),
+        "draw": ("AvgD", "B365D", "PSD"),
+        "away": ("AvgA", "B365A", "PSA"),
+        "over25": ("Avg>2.5", "B365>2.5", "P>2.5"),
+        "under25": ("Avg<2.5", "B365<2.5", "P<2.5"),
+    },
+}
+
+RECORD = struct.Struct("<IIf")  # series id, unix time, odds: 12 bytes per snapshot
+
+
+def fixture_key(league: str, home: str, away: str) -> str:
+    """Store key of a fixture: league code and normalized team names"""
+    return f"{league_code(league) or league}|{normalize_team_name(home)}|{normalize_team_name(away)}"
+
+
+@dataclass
+class OddsMovement:
+    """Movement of one market's odds between the first and the latest snapshot"""
+    opening: float
+    latest: float
+    snapshots: int
+    first_at: int
+    last_at: int
+    drift_pct: float  # (latest / opening - 1) * 100: negative = shortening (money coming in)
+    velocity: float  # Odds change in % per hour over the recent window
+
+    @property
+    def implied_shift(self) -> float:
+        """Change of the implied probability in percentage points"""
+        return (1 / self.latest - 1 / self.opening) * 100
+
+
+class OddsSeries:
+    """Append-only (time, odds) arrays of one fixture and market; repeated odds are not stored"""
+
+    __slots__ = ("times", "odds")
+
+    def __init__(self):
+        self.times = array("I")
+        self.odds = array("f")
+
+    def append(self, at: int, odds: float) -> bool:
+        if self.times and (at < self.times[-1] or abs(self.odds[-1] - odds) < 1e-4):
+            return False
+        self.times.append(at)
+        self.odds.append(odds)
+        return True
+
+    def movement(self, window_hours: float = None) -> Optional[OddsMovement]:
+        n = len(self.odds)
+        if not n:
+            return None
+        opening, latest = self.odds[0], self.odds[-1]
+        first_at, last_at = self.times[0], self.times[-1]
+
+        velocity = 0.0
+        if n > 1:
+            window = (window_hours or ODDS_CONFIG["velocity_window_hours"]) * 3600
+            i = min(bisect_left(self.times, last_at - window), n - 2)
+            hours = max((last_at - self.times[i]) / 3600, 1 / 60)
+            velocity = (latest / self.odds[i] - 1) * 100 / hours
+
+        return OddsMovement(round(opening, 2), round(latest, 2), n, first_at, last_at,
+                            round((latest / opening - 1) * 100, 2), round(velocity, 3))
+
+
+class OddsStore:
+    """
+    Snapshots of every fixture and market: series.json lists the series (id =
+    position), odds.log holds fixed-size (id, time, odds) records appended
+    by each ingest.
+    """
+
+    def __init__(self, directory: str = None):
+        self.dir = directory or ODDS_CONFIG["dir"]
+        self.log_path = os.path.join(self.dir, "odds.log")
+        self.series_path = os.path.join(self.dir, "series.json")
+        self.meta: List[List[str]] = []  # [fixture key, market, match date] per series id
+        self.ids: Dict[Tuple[str, str], int] = {}
+        self.series: List[OddsSeries] = []
+        self.pending = bytearray()
+        self.meta_changed = False
+        self._fixtures: Dict[tuple, Optional[Tuple[str, str]]] = {}  # Row identity -> (key, date), per process
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.series_path, 'r', encoding='utf-8') as f:
+                self.meta = json.load(f)["series"]
+        except (FileNotFoundError, ValueError, KeyError):
+            self.meta = []
+            if os.path.exists(self.log_path):
+                # Records cannot be mapped back to fixtures, and new series would reuse their ids
+                orphaned = f"{self.log_path}.orphaned"
+                os.replace(self.log_path, orphaned)
+                print(f"⚠️ {self.series_path} unreadable - odds log moved to {orphaned}")
+            return
+        self.ids = {(key, market): i for i, (key, market, _) in enumerate(self.meta)}
+        self.series = [OddsSeries() for _ in self.meta]
+
+        try:
+            with open(self.log_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return
+        data = data[:len(data) - len(data) % RECORD.size]  # Ignore a torn final record
+        series = self.series
+        for series_id, at, odds in RECORD.iter_unpack(data):
+            if series_id < len(series):  # Records were deduplicated when written
+                series[series_id].times.append(at)
+                series[series_id].odds.append(odds)
+
+    def add(self, key: str, market: str, at: int, odds: float, match_date: str = "") -> bool:
+        """Record one snapshot; False when the odds did not change since the last one"""
+        series_id = self.ids.get((key, market))
+        if series_id is None:
+            series_id = len(self.series)
+            self.ids[(key, market)] = series_id
+            self.meta.append([key, market, match_date])
+            self.series.append(OddsSeries())
+            self.meta_changed = True
+        if not self.series[series_id].append(at, odds):
+            return False
+        self.pending += RECORD.pack(series_id, at, odds)
+        return True
+
+    def ingest_rows(self, rows: Iterable[Dict], at: int = None) -> Dict[str, int]:
+        """Snapshot of every fixture row (football-data fixtures.csv layout)"""
+        at = int(at or time.time())
+        seen = stored = 0
+        for row in rows:
+            ident = (row.get("Div", ""), row.get("HomeTeam"), row.get("AwayTeam"), row.get("Date", ""))
+            fixture = self._fixtures.get(ident, False)
+            if fixture is False:
+                code = league_code(ident[0])
+                fixture = None
+                if code and ident[1] and ident[2]:
+                    fixture = (fixture_key(code, ident[1], ident[2]), parse_match_date(ident[3]) or "")
+                self._fixtures[ident] = fixture
+            if fixture is None:
+                continue
+            key, match_date = fixture
+            for market, columns in ODDS_CONFIG["columns"].items():
+                for column in columns:
+                    try:
+                        odds = float(row.get(column) or 0)
+                    except ValueError:
+                        continue
+                    if odds > 1:
+                        seen += 1
+                        stored += self.add(key, market, at, odds, match_date)
+                        break
+        return {"snapshots": seen, "stored": stored}
+
+    def flush(self):
+        """Append the new records to the log (and rewrite the series list if it grew)"""
+        if not self.pending and not self.meta_changed:
+            return
+        os.makedirs(self.dir, exist_ok=True)
+        if self.meta_changed:
+            write_json_atomic(self.series_path, {"series": self.meta}, indent=None)
+            self.meta_changed = False
+        with open(self.log_path, 'ab') as f:
+            f.write(self.pending)
+        self.pending = bytearray()
+
+    def compact(self, keep_days: int = None) -> int:
+        """Rewrite the store without fixtures played more than keep_days ago; returns series dropped"""
+        self.flush()
+        cutoff = (datetime.now() - timedelta(days=keep_days or ODDS_CONFIG["keep_days"])).strftime("%Y-%m-%d")
+        keep = [i for i, (_, _, match_date) in enumerate(self.meta) if not match_date or match_date >= cutoff]
+
+        payload = bytearray()
+        for new_id, old_id in enumerate(keep):
+            series = self.series[old_id]
+            for at, odds in zip(series.times, series.odds):
+                payload += RECORD.pack(new_id, at, odds)
+
+        os.makedirs(self.dir, exist_ok=True)
+        tmp_path = f"{self.log_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, self.log_path)
+        dropped = len(self.meta) - len(keep)
+        self.meta = [self.meta[i] for i in keep]
+        self.series = [self.series[i] for i in keep]
+        self.ids = {(key, market): i for i, (key, market, _) in enumerate(self.meta)}
+        write_json_atomic(self.series_path, {"series": self.meta}, indent=None)
+        return dropped
+
+    def movements(self) -> "OddsMovements":
+        by_fixture: Dict[str, Dict[str, OddsMovement]] = {}
+        dates: Dict[str, str] = {}
+        for (key, market), series_id in self.ids.items():
+            movement = self.series[series_id].movement()
+            if movement:
+                by_fixture.setdefault(key, {})[market] = movement
+                dates[key] = self.meta[series_id][2]
+        return OddsMovements(by_fixture, dates)
+
+
+class OddsMovements:
+    """Movements by fixture, looked up with the names used in the predictions"""
+
+    def __init__(self, by_fixture: Dict[str, Dict[str, OddsMovement]], dates: Dict[str, str] = None):
+        self.by_fixture = by_fixture
+        self.dates = dates or {}  # Fixture key -> match date (YYYY-MM-DD, "" when unknown)
+
+    def get(self, league: str, home: str, away: str) -> Dict[str, OddsMovement]:
+        """Market (generate_odds key) -> movement; empty when the fixture was never snapshotted"""
+        return self.by_fixture.get(fixture_key(league, home, away), {})
+
+    def movers(self, since: str = None) -> List[Tuple[str, str, OddsMovement]]:
+        """(fixture key, market, movement) of the markets that moved, largest drift first"""
+        movers = [(key, market, movement) for key, markets in self.by_fixture.items()
+                  if not since or not self.dates.get(key) or self.dates[key] >= since
+                  for market, movement in markets.items() if movement.snapshots > 1]
+        return sorted(movers, key=lambda m: abs(m[2].drift_pct), reverse=True)
+
+    def __len__(self):
+        return len(self.by_fixture)
+
+
+def load_movements(directory: str = None) -> Optional[OddsMovements]:
+    """Movements of the stored fixtures, or None when no snapshot was ever taken"""
+    try:
+        store = OddsStore(directory)
+    except OSError as e:
+        print(f"Error loading odds snapshots: {e}")
+        return None
+    return store.movements() if store.series else None
+
+
+def download_fixtures(source: str = None) -> List[Dict]:
+    req = urllib.request.Request(source or ODDS_CONFIG["source"], headers={'User-Agent': 'Mozilla/5.0'})
+    with urllib.request.urlopen(req, timeout=10) as response:
+        content = response.read().decode('utf-8-sig', errors='ignore')
+    return parse_csv(content)
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="BetWise odds snapshot store")
+    parser.add_argument("command", choices=["ingest", "movers", "compact"])
+    parser.add_argument("--source", default=ODDS_CONFIG["source"], help="fixtures.csv URL (file:// works)")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    store = OddsStore()
+    if args.command == "ingest":
+        try:
+            rows = download_fixtures(args.source)
+        except Exception as e:
+            print(f"❌ Error downloading odds: {e}")
+            return
+        started = time.perf_counter()
+        result = store.ingest_rows(rows)
+        store.flush()
+        print(f"📈 {len(rows)} fixtures, {result['snapshots']} odds, {result['stored']} changed "
+              f"in {(time.perf_counter() - started) * 1000:.1f} ms ({len(store.series)} series)")
+    elif args.command == "compact":
+        print(f"🧹 {store.compact()} old series dropped, {len(store.series)} kept")
+    else:
+        movers = store.movements().movers()
+        for key, market, m in movers[:args.top]:
+            arrow = "📉" if m.drift_pct < 0 else "📈"
+            print(f"{arrow} {key} {market}: {m.opening} → {m.latest} ({m.drift_pct:+.1f}%, "
+                  f"{m.velocity:+.2f}%/h, {m.snapshots} snapshots)")
+        if not movers:
+            print("ℹ️ No odds movement recorded yet")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+BetWise Outbox - Coda persistente e idempotente dei messaggi Telegram
+Ogni messaggio viene registrato in SQLite (chiave: weekend + chat + hash del
+testo) prima dell'invio e segnato come consegnato subito dopo: rilanciando
+il workflow, o dopo un crash a metà invio, i messaggi già consegnati non
+vengono ripetuti e il comando resume invia solo quelli rimasti in sospeso
+dell'ultimo weekend (quelli dei weekend precedenti scadono).
+"""
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from telegram_client import SendResult, TelegramClient, get_client
+
+# Outbox configuration
+OUTBOX_CONFIG = {
+    "path": os.environ.get("BETWISE_OUTBOX", ".cache/outbox/outbox.sqlite3"),
+}
+
+PENDING, DELIVERED, FAILED, EXPIRED = "pending", "delivered", "failed", "expired"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    key TEXT PRIMARY KEY,
+    weekend TEXT NOT NULL,
+    chat_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    message_id INTEGER,
+    created_at TEXT NOT NULL,
+    delivered_at TEXT
+);
+CREATE INDEX IF NOT EXISTS messages_status ON messages (status, weekend, chat_id, seq);
+"""
+
+
+def message_key(weekend: str, chat_id: str, text: str) -> str:
+    """Idempotency key of one message for one chat"""
+    digest = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    return hashlib.sha256(f"{weekend}\0{chat_id}\0{digest}".encode('utf-8')).hexdigest()[:32]
+
+
+class Outbox:
+    """SQLite outbox shared by the threads of one process"""
+
+    def __init__(self, path: str = None):
+        self.path = path or OUTBOX_CONFIG["path"]
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def enqueue(self, weekend: str, chat_id: str, messages: List[str]) -> List[str]:
+        """
+        Record messages (already present ones are left as they are); returns their keys in order.
+
+        Undelivered messages of other weekends expire: they are out of date and never resent.
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        keys = [message_key(weekend, str(chat_id), text) for text in messages]
+        with self._lock:
+            self.db.execute("UPDATE messages SET status = ? WHERE weekend != ? AND status IN (?, ?)",
+                            (EXPIRED, weekend, PENDING, FAILED))
+            seq = self.db.execute("SELECT COALESCE(MAX(seq), -1) + 1 FROM messages WHERE weekend = ? AND chat_id = ?",
+                                  (weekend, str(chat_id))).fetchone()[0]
+            for offset, (key, text) in enumerate(zip(keys, messages)):
+                self.db.execute(
+                    "INSERT OR IGNORE INTO messages (key, weekend, chat_id, seq, text, status, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, weekend, str(chat_id), seq + offset, text, PENDING, now))
+        return keys
+
+    def status(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            row = self.db.execute("SELECT status, message_id FROM messages WHERE key = ?", (key,)).fetchone()
+        return {"status": row[0], "message_id": row[1]} if row else None
+
+    def mark(self, key: str, result: SendResult):
+        with self._lock:
+            if result.ok:
+                self.db.execute("UPDATE messages SET status = ?, message_id = ?, error = NULL, "
+                                "attempts = attempts + ?, delivered_at = ? WHERE key = ?",
+                                (DELIVERED, result.message_id, result.attempts,
+                                 datetime.now().isoformat(timespec="seconds"), key))
+            else:
+                self.db.execute("UPDATE messages SET status = ?, error = ?, attempts = attempts + ? WHERE key = ?",
+                                (FAILED, result.error, result.attempts, key))
+
+    def deliver(self, client: TelegramClient, weekend: str, chat_id: str, messages: List[str]) -> List[SendResult]:
+        """Enqueue, then send in order whatever is not delivered yet; one result per message"""
+        results = []
+        for key, text in zip(self.enqueue(weekend, chat_id, messages), messages):
+            state = self.status(key)
+            if state and state["status"] == DELIVERED:
+                results.append(SendResult(True, state["message_id"], attempts=0))
+                continue
+            result = client.send_message(chat_id, text)
+            self.mark(key, result)
+            results.append(result)
+        return results
+
+    def latest_weekend(self) -> Optional[str]:
+        """Weekend of the most recently enqueued message"""
+        with self._lock:
+            row = self.db.execute("SELECT weekend FROM messages ORDER BY created_at DESC, rowid DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def undelivered(self, weekend: str = None) -> List[Dict]:
+        query = "SELECT key, weekend, chat_id, text FROM messages WHERE status IN (?, ?)"
+        params = [PENDING, FAILED]
+        if weekend:
+            query += " AND weekend = ?"
+            params.append(weekend)
+        with self._lock:
+            rows = self.db.execute(query + " ORDER BY weekend, chat_id, seq", params).fetchall()
+        return [{"key": r[0], "weekend": r[1], "chat_id": r[2], "text": r[3]} for r in rows]
+
+    def flush(self, client: TelegramClient, weekend: str = None) -> Dict:
+        """Send every undelivered message, each chat's messages in their original order"""
+        sent = failed = 0
+        for item in self.undelivered(weekend):
+            result = client.send_message(item["chat_id"], item["text"])
+            self.mark(item["key"], result)
+            if result.ok:
+                sent += 1
+            else:
+                failed += 1
+        return {"sent": sent, "failed": failed}
+
+    def counts(self) -> Dict[str, Dict[str, int]]:
+        """Message counts by weekend and status"""
+        with self._lock:
+            rows = self.db.execute("SELECT weekend, status, COUNT(*) FROM messages GROUP BY weekend, status").fetchall()
+        counts: Dict[str, Dict[str, int]] = {}
+        for weekend, status, count in rows:
+            counts.setdefault(weekend, {})[status] = count
+        return counts
+
+
+_outbox: Optional[Outbox] = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox() -> Optional[Outbox]:
+    """Shared outbox, or None when the database cannot be opened (sends then go out directly)"""
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            try:
+                _outbox = Outbox()
+            except (sqlite3.Error, OSError) as e:
+                print(f"⚠️ Outbox unavailable ({e}) - sending without duplicate protection")
+                return None
+        return _outbox
+
+
+def send_once(bot_token: str, chat_id: str, weekend: str, messages: List[str]) -> List[SendResult]:
+    """Send messages through the outbox: already delivered ones are skipped"""
+    client = get_client(bot_token)
+    outbox = get_outbox()
+    if outbox is None:
+        return client.send_batch(chat_id, messages)
+    return outbox.deliver(client, weekend, chat_id, messages)
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="BetWise notification outbox")
+    parser.add_argument("command", choices=["status", "resume"])
+    parser.add_argument("--weekend", default=None,
+                        help="Weekend to resume (e.g. '24/10 - 25/10'; default: the latest one)")
+    args = parser.parse_args()
+
+    outbox = Outbox()
+    if args.command == "status":
+        for weekend, counts in sorted(outbox.counts().items()):
+            print(f"📬 {weekend}: " + ", ".join(f"{n} {status}" for status, n in sorted(counts.items())))
+        return
+
+    bot_token = os.environ.get("TELEGRAM_BOT_TOKEN")
+    if not bot_token:
+        print("⚠️ TELEGRAM_BOT_TOKEN not configured")
+        return
+
+    weekend = args.weekend or outbox.latest_weekend()
+    pending = outbox.undelivered(weekend) if weekend else []
+    if not pending:
+        print("✅ Nothing to resume - every message was delivered")
+        return
+
+    print(f"📤 Resuming {len(pending)} undelivered messages for {weekend}...")
+    result = outbox.flush(get_client(bot_token), weekend)
+    print(f"✅ {result['sent']} sent, {result['failed']} failed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+BetWise Output Writer - Scrittura atomica e consapevole delle differenze
+Scrive su file temporaneo, fsync e rename, così un crash non lascia mai un
+predictions.json troncato. Se il contenuto (esclusi i campi volatili come
+generated_at) non è cambiato la scrittura viene saltata, e con essa commit,
+push e deploy di Pages nel workflow.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, Iterable, Optional
+
+VOLATILE_FIELDS = ("generated_at",)
+
+
+def canonical_json(data, volatile_fields: Iterable[str] = VOLATILE_FIELDS) -> bytes:
+    """Compact, key-sorted serialization with top-level volatile fields removed"""
+    if isinstance(data, dict):
+        data = {k: v for k, v in data.items() if k not in set(volatile_fields)}
+    return json.dumps(data, separators=(",", ":"), sort_keys=True, ensure_ascii=False).encode("utf-8")
+
+
+def content_hash(data, volatile_fields: Iterable[str] = VOLATILE_FIELDS) -> str:
+    return hashlib.sha256(canonical_json(data, volatile_fields)).hexdigest()
+
+
+def write_bytes_atomic(path: str, payload: bytes) -> bool:
+    """
+    Write-temp-fsync-rename. Returns False without touching the file when
+    it already holds exactly these bytes.
+    """
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == payload:
+                return False
+    except FileNotFoundError:
+        pass
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    # Persist the rename itself
+    try:
+        dir_fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return True
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
+    return True
+
+
+def write_json_atomic(path: str, data: Dict, volatile_fields: Iterable[str] = VOLATILE_FIELDS,
+                      indent: Optional[int] = 2) -> bool:
+    """
+    Atomically write `data` as JSON unless only volatile fields changed.
+
+    Returns True when the file was written.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            existing = json.load(f)
+        if content_hash(existing, volatile_fields) == content_hash(data, volatile_fields):
+            return False
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+
+    separators = (",", ":") if indent is None else None
+    payload = json.dumps(data, indent=indent, separators=separators, ensure_ascii=False).encode("utf-8")
+    return write_bytes_atomic(path, payload)
+
+
+def report_changed(changed: bool, name: str = "predictions_changed"):
+    """Expose the outcome to later GitHub Actions steps via $GITHUB_OUTPUT"""
+    github_output = os.environ.get("GITHUB_OUTPUT")
+    if not github_output:
+        return
+    with open(github_output, 'a', encoding='utf-8') as f:
+        f.write(f"{name}={'true' if changed else 'false'}\n")
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+BetWise Pipeline - Esecuzione a stadi con cache indirizzata per contenuto
+Il run settimanale è un piccolo DAG (fetch → parse → team_stats → fixtures →
+predict → assemble → write → notify): ogni stadio dichiara i suoi input e
+il suo output viene salvato sotto l'hash degli input e della versione del
+codice. Rilanciando con dati invariati, o dopo una modifica al solo
+notificatore, vengono rieseguiti solo gli stadi interessati.
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import predictor
+from predictor import CONFIG
+
+# Pipeline configuration
+PIPELINE_CONFIG = {
+    "cache_dir": os.environ.get("BETWISE_PIPELINE_CACHE", ".cache/pipeline"),
+    "season": "2425",
+    "fetch_ttl": 6 * 3600,  # CSVs are re-downloaded after this many seconds
+    "keep_per_stage": 4,  # Cache entries kept per stage, most recent first
+}
+
+
+@dataclass
+class Stage:
+    """
+    One pipeline step: `func(*outputs of inputs, **params)`.
+
+    The cache key covers the input outputs (by content digest), params, the
+    contents of `files` and the source of `func` and of everything in `code`
+    (functions or whole modules). Stages with cache=False have side effects
+    and always run; a stage returning None is not cached (e.g. a failed fetch).
+    """
+    name: str
+    func: Callable
+    inputs: List[str] = field(default_factory=list)
+    params: Dict = field(default_factory=dict)
+    code: Tuple = ()
+    files: List[str] = field(default_factory=list)
+    ttl: Optional[float] = None
+    cache: bool = True
+
+    @property
+    def kind(self) -> str:
+        """Stage name without the league suffix ("team_stats:E0" -> "team_stats")"""
+        return self.name.split(":", 1)[0]
+
+
+_source_digests: Dict[Any, str] = {}
+
+
+def code_version(objects: Sequence) -> str:
+    """Digest of the source code of functions and modules"""
+    h = hashlib.sha256()
+    for obj in objects:
+        if obj not in _source_digests:
+            try:
+                source = inspect.getsource(obj)
+            except (OSError, TypeError):
+                source = repr(obj)
+            _source_digests[obj] = hashlib.sha256(source.encode('utf-8')).hexdigest()
+        h.update(_source_digests[obj].encode('ascii'))
+    return h.hexdigest()
+
+
+def file_digest(path: str) -> str:
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return "missing"
+
+
+def value_digest(value) -> Tuple[str, bytes]:
+    """(content digest, pickled bytes) of a stage output"""
+    payload = pickle.dumps(value, protocol=4)
+    return hashlib.sha256(payload).hexdigest(), payload
+
+
+class StageCache:
+    """
+    Content-addressed store: objects/<digest>.pickle holds outputs, the index
+    maps "stage/key" to the digest of the output computed for that key.
+    """
+
+    def __init__(self, root: str = None):
+        self.root = root or PIPELINE_CONFIG["cache_dir"]
+        self.index_path = os.path.join(self.root, "index.json")
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self.index: Dict[str, Dict] = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.index = {}
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self.root, "objects", f"{digest}.pickle")
+
+    def lookup(self, stage: str, key: str, ttl: Optional[float] = None) -> Optional[Tuple[str, Any]]:
+        """(digest, value) cached for this key, or None (missing, expired or unreadable)"""
+        entry = self.index.get(f"{stage}/{key}")
+        if not entry or (ttl is not None and time.time() - entry["created"] > ttl):
+            return None
+        try:
+            with open(self._object_path(entry["digest"]), 'rb') as f:
+                return entry["digest"], pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None
+
+    def store(self, stage: str, key: str, digest: str, payload: bytes):
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        self.index[f"{stage}/{key}"] = {"digest": digest, "created": time.time()}
+
+    def save(self):
+        """Write the index, keeping the newest entries per stage and deleting unreferenced objects"""
+        by_stage: Dict[str, List[Tuple[str, Dict]]] = {}
+        for name, entry in self.index.items():
+            by_stage.setdefault(name.rsplit("/", 1)[0], []).append((name, entry))
+        keep = PIPELINE_CONFIG["keep_per_stage"]
+        self.index = {name: entry
+                      for entries in by_stage.values()
+                      for name, entry in sorted(entries, key=lambda e: -e[1]["created"])[:keep]}
+
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+        referenced = {entry["digest"] for entry in self.index.values()}
+        objects_dir = os.path.join(self.root, "objects")
+        for filename in os.listdir(objects_dir) if os.path.isdir(objects_dir) else []:
+            if filename.endswith(".pickle") and filename[:-len(".pickle")] not in referenced:
+                os.remove(os.path.join(objects_dir, filename))
+
+
+@dataclass
+class StageRun:
+    """Report line of one stage"""
+    stage: str
+    status: str  # hit, miss, forced, run (uncached stage)
+    seconds: float
+    key: str
+    digest: str = ""  # Content digest of the output
+
+
+class Pipeline:
+    """DAG of stages run in dependency order through the stage cache"""
+
+    def __init__(self, stages: List[Stage], cache: StageCache = None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.cache = cache or StageCache()
+
+    def order(self, targets: Sequence[str]) -> List[Stage]:
+        """Stages needed for the targets, dependencies first"""
+        ordered, seen = [], set()
+
+        def visit(name: str):
+            if name in seen:
+                return
+            seen.add(name)
+            for dep in self.stages[name].inputs:
+                visit(dep)
+            ordered.append(self.stages[name])
+
+        for target in targets:
+            visit(target)
+        return ordered
+
+    def key(self, stage: Stage, input_digests: List[str]) -> str:
+        h = hashlib.sha256()
+        h.update(stage.name.encode('utf-8'))
+        h.update(code_version((stage.func,) + tuple(stage.code)).encode('ascii'))
+        h.update(json.dumps(stage.params, sort_keys=True, default=str).encode('utf-8'))
+        for digest in input_digests:
+            h.update(digest.encode('ascii'))
+        for path in stage.files:
+            h.update(file_digest(path).encode('ascii'))
+        return h.hexdigest()
+
+    def run(self, targets: Sequence[str], force: Sequence[str] = ()) -> Tuple[Dict[str, Any], List[StageRun]]:
+        """
+        Run the targets and what they depend on. Forced stages (by name, or by
+        kind for every league) are recomputed; stages downstream of them rerun
+        only if the recomputed output actually differs.
+        """
+        values: Dict[str, Any] = {}
+        digests: Dict[str, str] = {}
+        report: List[StageRun] = []
+
+        for stage in self.order(targets):
+            started = time.perf_counter()
+            key = self.key(stage, [digests[dep] for dep in stage.inputs])
+            forced = stage.name in force or stage.kind in force or "all" in force
+
+            cached = None
+            if stage.cache and not forced:
+                cached = self.cache.lookup(stage.name, key, stage.ttl)
+
+            if cached:
+                digests[stage.name], values[stage.name] = cached
+                status = "hit"
+            else:
+                value = stage.func(*[values[dep] for dep in stage.inputs], **stage.params)
+                digest, payload = value_digest(value)
+                if stage.cache and value is not None:
+                    self.cache.store(stage.name, key, digest, payload)
+                values[stage.name], digests[stage.name] = value, digest
+                status = "forced" if forced else ("miss" if stage.cache else "run")
+
+            report.append(StageRun(stage.name, status, time.perf_counter() - started, key[:12],
+                                   digests[stage.name]))
+
+        self.cache.save()
+        return values, report
+
+
+# Stage functions
+
+def fetch_stage(league: str, season: str) -> Optional[str]:
+    try:
+        return predictor.download_csv(league, season)
+    except Exception as e:
+        print(f"Error fetching data for {league}: {e}")
+        return None
+
+
+def parse_stage(content: Optional[str]) -> List[Dict]:
+    return predictor.parse_csv(content) if content else []
+
+
+def team_stats_stage(rows: List[Dict]) -> Dict:
+    return predictor.build_team_stats(rows)
+
+
+def fixtures_stage(team_stats: Dict, league: str, week: int) -> List:
+    return predictor.generate_weekend_fixtures(team_stats, league)
+
+
+def predict_stage(team_stats: Dict, fixtures: List, league: str, saturday: str, sunday: str,
+                  model: Dict = None) -> List:
+    """`model` only keys the cache on the CONFIG constants the prediction reads"""
+    from odds_store import load_movements
+
+    name = CONFIG["leagues"][league]["name"]
+    print(f"\n🏟️ {name}: {len(team_stats)} teams, {len(fixtures)} fixtures")
+    return predictor.predict_league(league, team_stats, fixtures,
+                                    datetime.fromisoformat(saturday), datetime.fromisoformat(sunday),
+                                    load_movements())
+
+
+def assemble_stage(*league_matches: List, saturday: str, sunday: str) -> Dict:
+    """Output document without generated_at, so identical runs hash identically"""
+    from odds_store import load_movements
+
+    all_matches = [match for matches in league_matches for match in matches]
+    output = predictor.assemble_output(all_matches, datetime.fromisoformat(saturday), datetime.fromisoformat(sunday),
+                                       load_movements())
+    output.pop("generated_at", None)
+    return output
+
+
+def write_stage(document: Dict, output_path: str) -> str:
+    from output_writer import report_changed, write_json_atomic
+
+    output = {"generated_at": datetime.now().isoformat(), **document}
+    changed = write_json_atomic(output_path, output)
+    report_changed(changed)
+    if not changed:
+        print(f"ℹ️ Predictions unchanged - {output_path} not rewritten")
+        return output_path
+
+    print(f"✅ Predictions saved to {output_path}")
+    from archive import archive_predictions
+    from shards import write_shards
+    write_shards(output)
+    archive_predictions(output, source="predictor")
+    return output_path
+
+
+def notify_stage(document: Dict, written_path: str) -> Optional[Dict]:
+    """Telegram notification; cached only when every message was delivered, so a later run retries"""
+    import telegram_notify
+
+    if not os.environ.get("TELEGRAM_BOT_TOKEN"):
+        print("⚠️ TELEGRAM_BOT_TOKEN not configured - notification skipped")
+        return None
+    delivery = telegram_notify.main()
+    if not delivery or not delivery["delivered"] or delivery["failed"]:
+        print("⚠️ Notification incomplete - it will be retried on the next run")
+        return None
+    return {"weekend": document.get("weekend"), "matches": len(document.get("matches", [])), **delivery}
+
+
+def build_pipeline(leagues: Sequence[str] = None, season: str = None, cache: StageCache = None) -> Pipeline:
+    """The weekly run as a stage DAG, one fetch..predict chain per league"""
+    import ensemble
+    import evaluation
+    import elo_ratings
+    import message_packer
+    import odds_store
+    import predictions_reader
+    import telegram_notify
+
+    leagues = list(leagues or CONFIG["leagues"])
+    season = season or PIPELINE_CONFIG["season"]
+    saturday, sunday = predictor.weekend_dates()
+    dates = {"saturday": saturday.date().isoformat(), "sunday": sunday.date().isoformat()}
+    model_params = {k: CONFIG[k] for k in ("home_advantage", "avg_goals", "min_value_edge", "bookmaker_margin",
+                                           "odds_drift_threshold", "odds_drift_penalty")}
+    model_code = (predictor.TeamStats, predictor.Prediction, predictor.Match, predictor.factorial,
+                  predictor.poisson_prob, predictor.poisson_pmf, predictor.expected_goals,
+                  predictor.calculate_prediction, predictor.prediction_from_lambdas, predictor.generate_odds,
+                  predictor.market_selections, predictor.drifting_out, predictor.find_value_bets,
+                  predictor.predict_fixture,
+                  predictor.prediction_fields, predictor.predict_league, ensemble, evaluation, elo_ratings,
+                  odds_store)
+    odds_files = [os.path.join(odds_store.ODDS_CONFIG["dir"], name) for name in ("series.json", "odds.log")]
+    model_files = [ensemble.ENSEMBLE_CONFIG["weights_path"], evaluation.EVAL_CONFIG["calibration_path"],
+                   elo_ratings.ELO_CONFIG["ratings_path"]] + odds_files
+
+    stages = []
+    for league in leagues:
+        stages += [
+            Stage(f"fetch:{league}", fetch_stage, params={"league": league, "season": season},
+                  code=(predictor.download_csv,), ttl=PIPELINE_CONFIG["fetch_ttl"]),
+            Stage(f"parse:{league}", parse_stage, [f"fetch:{league}"], code=(predictor.parse_csv,)),
+            Stage(f"team_stats:{league}", team_stats_stage, [f"parse:{league}"],
+                  code=(predictor.TeamStats, predictor.build_team_stats, predictor.update_team_stats)),
+            Stage(f"fixtures:{league}", fixtures_stage, [f"team_stats:{league}"],
+                  params={"league": league, "week": datetime.now().isocalendar()[1]},
+                  code=(predictor.generate_weekend_fixtures,)),
+            Stage(f"predict:{league}", predict_stage, [f"team_stats:{league}", f"fixtures:{league}"],
+                  params={"league": league, **dates, "model": model_params}, code=model_code, files=model_files),
+        ]
+    output_path = CONFIG["output_path"]
+    stages += [
+        Stage("assemble", assemble_stage, [f"predict:{league}" for league in leagues], params=dates,
+              code=(predictor.assemble_output, predictor.generate_schedine, predictor.Match,
+                    predictor.drifting_out, predictor.shortening, odds_store), files=odds_files),
+        Stage("write", write_stage, ["assemble"], params={"output_path": output_path}, cache=False),
+        Stage("notify", notify_stage, ["assemble", "write"],
+              code=(telegram_notify, message_packer, predictions_reader)),
+    ]
+    return Pipeline(stages, cache)
+
+
+def print_report(report: List[StageRun]):
+    """Per-stage hit/miss table and totals"""
+    icons = {"hit": "✅", "miss": "🔄", "forced": "⚡", "run": "▶️"}
+    print("\n📋 Pipeline report:")
+    for run in report:
+        print(f"   {icons[run.status]} {run.stage:<16} {run.status:<6} {run.seconds * 1000:8.1f} ms  {run.key}")
+    counts: Dict[str, int] = {}
+    for run in report:
+        counts[run.status] = counts.get(run.status, 0) + 1
+    total = sum(run.seconds for run in report)
+    print(f"   {', '.join(f'{n} {status}' for status, n in sorted(counts.items()))} - {total:.2f}s")
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="BetWise cached prediction pipeline")
+    parser.add_argument("--leagues", nargs="*", default=list(CONFIG["leagues"]))
+    parser.add_argument("--season", default=PIPELINE_CONFIG["season"])
+    parser.add_argument("--force", action="append", default=[], metavar="STAGE",
+                        help="Recompute a stage ('team_stats' for every league, 'team_stats:E0' for one, 'all')")
+    parser.add_argument("--notify", action="store_true", help="Also send the Telegram notification")
+    args = parser.parse_args()
+
+    pipeline = build_pipeline(args.leagues, args.season)
+    known = set(pipeline.stages) | {stage.kind for stage in pipeline.stages.values()} | {"all"}
+    unknown = [name for name in args.force if name not in known]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    print("🎯 BetWise Pipeline - Starting...")
+    targets = ["write", "notify"] if args.notify else ["write"]
+    try:
+        _, report = pipeline.run(targets, force=args.force)
+    except Exception as e:
+        print(f"❌ Pipeline failed: {e}")
+        sys.exit(1)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
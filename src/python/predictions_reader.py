@@ -0,0 +1,167 @@
+"""
+BetWise Predictions Reader - Lettura in streaming di predictions.json
+Legge il file a blocchi con il parser JSON incrementale e restituisce una
+partita alla volta, senza caricare in memoria l'intero documento; le top
+value bet (per mercato e per lega) sono tenute in heap di dimensione fissa.
+Usato sia dalle notifiche Telegram sia dagli aggregati della dashboard.
+"""
+
+import heapq
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional
+
+from claude_stream import IncrementalJSONParser
+
+# Reader configuration
+READER_CONFIG = {
+    "chunk_size": 64 * 1024,
+}
+
+
+class TopK:
+    """
+    The k best items seen, by `rank` (smaller is better, as a sort key), in
+    O(k) memory: a heap whose root is the worst item kept.
+    """
+
+    class _Entry:
+        __slots__ = ("rank", "item")
+
+        def __init__(self, rank, item):
+            self.rank = rank
+            self.item = item
+
+        def __lt__(self, other):
+            return self.rank > other.rank  # Inverted: heap root = worst kept
+
+    def __init__(self, k: int, rank: Callable[[Dict], tuple]):
+        self.k = k
+        self.rank = rank
+        self.heap: List[TopK._Entry] = []
+
+    def push(self, item: Dict):
+        entry = TopK._Entry(self.rank(item), item)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+        elif entry.rank < self.heap[0].rank:
+            heapq.heapreplace(self.heap, entry)
+
+    def items(self) -> List[Dict]:
+        return [e.item for e in sorted(self.heap, key=lambda e: e.rank)]
+
+
+def value_bet_rank(vb: Dict) -> tuple:
+    """Best edge first, then model probability, then match id (stable across runs)"""
+    return (-vb["edge"], -vb.get("probability", 0), str(vb.get("matchId") or ""))
+
+
+def value_bet_entries(match: Dict, per_match: Optional[int] = None) -> List[Dict]:
+    """A match's value bets with the match fields needed to show them on their own"""
+    home = match.get("home_team", match.get("homeTeam", ""))
+    away = match.get("away_team", match.get("awayTeam", ""))
+    flag = match.get("league_flag", match.get("leagueFlag", ""))
+    bets = match.get("value_bets", match.get("valueBets", []))
+    return [dict(vb, matchId=match.get("id"), league=match.get("league", "other"), leagueFlag=flag,
+                 match=f"{home} vs {away}")
+            for vb in bets[:per_match]]
+
+
+class ValueBetRanking:
+    """Top-k value bets overall, per market and per league, plus the total and per-league counts"""
+
+    def __init__(self, k: int, per_match: Optional[int] = None):
+        self.k = k
+        self.per_match = per_match
+        self.count = 0
+        self.all = TopK(k, value_bet_rank)
+        self.by_market: Dict[str, TopK] = {}
+        self.by_league: Dict[str, TopK] = {}
+        self.league_counts: Dict[str, List[int]] = {}  # League -> [matches, value bets]
+
+    def add_match(self, match: Dict):
+        counts = self.league_counts.setdefault(match.get("league", "other"), [0, 0])
+        counts[0] += 1
+        counts[1] += len(match.get("value_bets", match.get("valueBets", [])))
+        for vb in value_bet_entries(match, self.per_match):
+            self.count += 1
+            self.all.push(vb)
+            self.by_market.setdefault(vb["market"], TopK(self.k, value_bet_rank)).push(vb)
+            self.by_league.setdefault(vb["league"], TopK(self.k, value_bet_rank)).push(vb)
+
+    def top(self) -> Dict:
+        return {
+            "all": self.all.items(),
+            "byMarket": {market: top.items() for market, top in sorted(self.by_market.items())},
+            "byLeague": {league: top.items() for league, top in sorted(self.by_league.items())},
+        }
+
+    def league_stats(self) -> Dict[str, Dict[str, int]]:
+        return {league: {"matches": n, "value_bets": vbs} for league, (n, vbs) in sorted(self.league_counts.items())}
+
+    def candidates(self) -> List[Dict]:
+        """
+        Union of the per-league top-k: it contains the exact top-k of any
+        subset of leagues, so league-filtered views need nothing else.
+        """
+        merged = [vb for top in self.by_league.values() for vb in top.items()]
+        return sorted(merged, key=value_bet_rank)
+
+
+def top_value_bets(matches, k: int, per_match: Optional[int] = None) -> List[Dict]:
+    """Top-k value bets of an iterable of matches"""
+    ranking = ValueBetRanking(k, per_match)
+    for match in matches:
+        ranking.add_match(match)
+    return ranking.all.items()
+
+
+class PredictionsReader:
+    """
+    Streaming reader of a predictions document.
+
+    iter_matches() yields the "matches" entries one at a time; every other
+    top-level field lands in `header` as soon as it has been read (all of
+    them once iteration is over).
+    """
+
+    def __init__(self, path: str, chunk_size: int = None):
+        self.path = path
+        self.chunk_size = chunk_size or READER_CONFIG["chunk_size"]
+        self.header: Dict = {}
+
+    @staticmethod
+    def _select(path: tuple) -> bool:
+        if path and path[0] == "matches":
+            return len(path) == 2
+        return len(path) == 1
+
+    def iter_matches(self) -> Iterator[Dict]:
+        ready: deque = deque()
+
+        def on_value(path: tuple, value):
+            if path[0] == "matches":
+                ready.append(value)
+            else:
+                self.header[path[0]] = value
+
+        parser = IncrementalJSONParser(on_value, select=self._select, keep=False)
+        with open(self.path, 'r', encoding='utf-8') as f:
+            while not parser.done:
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                parser.feed(chunk)
+                while ready:
+                    yield ready.popleft()
+
+        if not parser.done:
+            raise ValueError(f"{self.path}: truncated JSON document")
+
+
+def read_summary(path: str, k: int, per_match: Optional[int] = None) -> tuple:
+    """(top-level fields without matches, ValueBetRanking) from one streaming pass"""
+    reader = PredictionsReader(path)
+    ranking = ValueBetRanking(k, per_match)
+    for match in reader.iter_matches():
+        ranking.add_match(match)
+    return reader.header, ranking
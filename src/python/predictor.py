@@ -4,15 +4,16 @@ BetWise Predictor - Algoritmo di Previsione Calcistica
 Utilizza modello Poisson + xG per prevedere risultati partite
 """
 
-import json
 import math
-import os
+from functools import lru_cache
 from datetime import datetime, timedelta
 from dataclasses import dataclass, asdict
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Iterator, Optional, Tuple
 import urllib.request
 import urllib.error
 
+from output_writer import report_changed, write_json_atomic
+
 # Configuration
 CONFIG = {
     "leagues": {
@@ -30,6 +31,8 @@ CONFIG = {
     "home_advantage": 1.35,
     "avg_goals": 2.7,
     "min_value_edge": 0.03,  # 3% minimum edge for value bet
+    "odds_drift_threshold": 5.0,  # % move of the market odds that counts as informed money
+    "odds_drift_penalty": 0.05,  # Extra edge required when the market drifts against a pick
     "bookmaker_margin": 1.05  # 5% margin
 }
 
@@ -149,11 +152,14 @@ def poisson_prob(k: int, lambda_val: float) -> float:
     return (math.pow(lambda_val, k) * math.exp(-lambda_val)) / factorial(k)
 
 
-def calculate_prediction(home_stats: TeamStats, away_stats: TeamStats) -> Prediction:
-    """
-    Calculate match prediction using Poisson model with xG integration
-    """
-    # Calculate expected goals
+@lru_cache(maxsize=4096)
+def poisson_pmf(lambda_val: float, max_goals: int = 7) -> Tuple[float, ...]:
+    """P(X = k) for k < max_goals, cached per lambda (a long-running process reuses them)"""
+    return tuple(poisson_prob(k, lambda_val) for k in range(max_goals))
+
+
+def expected_goals(home_stats: TeamStats, away_stats: TeamStats) -> Tuple[float, float]:
+    """Calculate bounded expected goals (lambda_home, lambda_away) for a fixture"""
     # Home attack strength * Away defense weakness * Home advantage
     home_attack = home_stats.avg_goals_home * home_stats.form_index
     away_defense = away_stats.avg_conceded_away
@@ -173,11 +179,23 @@ def calculate_prediction(home_stats: TeamStats, away_stats: TeamStats) -> Predic
     lambda_home = max(0.5, min(4.0, lambda_home))
     lambda_away = max(0.3, min(3.5, lambda_away))
 
+    return lambda_home, lambda_away
+
+
+def calculate_prediction(home_stats: TeamStats, away_stats: TeamStats) -> Prediction:
+    """
+    Calculate match prediction using Poisson model with xG integration
+    """
+    lambda_home, lambda_away = expected_goals(home_stats, away_stats)
+    return prediction_from_lambdas(lambda_home, lambda_away)
+
+
+def prediction_from_lambdas(lambda_home: float, lambda_away: float) -> Prediction:
+    """Derive all market probabilities from a pair of expected-goal lambdas"""
     # Build probability matrix (0-6 goals each)
-    prob_matrix = [[0.0] * 7 for _ in range(7)]
-    for h in range(7):
-        for a in range(7):
-            prob_matrix[h][a] = poisson_prob(h, lambda_home) * poisson_prob(a, lambda_away)
+    home_pmf = poisson_pmf(lambda_home)
+    away_pmf = poisson_pmf(lambda_away)
+    prob_matrix = [[home_pmf[h] * away_pmf[a] for a in range(7)] for h in range(7)]
 
     # Calculate outcome probabilities
     p_home = sum(prob_matrix[h][a] for h in range(7) for a in range(7) if h > a)
@@ -244,12 +262,18 @@ def generate_odds(prediction: Prediction) -> Dict:
     }
 
 
-def find_value_bets(prediction: Prediction, odds: Dict) -> List[ValueBet]:
-    """Find value bets where our probability exceeds implied odds probability"""
-    value_bets = []
-    min_edge = CONFIG["min_value_edge"]
+def remove_margin(odds: List[float]) -> List[float]:
+    """De-margin a complete set of bookmaker odds into probabilities (proportional method)"""
+    implied = [1 / o for o in odds if o and o > 1]
+    if len(implied) != len(odds):
+        return []
+    total = sum(implied)
+    return [p / total for p in implied]
 
-    markets = [
+
+def market_selections(prediction: Prediction, odds: Dict) -> List[Tuple[str, float, float]]:
+    """(market, model probability, odds) for every market offered on a match"""
+    return [
         ("1", prediction.home_win / 100, odds["home"]),
         ("X", prediction.draw / 100, odds["draw"]),
         ("2", prediction.away_win / 100, odds["away"]),
@@ -262,9 +286,41 @@ def find_value_bets(prediction: Prediction, odds: Dict) -> List[ValueBet]:
         ("DC X2", (prediction.draw + prediction.away_win) / 100, odds["dcx2"])
     ]
 
-    for market, prob, market_odds in markets:
+
+# Value bet market -> odds key (as in generate_odds and the odds snapshot store)
+MARKET_ODDS_KEYS = {
+    "1": "home", "X": "draw", "2": "away", "Over 2.5": "over25", "Under 2.5": "under25",
+    "Over 1.5": "over15", "BTTS Si": "bttsYes", "BTTS No": "bttsNo", "DC 1X": "dc1x", "DC X2": "dcx2",
+}
+
+
+def drifting_out(movement: Optional[Dict], odds_key: str) -> bool:
+    """True when the market odds lengthened past the drift threshold (money going against the pick)"""
+    move = movement.get(odds_key) if movement else None
+    return move is not None and move.drift_pct >= CONFIG["odds_drift_threshold"]
+
+
+def shortening(movement: Optional[Dict], odds_key: str) -> bool:
+    """True when the market odds shortened past the drift threshold (informed money)"""
+    move = movement.get(odds_key) if movement else None
+    return move is not None and move.drift_pct <= -CONFIG["odds_drift_threshold"]
+
+
+def find_value_bets(prediction: Prediction, odds: Dict, movement: Optional[Dict] = None) -> List[ValueBet]:
+    """
+    Find value bets where our probability exceeds implied odds probability.
+    With the fixture's odds movement (odds_store), a market drifting out
+    needs an extra edge of odds_drift_penalty.
+    """
+    value_bets = []
+    min_edge = CONFIG["min_value_edge"]
+
+    for market, prob, market_odds in market_selections(prediction, odds):
         expected_value = (prob * market_odds) - 1
-        if expected_value > min_edge:
+        required = min_edge
+        if drifting_out(movement, MARKET_ODDS_KEYS[market]):
+            required += CONFIG["odds_drift_penalty"]
+        if expected_value > required:
             value_bets.append(ValueBet(
                 market=market,
                 odds=market_odds,
@@ -275,34 +331,71 @@ def find_value_bets(prediction: Prediction, odds: Dict) -> List[ValueBet]:
     return sorted(value_bets, key=lambda x: x.edge, reverse=True)
 
 
-def fetch_historical_data(league: str, season: str = "2425") -> List[Dict]:
-    """Fetch historical match data from football-data.co.uk"""
+def download_csv(league: str, season: str = "2425") -> str:
+    """Raw CSV text of a league season from football-data.co.uk (raises on network errors)"""
     url = CONFIG["data_url"].format(season=season, league=league)
+    req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
+    with urllib.request.urlopen(req, timeout=10) as response:
+        return response.read().decode('utf-8', errors='ignore')
 
-    try:
-        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-        with urllib.request.urlopen(req, timeout=10) as response:
-            content = response.read().decode('utf-8', errors='ignore')
 
-        lines = content.strip().split('\n')
-        if len(lines) < 2:
-            return []
+def parse_csv(content: str) -> List[Dict]:
+    """Match rows of a football-data.co.uk CSV as header -> value dicts"""
+    lines = content.strip().split('\n')
+    if len(lines) < 2:
+        return []
+
+    headers = lines[0].split(',')
+    matches = []
+
+    for line in lines[1:]:
+        values = line.split(',')
+        if len(values) >= len(headers):
+            match = dict(zip(headers, values))
+            matches.append(match)
 
-        headers = lines[0].split(',')
-        matches = []
+    return matches
 
-        for line in lines[1:]:
-            values = line.split(',')
-            if len(values) >= len(headers):
-                match = dict(zip(headers, values))
-                matches.append(match)
 
-        return matches
+def fetch_historical_data(league: str, season: str = "2425") -> List[Dict]:
+    """Fetch historical match data from football-data.co.uk"""
+    try:
+        return parse_csv(download_csv(league, season))
     except Exception as e:
         print(f"Error fetching data for {league}: {e}")
         return []
 
 
+def iter_historical_data(league: str, season: str = "2425") -> Iterator[Dict]:
+    """Stream historical match rows one at a time without buffering the whole CSV"""
+    url = CONFIG["data_url"].format(season=season, league=league)
+
+    try:
+        req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
+        with urllib.request.urlopen(req, timeout=10) as response:
+            lines = (raw.decode('utf-8', errors='ignore') for raw in response)
+            headers = None
+            for line in lines:
+                values = line.strip().split(',')
+                if headers is None:
+                    headers = values
+                    continue
+                if len(values) >= len(headers):
+                    yield dict(zip(headers, values))
+    except Exception as e:
+        print(f"Error streaming data for {league} {season}: {e}")
+
+
+def parse_match_date(value: str) -> Optional[str]:
+    """Convert a football-data.co.uk date (DD/MM/YY or DD/MM/YYYY) to ISO format"""
+    for fmt in ("%d/%m/%Y", "%d/%m/%y"):
+        try:
+            return datetime.strptime(value.strip(), fmt).strftime("%Y-%m-%d")
+        except (ValueError, AttributeError):
+            continue
+    return None
+
+
 def build_team_stats(matches: List[Dict]) -> Dict[str, TeamStats]:
     """Build team statistics from historical matches"""
     teams = {}
@@ -320,52 +413,58 @@ def build_team_stats(matches: List[Dict]) -> Dict[str, TeamStats]:
         except (ValueError, TypeError):
             continue
 
-        # Initialize teams if needed
-        if home not in teams:
-            teams[home] = TeamStats(name=home)
-        if away not in teams:
-            teams[away] = TeamStats(name=away)
-
-        # Update home team stats
-        teams[home].played += 1
-        teams[home].home_played += 1
-        teams[home].goals_for += home_goals
-        teams[home].goals_against += away_goals
-        teams[home].home_goals_for += home_goals
-        teams[home].home_goals_against += away_goals
-
-        # Update away team stats
-        teams[away].played += 1
-        teams[away].away_played += 1
-        teams[away].goals_for += away_goals
-        teams[away].goals_against += home_goals
-        teams[away].away_goals_for += away_goals
-        teams[away].away_goals_against += home_goals
-
-        # Update results
-        if home_goals > away_goals:
-            teams[home].wins += 1
-            teams[away].losses += 1
-            teams[home].form.insert(0, 'W')
-            teams[away].form.insert(0, 'L')
-        elif home_goals < away_goals:
-            teams[home].losses += 1
-            teams[away].wins += 1
-            teams[home].form.insert(0, 'L')
-            teams[away].form.insert(0, 'W')
-        else:
-            teams[home].draws += 1
-            teams[away].draws += 1
-            teams[home].form.insert(0, 'D')
-            teams[away].form.insert(0, 'D')
-
-        # Keep only last 5 for form
-        teams[home].form = teams[home].form[:5]
-        teams[away].form = teams[away].form[:5]
+        update_team_stats(teams, home, away, home_goals, away_goals)
 
     return teams
 
 
+def update_team_stats(teams: Dict[str, TeamStats], home: str, away: str,
+                      home_goals: int, away_goals: int):
+    """Apply a single result to the team statistics in place"""
+    # Initialize teams if needed
+    if home not in teams:
+        teams[home] = TeamStats(name=home)
+    if away not in teams:
+        teams[away] = TeamStats(name=away)
+
+    # Update home team stats
+    teams[home].played += 1
+    teams[home].home_played += 1
+    teams[home].goals_for += home_goals
+    teams[home].goals_against += away_goals
+    teams[home].home_goals_for += home_goals
+    teams[home].home_goals_against += away_goals
+
+    # Update away team stats
+    teams[away].played += 1
+    teams[away].away_played += 1
+    teams[away].goals_for += away_goals
+    teams[away].goals_against += home_goals
+    teams[away].away_goals_for += away_goals
+    teams[away].away_goals_against += home_goals
+
+    # Update results
+    if home_goals > away_goals:
+        teams[home].wins += 1
+        teams[away].losses += 1
+        teams[home].form.insert(0, 'W')
+        teams[away].form.insert(0, 'L')
+    elif home_goals < away_goals:
+        teams[home].losses += 1
+        teams[away].wins += 1
+        teams[home].form.insert(0, 'L')
+        teams[away].form.insert(0, 'W')
+    else:
+        teams[home].draws += 1
+        teams[away].draws += 1
+        teams[home].form.insert(0, 'D')
+        teams[away].form.insert(0, 'D')
+
+    # Keep only last 5 for form
+    teams[home].form = teams[home].form[:5]
+    teams[away].form = teams[away].form[:5]
+
+
 def generate_weekend_fixtures(team_stats: Dict[str, TeamStats], league_code: str) -> List[Dict]:
     """Generate plausible weekend fixtures from team stats"""
     teams = list(team_stats.keys())
@@ -393,12 +492,22 @@ def generate_weekend_fixtures(team_stats: Dict[str, TeamStats], league_code: str
     return fixtures[:6]  # Max 6 matches per league
 
 
-def generate_schedine(matches: List[Match]) -> Dict:
-    """Generate the three schedine types"""
+def generate_schedine(matches: List[Match], movements=None) -> Dict:
+    """
+    Generate the three schedine types. With odds movements (odds_store),
+    markets drifting out are left out and matches with shortening odds come first.
+    """
+    match_moves = {id(m): movements.get(m.league, m.home_team, m.away_team) for m in matches} if movements else {}
+
+    def against(match: Match, odds_key: str) -> bool:
+        return drifting_out(match_moves.get(id(match)), odds_key)
+
+    def steam(match: Match) -> int:
+        return sum(1 for key in MARKET_ODDS_KEYS.values() if shortening(match_moves.get(id(match)), key))
 
-    # Sort by value bets and confidence
+    # Sort by value bets, informed money and confidence
     sorted_matches = sorted(matches,
-        key=lambda m: (len(m.value_bets), m.confidence),
+        key=lambda m: (len(m.value_bets), steam(m), m.confidence),
         reverse=True)
 
     # SCHEDINA SICURA: 3 selections, low odds (1.20-1.50)
@@ -415,7 +524,7 @@ def generate_schedine(matches: List[Match]) -> Dict:
         odds = match.odds
 
         # Prefer DC or Over 1.5 with high probability
-        if pred["homeWin"] + pred["draw"] > 78 and odds["dc1x"] <= 1.50:
+        if pred["homeWin"] + pred["draw"] > 78 and odds["dc1x"] <= 1.50 and not against(match, "dc1x"):
             sicura.append({
                 "match": f"{match.home_team} vs {match.away_team}",
                 "league": match.league_name,
@@ -426,7 +535,7 @@ def generate_schedine(matches: List[Match]) -> Dict:
             })
             used_teams.add(match.home_team)
             used_teams.add(match.away_team)
-        elif pred["over15"] > 78 and odds["over15"] <= 1.40:
+        elif pred["over15"] > 78 and odds["over15"] <= 1.40 and not against(match, "over15"):
             sicura.append({
                 "match": f"{match.home_team} vs {match.away_team}",
                 "league": match.league_name,
@@ -448,7 +557,7 @@ def generate_schedine(matches: List[Match]) -> Dict:
         pred = match.prediction
         odds = match.odds
 
-        if pred["over15"] > 72:
+        if pred["over15"] > 72 and not against(match, "over15"):
             sicura.append({
                 "match": f"{match.home_team} vs {match.away_team}",
                 "league": match.league_name,
@@ -474,7 +583,8 @@ def generate_schedine(matches: List[Match]) -> Dict:
         odds = match.odds
 
         # Use best value bet if available
-        if match.value_bets and match.value_bets[0]["odds"] >= 1.40 and match.value_bets[0]["odds"] <= 2.20:
+        if match.value_bets and match.value_bets[0]["odds"] >= 1.40 and match.value_bets[0]["odds"] <= 2.20 \
+                and not against(match, MARKET_ODDS_KEYS[match.value_bets[0]["market"]]):
             vb = match.value_bets[0]
             media.append({
                 "match": f"{match.home_team} vs {match.away_team}",
@@ -487,7 +597,7 @@ def generate_schedine(matches: List[Match]) -> Dict:
             })
             used_teams.add(match.home_team)
             used_teams.add(match.away_team)
-        elif pred["over25"] > 55 and odds["over25"] <= 2.00:
+        elif pred["over25"] > 55 and odds["over25"] <= 2.00 and not against(match, "over25"):
             media.append({
                 "match": f"{match.home_team} vs {match.away_team}",
                 "league": match.league_name,
@@ -509,7 +619,7 @@ def generate_schedine(matches: List[Match]) -> Dict:
         pred = match.prediction
         odds = match.odds
 
-        if pred["btts"] > 52:
+        if pred["btts"] > 52 and not against(match, "bttsYes"):
             media.append({
                 "match": f"{match.home_team} vs {match.away_team}",
                 "league": match.league_name,
@@ -540,19 +650,19 @@ def generate_schedine(matches: List[Match]) -> Dict:
         probability = 0
 
         # Mix of safe and moderate bets
-        if len(jackpot) < 6 and pred["over15"] > 78:
+        if len(jackpot) < 6 and pred["over15"] > 78 and not against(match, "over15"):
             selection = "Over 1.5"
             sel_odds = odds["over15"]
             probability = pred["over15"]
-        elif len(jackpot) < 10 and pred["homeWin"] + pred["draw"] > 75:
+        elif len(jackpot) < 10 and pred["homeWin"] + pred["draw"] > 75 and not against(match, "dc1x"):
             selection = "DC 1X"
             sel_odds = odds["dc1x"]
             probability = pred["homeWin"] + pred["draw"]
-        elif pred["over25"] > 58:
+        elif pred["over25"] > 58 and not against(match, "over25"):
             selection = "Over 2.5"
             sel_odds = odds["over25"]
             probability = pred["over25"]
-        elif pred["btts"] > 55:
+        elif pred["btts"] > 55 and not against(match, "bttsYes"):
             selection = "BTTS Si"
             sel_odds = odds["bttsYes"]
             probability = pred["btts"]
@@ -599,104 +709,119 @@ def generate_schedine(matches: List[Match]) -> Dict:
     }
 
 
-def main():
-    """Main execution"""
-    print("🎯 BetWise Predictor - Starting...")
-    print(f"📅 Date: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-
-    all_matches = []
-
-    # Get weekend dates
-    today = datetime.now()
+def weekend_dates(today: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """Saturday and Sunday of the upcoming weekend"""
+    today = today or datetime.now()
     days_until_saturday = (5 - today.weekday()) % 7
     if days_until_saturday == 0 and today.weekday() != 5:
         days_until_saturday = 7
     saturday = today + timedelta(days=days_until_saturday)
-    sunday = saturday + timedelta(days=1)
+    return saturday, saturday + timedelta(days=1)
 
-    print(f"📆 Weekend: {saturday.strftime('%d/%m')} - {sunday.strftime('%d/%m')}")
 
-    match_id = 0
+def predict_fixture(home_stats: TeamStats, away_stats: TeamStats, blend=None,
+                    calibrators: Optional[Dict] = None,
+                    movement: Optional[Dict] = None) -> Tuple[Prediction, Dict, List[ValueBet], int]:
+    """Prediction, odds, value bets (gated by the odds movement, if any) and confidence of one fixture"""
+    # Calculate prediction
+    prediction = calculate_prediction(home_stats, away_stats)
+    if blend:
+        prediction = blend(home_stats.name, away_stats.name, prediction)
+    if calibrators:
+        from evaluation import apply_calibration
+        prediction = apply_calibration(prediction, calibrators)
 
-    for league_code, league_info in CONFIG["leagues"].items():
-        print(f"\n🏟️ Processing {league_info['name']}...")
+    # Generate odds
+    odds = generate_odds(prediction)
 
-        # Fetch historical data
-        matches_data = fetch_historical_data(league_code)
+    # Find value bets
+    value_bets = find_value_bets(prediction, odds, movement)
 
-        if not matches_data:
-            print(f"   ⚠️ No data available for {league_info['name']}")
+    # Calculate confidence
+    confidence = 50 + min(30, home_stats.played * 2) + min(20, len(value_bets) * 5)
+
+    return prediction, odds, value_bets, min(confidence, 95)
+
+
+def prediction_fields(prediction: Prediction) -> Dict:
+    """Prediction as stored in the output document"""
+    return {
+        "homeWin": prediction.home_win,
+        "draw": prediction.draw,
+        "awayWin": prediction.away_win,
+        "over25": prediction.over_25,
+        "over15": prediction.over_15,
+        "over05": prediction.over_05,
+        "btts": prediction.btts,
+        "likelyScore": list(prediction.likely_score),
+        "homeXG": str(prediction.home_xg),
+        "awayXG": str(prediction.away_xg)
+    }
+
+
+def predict_league(league_code: str, team_stats: Dict[str, TeamStats], fixtures: List[Tuple[str, str]],
+                   saturday: datetime, sunday: datetime, movements=None) -> List[Match]:
+    """
+    Predictions for a league's fixtures (ids are numbered per run by assemble_output);
+    `movements` are the odds_store.OddsMovements of the snapshotted fixtures.
+    """
+    league_info = CONFIG["leagues"][league_code]
+
+    # Imported here: the ensemble and evaluation modules depend on this one
+    from ensemble import league_blender
+    from evaluation import league_calibrator
+
+    # Blend with Elo/market when weights have been fitted for this league
+    blend = league_blender(league_code)
+    calibrators = league_calibrator(league_code, "ensemble" if blend else "poisson")
+
+    # Generate predictions for each fixture
+    times = ["13:30", "15:00", "18:00", "20:45", "21:00"]
+    matches = []
+
+    for i, (home, away) in enumerate(fixtures):
+        if home not in team_stats or away not in team_stats:
             continue
 
-        # Build team statistics
-        team_stats = build_team_stats(matches_data)
-        print(f"   📊 Found {len(team_stats)} teams")
+        movement = movements.get(league_code, home, away) if movements else None
+        prediction, odds, value_bets, confidence = predict_fixture(
+            team_stats[home], team_stats[away], blend, calibrators, movement)
 
-        # Generate fixtures
-        fixtures = generate_weekend_fixtures(team_stats, league_code)
-        print(f"   ⚽ Generated {len(fixtures)} fixtures")
+        # Determine match date
+        match_date = saturday if i % 2 == 0 else sunday
 
-        # Generate predictions for each fixture
-        times = ["13:30", "15:00", "18:00", "20:45", "21:00"]
-
-        for i, (home, away) in enumerate(fixtures):
-            if home not in team_stats or away not in team_stats:
-                continue
-
-            home_stats = team_stats[home]
-            away_stats = team_stats[away]
-
-            # Calculate prediction
-            prediction = calculate_prediction(home_stats, away_stats)
-
-            # Generate odds
-            odds = generate_odds(prediction)
-
-            # Find value bets
-            value_bets = find_value_bets(prediction, odds)
-
-            # Calculate confidence
-            confidence = 50 + min(30, home_stats.played * 2) + min(20, len(value_bets) * 5)
-
-            # Determine match date
-            match_date = saturday if i % 2 == 0 else sunday
-
-            match = Match(
-                id=f"{league_info['code']}_{match_id}",
-                league=league_info["code"],
-                league_name=league_info["name"],
-                league_flag=league_info["flag"],
-                home_team=home,
-                away_team=away,
-                date=match_date.strftime("%Y-%m-%d"),
-                time=times[i % len(times)],
-                prediction={
-                    "homeWin": prediction.home_win,
-                    "draw": prediction.draw,
-                    "awayWin": prediction.away_win,
-                    "over25": prediction.over_25,
-                    "over15": prediction.over_15,
-                    "over05": prediction.over_05,
-                    "btts": prediction.btts,
-                    "likelyScore": list(prediction.likely_score),
-                    "homeXG": str(prediction.home_xg),
-                    "awayXG": str(prediction.away_xg)
-                },
-                odds=odds,
-                value_bets=[asdict(vb) for vb in value_bets],
-                confidence=min(confidence, 95)
-            )
-
-            all_matches.append(match)
-            match_id += 1
-
-            if value_bets:
-                print(f"   💎 {home} vs {away}: {len(value_bets)} value bets found")
+        match = Match(
+            id=f"{league_info['code']}_{len(matches)}",
+            league=league_info["code"],
+            league_name=league_info["name"],
+            league_flag=league_info["flag"],
+            home_team=home,
+            away_team=away,
+            date=match_date.strftime("%Y-%m-%d"),
+            time=times[i % len(times)],
+            prediction=prediction_fields(prediction),
+            odds=odds,
+            value_bets=[asdict(vb) for vb in value_bets],
+            confidence=confidence
+        )
+
+        matches.append(match)
+
+        if value_bets:
+            print(f"   💎 {home} vs {away}: {len(value_bets)} value bets found")
+
+    return matches
+
+
+def assemble_output(all_matches: List[Match], saturday: datetime, sunday: datetime, movements=None) -> Dict:
+    """Number the matches, generate the schedine and build the output document"""
+    for match_id, match in enumerate(all_matches):
+        match.id = f"{match.league}_{match_id}"
 
     print(f"\n📊 Total matches analyzed: {len(all_matches)}")
 
     # Generate schedine
-    schedine = generate_schedine(all_matches)
+    schedine = generate_schedine(all_matches, movements)
 
     print(f"\n🎰 Schedine generated:")
     print(f"   Sicura: {len(schedine['sicura']['selections'])} selections @ {schedine['sicura']['totalOdds']}")
@@ -715,17 +840,71 @@ def main():
             "leagues_processed": len(CONFIG["leagues"])
         }
     }
+    return output
+
+
+def build_predictions() -> Dict:
+    """Run the statistical pipeline for every league and return the output document"""
+    all_matches = []
+
+    # Get weekend dates
+    saturday, sunday = weekend_dates()
+
+    print(f"📆 Weekend: {saturday.strftime('%d/%m')} - {sunday.strftime('%d/%m')}")
+
+    # Odds movement of the fixtures snapshotted during the week, if any
+    from odds_store import load_movements
+    movements = load_movements()
+    if movements:
+        print(f"📈 Odds movement available for {len(movements)} fixtures")
+
+    for league_code, league_info in CONFIG["leagues"].items():
+        print(f"\n🏟️ Processing {league_info['name']}...")
+
+        # Fetch historical data
+        matches_data = fetch_historical_data(league_code)
+
+        if not matches_data:
+            print(f"   ⚠️ No data available for {league_info['name']}")
+            continue
+
+        # Build team statistics
+        team_stats = build_team_stats(matches_data)
+        print(f"   📊 Found {len(team_stats)} teams")
+
+        # Generate fixtures
+        fixtures = generate_weekend_fixtures(team_stats, league_code)
+        print(f"   ⚽ Generated {len(fixtures)} fixtures")
+
+        all_matches.extend(predict_league(league_code, team_stats, fixtures, saturday, sunday, movements))
+
+    return assemble_output(all_matches, saturday, sunday, movements)
 
-    # Ensure output directory exists
+
+def main():
+    """Main execution"""
+    print("🎯 BetWise Predictor - Starting...")
+    print(f"📅 Date: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+
+    output = build_predictions()
+
+    # Write output atomically, skipping it when nothing but generated_at changed
     output_path = CONFIG["output_path"]
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    changed = write_json_atomic(output_path, output)
+    report_changed(changed)
 
-    # Write output
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(output, f, indent=2, ensure_ascii=False)
+    if not changed:
+        print(f"\nℹ️ Predictions unchanged - {output_path} not rewritten")
+        return output
 
     print(f"\n✅ Predictions saved to {output_path}")
 
+    # Sharded dashboard output and append-only history of every run
+    from archive import archive_predictions
+    from shards import write_shards
+    write_shards(output)
+    archive_predictions(output, source="predictor")
+
     return output
 
 
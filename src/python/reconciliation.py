@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+BetWise Reconciliation - Chiusura delle previsioni pubblicate
+Collega ogni selezione e schedina archiviata ai risultati reali tramite un
+indice (lega, data, squadre normalizzate), calcola esiti, hit rate e P&L
+e salva lo stato in modo incrementale: ogni esecuzione chiude solo le
+partite appena terminate.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from archive import iter_documents
+from predictor import CONFIG, fetch_historical_data, parse_match_date
+from team_names import league_code, match_key, normalize_team_name
+
+# Reconciliation configuration
+RECONCILE_CONFIG = {
+    "state_path": "src/data/reconciliation.json",
+    "weekend_padding_days": 1,  # Monday fixtures still belong to the weekend
+    "expire_days": 7,  # Selections still without a result this long after their weekend expire
+}
+
+WON, LOST, VOID, PENDING = "won", "lost", "void", "pending"
+EXPIRED, UNKNOWN = "expired", "unknown"  # Never settled: kept out of hit rates and P&L
+
+MARKET_ALIASES = {
+    "GG": "BTTS SI", "GOAL": "BTTS SI", "BTTS": "BTTS SI", "BTTS YES": "BTTS SI",
+    "NG": "BTTS NO", "NO GOAL": "BTTS NO", "NOGOAL": "BTTS NO",
+}
+
+ResultKey = Tuple[str, str, str, str]
+
+
+class ResultsIndex:
+    """Final scores indexed by (league, date, home, away) with normalized team names"""
+
+    def __init__(self):
+        self.results: Dict[ResultKey, Tuple[int, int]] = {}
+        self.leagues = set()
+
+    def add_rows(self, code: str, rows: Iterable[Dict]) -> int:
+        added = 0
+        for row in rows:
+            match_date = parse_match_date(row.get('Date', ''))
+            home = row.get('HomeTeam', '')
+            away = row.get('AwayTeam', '')
+            try:
+                home_goals = int(row.get('FTHG', ''))
+                away_goals = int(row.get('FTAG', ''))
+            except (ValueError, TypeError):
+                continue
+            if not match_date or not home or not away:
+                continue
+            key = (code, match_date, normalize_team_name(home), normalize_team_name(away))
+            self.results[key] = (home_goals, away_goals)
+            added += 1
+        self.leagues.add(code)
+        return added
+
+    def lookup(self, code: Optional[str], dates: List[str], home: str, away: str) -> Optional[Tuple[int, int]]:
+        codes = [code] if code else sorted(self.leagues)
+        for c in codes:
+            for d in dates:
+                score = self.results.get((c, d, home, away))
+                if score is not None:
+                    return score
+        return None
+
+
+def settle_market(market: str, home_goals: int, away_goals: int) -> str:
+    """Outcome of a single market given the final score"""
+    m = " ".join(market.strip().upper().split())
+    m = MARKET_ALIASES.get(m, m)
+    if m.startswith("DC "):
+        m = m[3:]
+    total = home_goals + away_goals
+
+    if m in ("1", "X", "2", "1X", "X2", "12"):
+        actual = "1" if home_goals > away_goals else "X" if home_goals == away_goals else "2"
+        return WON if actual in m else LOST
+
+    over_under = re.match(r"^(OVER|UNDER)\s*([0-9]+(?:\.[0-9]+)?)$", m)
+    if over_under:
+        line = float(over_under.group(2))
+        if total == line:
+            return VOID
+        over = total > line
+        return WON if over == (over_under.group(1) == "OVER") else LOST
+
+    if m == "BTTS SI":
+        return WON if home_goals > 0 and away_goals > 0 else LOST
+    if m == "BTTS NO":
+        return LOST if home_goals > 0 and away_goals > 0 else WON
+
+    return UNKNOWN
+
+
+def document_id(doc: Dict) -> str:
+    return f"{doc.get('generated_at', '')}|{doc.get('weekend', '')}"
+
+
+def weekend_dates(doc: Dict) -> List[str]:
+    """ISO dates covered by a published document"""
+    dates = {m["date"] for m in doc.get("matches", []) if m.get("date")}
+
+    parts = doc.get("weekend", "").split(" - ")
+    if len(parts) == 2:
+        year = (doc.get("generated_at") or datetime.now().isoformat())[:4]
+        bounds = []
+        for part in parts:
+            pieces = part.strip().split("/")
+            if len(pieces) == 2:
+                pieces.append(year)
+            bounds.append(parse_match_date("/".join(pieces)))
+        if all(bounds):
+            start = datetime.strptime(bounds[0], "%Y-%m-%d")
+            end = datetime.strptime(bounds[1], "%Y-%m-%d")
+            if end < start:  # Weekend across new year without explicit years
+                end = end.replace(year=end.year + 1)
+            end += timedelta(days=RECONCILE_CONFIG["weekend_padding_days"])
+            while start <= end:
+                dates.add(start.strftime("%Y-%m-%d"))
+                start += timedelta(days=1)
+
+    return sorted(dates)
+
+
+def iter_selections(doc: Dict) -> Iterator[Dict]:
+    """Every settleable selection of a document: slip legs and match value bets"""
+    doc_id = document_id(doc)
+    dates = weekend_dates(doc)
+
+    for slip_key, slip in (doc.get("schedine") or {}).items():
+        for i, sel in enumerate(slip.get("selections", [])):
+            yield {
+                "id": _selection_id(doc_id, slip_key, i, sel.get("match", ""), sel.get("selection", "")),
+                "slip": slip_key,
+                "league": league_code(sel.get("league", "")),
+                "dates": dates,
+                "match": sel.get("match", ""),
+                "market": sel.get("selection", ""),
+                "odds": float(sel.get("odds", 1) or 1),
+            }
+
+    for match in doc.get("matches", []):
+        home = match.get("home_team", match.get("homeTeam", ""))
+        away = match.get("away_team", match.get("awayTeam", ""))
+        match_dates = [match["date"]] if match.get("date") else dates
+        for vb in match.get("value_bets", match.get("valueBets", [])):
+            yield {
+                "id": _selection_id(doc_id, "value_bets", match.get("id", ""), f"{home} vs {away}", vb["market"]),
+                "slip": None,
+                "league": league_code(match.get("league", "")),
+                "dates": match_dates,
+                "match": f"{home} vs {away}",
+                "market": vb["market"],
+                "odds": float(vb.get("odds", 1) or 1),
+            }
+
+
+def _selection_id(*parts) -> str:
+    return hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()[:16]
+
+
+def load_state(path: str = None) -> Dict:
+    path = path or RECONCILE_CONFIG["state_path"]
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"selections": {}, "slips": {}, "totals": {"markets": {}, "slips": {}}}
+
+
+def save_state(state: Dict, path: str = None):
+    path = path or RECONCILE_CONFIG["state_path"]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    state["updated_at"] = datetime.now().isoformat()
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=2, ensure_ascii=False)
+
+
+def _add_market_total(state: Dict, market: str, status: str):
+    totals = state["totals"]["markets"].setdefault(market, {WON: 0, LOST: 0, VOID: 0, "hit_rate": 0})
+    totals[status] += 1
+    decided = totals[WON] + totals[LOST]
+    totals["hit_rate"] = round(totals[WON] / decided * 100, 1) if decided else 0
+
+
+def reconcile(documents: Iterable[Dict], index: ResultsIndex, state: Dict, today: str = None) -> Dict:
+    """
+    Settle every selection and slip not yet settled in `state`.
+
+    Settled selections are never revisited; pending ones are retried on the
+    next run once their result appears in the index, until they expire
+    `expire_days` after their weekend (e.g. fixtures that were never played).
+    """
+    today = today or datetime.now().strftime("%Y-%m-%d")
+    expire_before = (datetime.strptime(today, "%Y-%m-%d")
+                     - timedelta(days=RECONCILE_CONFIG["expire_days"])).strftime("%Y-%m-%d")
+    settled_now = 0
+    slips_closed = 0
+
+    for doc in documents:
+        doc_id = document_id(doc)
+        slip_legs: Dict[str, List[Dict]] = {}
+
+        for sel in iter_selections(doc):
+            record = state["selections"].get(sel["id"])
+            if record is None or record["status"] == PENDING:
+                key = match_key(sel["match"])
+                score = index.lookup(sel["league"], sel["dates"], *key) if key else None
+                status = settle_market(sel["market"], *score) if score else PENDING
+                last_day = max(sel["dates"]) if sel["dates"] else (doc.get("generated_at") or today)[:10]
+                if status == PENDING and last_day < expire_before:
+                    status = EXPIRED
+                record = {"status": status, "market": sel["market"], "odds": sel["odds"],
+                          "match": sel["match"], "score": list(score) if score else None}
+                state["selections"][sel["id"]] = record
+                if status in (WON, LOST, VOID):
+                    _add_market_total(state, sel["market"], status)
+                if status != PENDING:
+                    settled_now += 1
+
+            if sel["slip"]:
+                slip_legs.setdefault(sel["slip"], []).append(record)
+
+        for slip_key, legs in slip_legs.items():
+            slip_id = _selection_id(doc_id, slip_key)
+            if slip_id in state["slips"]:
+                continue
+            if any(leg["status"] == PENDING for leg in legs) and not any(leg["status"] == LOST for leg in legs):
+                continue
+
+            slip = doc["schedine"][slip_key]
+            stake = float(slip.get("stake", 1) or 1)
+            unsettled = next((leg["status"] for leg in legs if leg["status"] in (EXPIRED, UNKNOWN)), None)
+            if unsettled and not any(leg["status"] == LOST for leg in legs):
+                # Outcome cannot be known: recorded as closed but kept out of the P&L
+                state["slips"][slip_id] = {"document": doc_id, "slip": slip_key, "status": unsettled,
+                                           "stake": stake, "returned": None}
+                slips_closed += 1
+                continue
+
+            won = all(leg["status"] in (WON, VOID) for leg in legs)
+            odds = 1.0
+            for leg in legs:
+                odds *= leg["odds"] if leg["status"] == WON else 1.0
+            returned = round(stake * odds, 2) if won else 0.0
+
+            state["slips"][slip_id] = {"document": doc_id, "slip": slip_key,
+                                       "status": WON if won else LOST,
+                                       "stake": stake, "returned": returned}
+            totals = state["totals"]["slips"].setdefault(slip_key, {"n": 0, WON: 0, LOST: 0,
+                                                                    "staked": 0.0, "returned": 0.0, "pnl": 0.0})
+            totals["n"] += 1
+            totals[WON if won else LOST] += 1
+            totals["staked"] = round(totals["staked"] + stake, 2)
+            totals["returned"] = round(totals["returned"] + returned, 2)
+            totals["pnl"] = round(totals["returned"] - totals["staked"], 2)
+            slips_closed += 1
+
+    return {"selections_settled": settled_now, "slips_closed": slips_closed}
+
+
+def needed_seasons(documents: List[Dict]) -> Dict[str, set]:
+    """League code -> football-data season codes referenced by the documents"""
+    needed: Dict[str, set] = {}
+    for doc in documents:
+        for sel in iter_selections(doc):
+            codes = [sel["league"]] if sel["league"] else list(CONFIG["leagues"])
+            for d in sel["dates"][:1]:
+                year, month = int(d[:4]), int(d[5:7])
+                start = year if month >= 7 else year - 1
+                for code in codes:
+                    needed.setdefault(code, set()).add(f"{start % 100:02d}{(start + 1) % 100:02d}")
+    return needed
+
+
+def load_documents(pattern: str = None) -> List[Dict]:
+    """Archived documents, or loose JSON files matching `pattern` when given"""
+    if not pattern:
+        return list(iter_documents())
+
+    documents = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, 'r', encoding='utf-8') as f:
+            documents.append(json.load(f))
+    return documents
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="BetWise predictions reconciliation")
+    parser.add_argument("--history", default=None,
+                        help="Glob of prediction JSON files to use instead of the archive")
+    args = parser.parse_args()
+
+    print("🧾 BetWise Reconciliation - Starting...")
+    documents = load_documents(args.history)
+    if not documents:
+        print("⚠️ No archived predictions found")
+        return
+
+    state = load_state()
+
+    # Skip documents whose selections are all settled: no results fetch needed
+    open_docs = [d for d in documents
+                 if any(state["selections"].get(s["id"], {}).get("status", PENDING) == PENDING
+                        for s in iter_selections(d))]
+    print(f"   📂 {len(documents)} documents, {len(open_docs)} with open selections")
+
+    index = ResultsIndex()
+    for code, seasons in needed_seasons(open_docs).items():
+        for season in sorted(seasons):
+            added = index.add_rows(code, fetch_historical_data(code, season))
+            print(f"   📥 {CONFIG['leagues'][code]['name']} {season}: {added} results")
+
+    summary = reconcile(open_docs, index, state)
+    save_state(state)
+
+    print(f"\n✅ Settled {summary['selections_settled']} selections, closed {summary['slips_closed']} slips")
+    for slip_key, totals in sorted(state["totals"]["slips"].items()):
+        print(f"   🎰 {slip_key}: {totals[WON]}/{totals['n']} won, P&L €{totals['pnl']}")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
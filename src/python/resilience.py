@@ -0,0 +1,112 @@
+"""
+BetWise Resilience - Retry con backoff e deadline per le chiamate HTTP
+Ritenta le risposte 429/5xx ed errori di rete con backoff esponenziale
+"full jitter", rispettando l'header retry-after, sempre entro una deadline
+complessiva del job: se il prossimo tentativo la supererebbe si rinuncia
+subito, lasciando tempo al fallback sul modello statistico.
+"""
+
+import email.utils
+import os
+import random
+import socket
+import time
+import urllib.error
+import urllib.request
+from typing import Callable, Optional
+
+# Retry configuration
+RETRY_CONFIG = {
+    "max_attempts": 5,
+    "base_delay": 2.0,
+    "max_delay": 30.0,
+    "retry_statuses": (408, 429, 500, 502, 503, 504, 529),
+    "job_deadline_seconds": int(os.environ.get("BETWISE_DEADLINE", 900)),
+    "fallback_reserve_seconds": 120,  # Kept free for the statistical fallback and publishing
+    "min_attempt_seconds": 10,  # Do not start an attempt with less time than this
+}
+
+
+class DeadlineExceeded(Exception):
+    """The job deadline leaves no room for another attempt"""
+
+
+class Deadline:
+    """Wall-clock budget shared by every call of a job"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+def job_deadline() -> Deadline:
+    """Deadline for Claude calls: the job budget minus the fallback reserve"""
+    return Deadline(RETRY_CONFIG["job_deadline_seconds"] - RETRY_CONFIG["fallback_reserve_seconds"])
+
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a retry-after header (delta seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff; a server retry-after is a lower bound"""
+    cap = min(RETRY_CONFIG["max_delay"], RETRY_CONFIG["base_delay"] * (2 ** attempt))
+    delay = random.uniform(0, cap)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+def urlopen_with_retry(make_request: Callable[[], urllib.request.Request], timeout: float,
+                       deadline: Optional[Deadline] = None, label: str = "request"):
+    """
+    urlopen() with retries on retryable statuses and network errors.
+
+    Each attempt's timeout is capped by the remaining deadline. Raises
+    DeadlineExceeded when waiting for the next attempt would not leave
+    min_attempt_seconds before the deadline; other errors are re-raised
+    after the last attempt.
+    """
+    attempts = RETRY_CONFIG["max_attempts"]
+    for attempt in range(attempts):
+        attempt_timeout = timeout
+        if deadline is not None:
+            if deadline.remaining() < RETRY_CONFIG["min_attempt_seconds"]:
+                raise DeadlineExceeded(f"{label}: deadline reached before attempt {attempt + 1}")
+            attempt_timeout = min(timeout, deadline.remaining())
+
+        retry_after = None
+        try:
+            return urllib.request.urlopen(make_request(), timeout=attempt_timeout)
+        except urllib.error.HTTPError as e:
+            if e.code not in RETRY_CONFIG["retry_statuses"] or attempt == attempts - 1:
+                raise
+            retry_after = retry_after_seconds(e.headers.get("retry-after"))
+            reason = f"HTTP {e.code}"
+        except (urllib.error.URLError, socket.timeout, ConnectionError) as e:
+            if attempt == attempts - 1:
+                raise
+            reason = str(getattr(e, "reason", e))
+
+        delay = backoff_delay(attempt, retry_after)
+        if deadline is not None and delay + RETRY_CONFIG["min_attempt_seconds"] > deadline.remaining():
+            raise DeadlineExceeded(f"{label}: {reason}, no time left to retry")
+        print(f"   ↻ {label}: {reason}, retry {attempt + 2}/{attempts} in {delay:.1f}s")
+        time.sleep(delay)
@@ -0,0 +1,81 @@
+"""
+BetWise Response Cache - Cache su disco delle risposte di Claude
+Le risposte sono indirizzate per contenuto (hash di modello + system prompt
++ prompt utente) e scadono dopo un TTL: un rerun manuale o un crash a valle
+non ripagano la chiamata all'API, e la modalità replay può rieseguire
+parsing, salvataggio e Telegram da una risposta salvata.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Dict, Optional
+
+from output_writer import write_bytes_atomic
+
+# Cache configuration
+CACHE_CONFIG = {
+    "cache_dir": os.environ.get("BETWISE_CACHE_DIR", ".cache/claude"),
+    "ttl_seconds": int(os.environ.get("CLAUDE_CACHE_TTL", 6 * 3600)),
+}
+
+
+def cache_key(model: str, system_prompt: str, user_prompt: str) -> str:
+    """Content address of a request"""
+    digest = hashlib.sha256()
+    for part in (model, system_prompt, user_prompt):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """One JSON file per response, named by its cache key"""
+
+    def __init__(self, cache_dir: str = None, ttl_seconds: int = None):
+        self.cache_dir = cache_dir or CACHE_CONFIG["cache_dir"]
+        self.ttl_seconds = CACHE_CONFIG["ttl_seconds"] if ttl_seconds is None else ttl_seconds
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load(self, path: str) -> Optional[Dict]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached response text, or None when missing or older than the TTL"""
+        entry = self._load(self._path(key))
+        if not entry:
+            return None
+        if self.ttl_seconds and time.time() - entry["created_at"] > self.ttl_seconds:
+            return None
+        return entry["response"]
+
+    def put(self, key: str, response: str, model: str = ""):
+        entry = {"key": key, "model": model, "created_at": time.time(), "response": response}
+        write_bytes_atomic(self._path(key), json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+
+    def latest(self) -> Optional[Dict]:
+        """Most recently cached entry regardless of TTL (replay mode)"""
+        try:
+            names = [n for n in os.listdir(self.cache_dir) if n.endswith(".json")]
+        except FileNotFoundError:
+            return None
+        entries = [e for e in (self._load(os.path.join(self.cache_dir, n)) for n in names) if e]
+        return max(entries, key=lambda e: e["created_at"], default=None)
+
+    def entry(self, key: str) -> Optional[Dict]:
+        """Cached entry by key or unique key prefix, regardless of TTL"""
+        exact = self._load(self._path(key))
+        if exact:
+            return exact
+        try:
+            matches = [n for n in os.listdir(self.cache_dir) if n.startswith(key) and n.endswith(".json")]
+        except FileNotFoundError:
+            return None
+        return self._load(os.path.join(self.cache_dir, matches[0])) if len(matches) == 1 else None
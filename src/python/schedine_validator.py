@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+BetWise Schedine Validator - Controllo e riparazione delle schedine di Claude
+Verifica schema, quote e numero di selezioni per modalità (GIOCARE/CAUTELA),
+ricalcola quota totale e vincita dalle singole selezioni e, tramite un indice
+delle squadre normalizzate, trova partite duplicate e selezioni in conflitto.
+Abbastanza leggero da girare su ogni schedina mentre arriva in streaming.
+"""
+
+import argparse
+import json
+import re
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+from reconciliation import WON, settle_market
+from team_names import match_key
+
+ERROR, WARNING = "error", "warning"
+
+# Expected legs per schedina (min, max) and stake for each decision
+MODE_RULES = {
+    "GIOCARE": {
+        "stake": 3,
+        "legs": {"jackpot_classic": (12, 12), "jackpot_goals": (12, 12),
+                 "jackpot_results": (10, 10), "jackpot_mega": (15, 15)},
+    },
+    "CAUTELA": {
+        "stake": 2,
+        "legs": {"jackpot_safe": (6, 8), "jackpot_risk": (6, 8)},
+    },
+    "SALTARE": {"stake": 0, "legs": {}},
+}
+
+VALIDATOR_CONFIG = {
+    "odds_tolerance": 0.02,  # Relative difference accepted on totalOdds / potentialWin
+    "max_leg_odds": 50.0,
+    "max_reasoning": 50,
+}
+
+
+@dataclass
+class Issue:
+    """One validation finding"""
+    severity: str
+    code: str
+    message: str
+    slip: Optional[str] = None
+    leg: Optional[int] = None
+    repaired: bool = False
+
+
+@lru_cache(maxsize=None)
+def winning_scores(market: str) -> frozenset:
+    """Final scores (up to 7-7) that win a market; empty for markets reconciliation cannot settle"""
+    return frozenset((home, away) for home in range(8) for away in range(8)
+                     if settle_market(market, home, away) == WON)
+
+
+def markets_conflict(market_a: str, market_b: str) -> bool:
+    """True when two settleable markets on the same match cannot both win"""
+    a, b = winning_scores(market_a), winning_scores(market_b)
+    return bool(a) and bool(b) and not (a & b)
+
+
+def parse_amount(value, grouped: bool = True) -> Optional[float]:
+    """
+    Number from '€2.450', '1.234,56', '€2,450', '1234.5', 'XXX'... (None when absent).
+
+    With `grouped` a separator followed by exactly three digits groups
+    thousands (Italian or English style); odds pass False so '1.850' stays 1.85.
+    """
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value or "").replace("€", "").replace(" ", "")
+    found = re.search(r"[0-9]+(?:[.,][0-9]+)*", text)
+    if not found:
+        return None
+    number = found.group()
+
+    if "," in number and "." in number:
+        decimal = "," if number.rfind(",") > number.rfind(".") else "."
+    elif grouped and re.fullmatch(r"[0-9]{1,3}([.,][0-9]{3})+", number):
+        decimal = None  # Only thousands separators
+    else:
+        decimal = "," if "," in number else "."
+
+    whole, _, fraction = number.rpartition(decimal) if decimal and decimal in number else (number, "", "")
+    digits = re.sub(r"[.,]", "", whole) + ("." + fraction if fraction else "")
+    return float(digits)
+
+
+def format_odds(total: float) -> str:
+    return f"{total:.2f}" if total < 100 else f"{total:.0f}"
+
+
+def format_win(amount: float) -> str:
+    return f"€{amount:.2f}" if amount < 100 else f"€{amount:.0f}"
+
+
+class SelectionIndex:
+    """
+    Legs seen so far across the schedine of one document, keyed by normalized
+    teams, so each new schedina is checked against the previous ones in O(legs).
+    """
+
+    def __init__(self):
+        self.by_match: Dict[Tuple[str, str], List[Tuple[str, str]]] = {}
+
+    def conflicts(self, key: Tuple[str, str], market: str) -> List[Tuple[str, str]]:
+        return [(slip, other) for slip, other in self.by_match.get(key, [])
+                if markets_conflict(market, other)]
+
+    def add(self, key: Tuple[str, str], slip: str, market: str):
+        self.by_match.setdefault(key, []).append((slip, market))
+
+
+def validate_schedina(slip_key: str, schedina: Dict, decision: str, index: Optional[SelectionIndex] = None,
+                      repair: bool = True) -> Tuple[Dict, List[Issue]]:
+    """
+    Validate (and optionally repair) one schedina.
+
+    Repairs: drop legs that are malformed or repeat a match or team, truncate
+    reasoning, recompute totalOdds and potentialWin, set the mode's stake.
+    Returns the (possibly repaired copy of the) schedina and its issues.
+    """
+    issues: List[Issue] = []
+    rules = MODE_RULES.get(decision, MODE_RULES["SALTARE"])
+
+    def issue(severity, code, message, leg=None, repaired=False):
+        issues.append(Issue(severity, code, message, slip_key, leg, repaired and repair))
+
+    if not isinstance(schedina, dict) or not isinstance(schedina.get("selections"), list):
+        issue(ERROR, "schema", "schedina without a selections list")
+        return schedina, issues
+
+    legs, seen_matches, seen_teams = [], set(), {}
+    for i, sel in enumerate(schedina["selections"]):
+        if not isinstance(sel, dict):
+            issue(ERROR, "schema", "selection is not an object", i, repaired=True)
+            continue
+        key = match_key(str(sel.get("match", "")))
+        odds = parse_amount(sel.get("odds"), grouped=False)
+        if not key or not sel.get("selection") or odds is None:
+            issue(ERROR, "schema", f"incomplete selection {sel.get('match', '?')!r}", i, repaired=True)
+            continue
+        if odds <= 1.0:
+            issue(ERROR, "odds", f"{sel['match']}: odds {odds} not above 1.00", i, repaired=True)
+            continue
+        if odds > VALIDATOR_CONFIG["max_leg_odds"]:
+            issue(WARNING, "odds", f"{sel['match']}: unusually high odds {odds}", i)
+
+        if key in seen_matches:
+            issue(ERROR, "duplicate_match", f"{sel['match']} already in this schedina", i, repaired=True)
+            continue
+        clash = next((team for team in key if team in seen_teams), None)
+        if clash:
+            issue(ERROR, "team_twice", f"{clash} plays in {seen_teams[clash]} and {sel['match']}", i, repaired=True)
+            continue
+
+        leg = dict(sel, odds=odds)
+        reasoning = str(sel.get("reasoning", ""))
+        if len(reasoning) > VALIDATOR_CONFIG["max_reasoning"]:
+            issue(WARNING, "reasoning", f"{sel['match']}: reasoning over {VALIDATOR_CONFIG['max_reasoning']} chars",
+                  i, repaired=True)
+            if repair:
+                leg["reasoning"] = reasoning[:VALIDATOR_CONFIG["max_reasoning"]]
+
+        if index is not None:
+            for other_slip, other_market in index.conflicts(key, sel["selection"]):
+                issue(WARNING, "conflicting_selection",
+                      f"{sel['match']}: {sel['selection']} cannot win together with "
+                      f"{other_market} in {other_slip}", i)
+
+        seen_matches.add(key)
+        for team in key:
+            seen_teams[team] = sel["match"]
+        legs.append(leg)
+
+    if index is not None:
+        for leg in legs:
+            index.add(match_key(leg["match"]), slip_key, leg["selection"])
+
+    expected = rules["legs"].get(slip_key)
+    if expected is None:
+        issue(WARNING, "unexpected_slip", f"not part of a {decision} response")
+    elif not expected[0] <= len(legs) <= expected[1]:
+        issue(WARNING, "leg_count", f"{len(legs)} legs, expected {expected[0]}-{expected[1]} for {decision}")
+
+    if not legs:
+        issue(ERROR, "empty", "no valid selections")
+
+    total = 1.0
+    for leg in legs:
+        total *= leg["odds"]
+
+    stated_odds = parse_amount(schedina.get("totalOdds"), grouped=False)
+    if stated_odds is None or abs(stated_odds - total) > total * VALIDATOR_CONFIG["odds_tolerance"]:
+        issue(ERROR, "total_odds", f"totalOdds {schedina.get('totalOdds')!r}, legs multiply to {format_odds(total)}",
+              repaired=True)
+
+    stake = parse_amount(schedina.get("stake"))
+    if rules["stake"] and stake != rules["stake"]:
+        issue(WARNING, "stake", f"stake {schedina.get('stake')!r}, expected {rules['stake']} for {decision}",
+              repaired=True)
+        stake = rules["stake"]
+    stake = stake or rules["stake"] or 1
+
+    win = stake * total
+    stated_win = parse_amount(schedina.get("potentialWin"))
+    if stated_win is None or abs(stated_win - win) > win * VALIDATOR_CONFIG["odds_tolerance"]:
+        issue(ERROR, "potential_win", f"potentialWin {schedina.get('potentialWin')!r}, "
+                                      f"stake x odds = {format_win(win)}", repaired=True)
+
+    if not repair:
+        return schedina, issues
+
+    repaired = dict(schedina, selections=legs, totalOdds=format_odds(total),
+                    stake=int(stake) if float(stake).is_integer() else stake,
+                    potentialWin=format_win(win))
+    return repaired, issues
+
+
+def is_sendable(issues: List[Issue]) -> bool:
+    """No errors left after repair"""
+    return not any(i.severity == ERROR and not i.repaired for i in issues)
+
+
+@dataclass
+class ValidationReport:
+    """Validated document and every issue found"""
+    document: Dict
+    issues: List[Issue]
+
+    @property
+    def errors(self) -> List[Issue]:
+        return [i for i in self.issues if i.severity == ERROR and not i.repaired]
+
+    def summary(self) -> Dict:
+        return {
+            "errors": len(self.errors),
+            "warnings": sum(1 for i in self.issues if i.severity == WARNING),
+            "repaired": sum(1 for i in self.issues if i.repaired),
+        }
+
+
+def validate_predictions(document: Dict, repair: bool = True) -> ValidationReport:
+    """Validate a whole Claude response: top-level schema, decision and every schedina"""
+    issues: List[Issue] = []
+    document = dict(document)
+
+    decision = document.get("decision")
+    if decision not in MODE_RULES:
+        issues.append(Issue(ERROR, "decision", f"unknown decision {decision!r}"))
+        decision = "SALTARE"
+    if not isinstance(document.get("analysis"), dict):
+        issues.append(Issue(WARNING, "schema", "missing analysis object"))
+
+    schedine = document.get("schedine") or {}
+    if not isinstance(schedine, dict):
+        issues.append(Issue(ERROR, "schema", "schedine is not an object", repaired=repair))
+        schedine = {}
+
+    if decision == "SALTARE" and schedine:
+        issues.append(Issue(WARNING, "decision", "SALTARE with schedine attached", repaired=repair))
+        schedine = {} if repair else schedine
+
+    for key in MODE_RULES[decision]["legs"]:
+        if key not in schedine:
+            issues.append(Issue(WARNING, "missing_slip", f"{key} missing for {decision}", key))
+
+    index = SelectionIndex()
+    validated = {}
+    for key, schedina in schedine.items():
+        fixed, slip_issues = validate_schedina(key, schedina, decision, index, repair)
+        issues.extend(slip_issues)
+        if not repair or is_sendable(slip_issues):
+            validated[key] = fixed
+
+    if repair:
+        document["schedine"] = validated
+    return ValidationReport(document, issues)
+
+
+def print_issues(issues: List[Issue], limit: int = 10):
+    for issue in issues[:limit]:
+        icon = "🔧" if issue.repaired else "❌" if issue.severity == ERROR else "⚠️"
+        where = f"{issue.slip}" + (f"#{issue.leg + 1}" if issue.leg is not None else "") if issue.slip else "document"
+        print(f"   {icon} [{issue.code}] {where}: {issue.message}")
+    if len(issues) > limit:
+        print(f"   ... and {len(issues) - limit} more")
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="Validate Claude schedine")
+    parser.add_argument("path", nargs="?", default="src/data/predictions.json")
+    parser.add_argument("--json", action="store_true", help="Print issues as JSON")
+    args = parser.parse_args()
+
+    with open(args.path, 'r', encoding='utf-8') as f:
+        report = validate_predictions(json.load(f), repair=False)
+
+    if args.json:
+        print(json.dumps([asdict(i) for i in report.issues], indent=2, ensure_ascii=False))
+    else:
+        print_issues(report.issues, limit=len(report.issues))
+        print(f"\n🔎 {report.summary()}")
+
+
+if __name__ == "__main__":
+    main()
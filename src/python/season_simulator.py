@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+BetWise Season Simulator - Proiezione Monte Carlo della classifica
+Simula il resto della stagione molte volte partendo dalle TeamStats attuali
+e calcola probabilità di titolo, top 4, retrocessione e distribuzione punti.
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from predictor import CONFIG, TeamStats, build_team_stats, expected_goals, fetch_historical_data, poisson_prob
+
+# Simulation configuration
+SIM_CONFIG = {
+    "simulations": 10000,
+    "batch_size": 2000,
+    "max_goals": 10,
+    "title_spots": 1,
+    "top_spots": 4,
+    "relegation_spots": {"D1": 2, "N1": 2, "P1": 2, "B1": 2},  # Default: 3
+    "output_path": "src/data/season_projections.json",
+}
+
+StrengthFn = Callable[[str, str], Tuple[float, float]]
+
+
+@dataclass
+class TeamProjection:
+    """Projected end-of-season outcome for one team"""
+    team: str
+    current_points: int
+    expected_points: float
+    title: float
+    top4: float
+    relegation: float
+    points_p10: int
+    points_p50: int
+    points_p90: int
+    points_distribution: Dict[int, float]
+
+
+def current_points(team: TeamStats) -> int:
+    """Points already banked (3 per win, 1 per draw)"""
+    return team.wins * 3 + team.draws
+
+
+def remaining_fixtures(matches: List[Dict], team_stats: Dict[str, TeamStats]) -> List[Tuple[str, str]]:
+    """Double round-robin fixtures not yet played, derived from the results list"""
+    played = set()
+    for match in matches:
+        home = match.get('HomeTeam', '')
+        away = match.get('AwayTeam', '')
+        if home and away and match.get('FTHG', '') != '':
+            played.add((home, away))
+
+    teams = sorted(team_stats)
+    return [(home, away) for home in teams for away in teams
+            if home != away and (home, away) not in played]
+
+
+def _scoreline_table(lambda_home: float, lambda_away: float, max_goals: int) -> Tuple[List[float], List[Tuple[int, int]]]:
+    """Cumulative weights and scorelines for a fixture, used for batched sampling"""
+    home_pmf = [poisson_prob(k, lambda_home) for k in range(max_goals + 1)]
+    away_pmf = [poisson_prob(k, lambda_away) for k in range(max_goals + 1)]
+
+    cum_weights = []
+    scores = []
+    total = 0.0
+    for h, p_h in enumerate(home_pmf):
+        for a, p_a in enumerate(away_pmf):
+            total += p_h * p_a
+            cum_weights.append(total)
+            scores.append((h, a))
+
+    return cum_weights, scores
+
+
+def simulate_season(team_stats: Dict[str, TeamStats], fixtures: List[Tuple[str, str]],
+                    simulations: int = None, strength_fn: Optional[StrengthFn] = None,
+                    relegation_spots: int = 3, seed: Optional[int] = None) -> Dict:
+    """
+    Simulate the remaining fixtures `simulations` times.
+
+    Scorelines are drawn in batches per fixture from a precomputed cumulative
+    Poisson table, so the inner loop only accumulates points and goal difference.
+    `strength_fn(home, away)` can replace the default TeamStats lambdas
+    (e.g. with fitted ratings).
+    """
+    simulations = simulations or SIM_CONFIG["simulations"]
+    batch_size = SIM_CONFIG["batch_size"]
+    max_goals = SIM_CONFIG["max_goals"]
+    rng = random.Random(seed)
+
+    if strength_fn is None:
+        def strength_fn(home: str, away: str) -> Tuple[float, float]:
+            return expected_goals(team_stats[home], team_stats[away])
+
+    teams = sorted(team_stats)
+    index = {name: i for i, name in enumerate(teams)}
+    n_teams = len(teams)
+    base_points = [current_points(team_stats[t]) for t in teams]
+    base_gd = [team_stats[t].goals_for - team_stats[t].goals_against for t in teams]
+
+    # Precompute per-fixture outcome tables once
+    tables = []
+    for home, away in fixtures:
+        if home not in index or away not in index:
+            continue
+        cum_weights, scores = _scoreline_table(*strength_fn(home, away), max_goals)
+        outcome_ids = range(len(scores))
+        home_pts = [3 if h > a else 1 if h == a else 0 for h, a in scores]
+        away_pts = [3 if a > h else 1 if h == a else 0 for h, a in scores]
+        diffs = [h - a for h, a in scores]
+        tables.append((index[home], index[away], cum_weights, outcome_ids, home_pts, away_pts, diffs))
+
+    title_count = [0] * n_teams
+    top_count = [0] * n_teams
+    releg_count = [0] * n_teams
+    points_hist = [dict() for _ in range(n_teams)]
+    title_spots = SIM_CONFIG["title_spots"]
+    top_spots = SIM_CONFIG["top_spots"]
+
+    done = 0
+    while done < simulations:
+        size = min(batch_size, simulations - done)
+        points = [[base_points[t]] * size for t in range(n_teams)]
+        gd = [[base_gd[t]] * size for t in range(n_teams)]
+
+        for h_idx, a_idx, cum_weights, outcome_ids, home_pts, away_pts, diffs in tables:
+            outcomes = rng.choices(outcome_ids, cum_weights=cum_weights, k=size)
+            h_points, a_points = points[h_idx], points[a_idx]
+            h_gd, a_gd = gd[h_idx], gd[a_idx]
+            for s, o in enumerate(outcomes):
+                h_points[s] += home_pts[o]
+                a_points[s] += away_pts[o]
+                h_gd[s] += diffs[o]
+                a_gd[s] -= diffs[o]
+
+        for s in range(size):
+            # Random final key breaks exact ties fairly
+            table = sorted(range(n_teams),
+                           key=lambda t: (points[t][s], gd[t][s], rng.random()),
+                           reverse=True)
+            for pos, t in enumerate(table):
+                if pos < title_spots:
+                    title_count[t] += 1
+                if pos < top_spots:
+                    top_count[t] += 1
+                if pos >= n_teams - relegation_spots:
+                    releg_count[t] += 1
+                pts = points[t][s]
+                points_hist[t][pts] = points_hist[t].get(pts, 0) + 1
+
+        done += size
+
+    projections = []
+    for t, name in enumerate(teams):
+        hist = points_hist[t]
+        projections.append(TeamProjection(
+            team=name,
+            current_points=base_points[t],
+            expected_points=round(sum(p * c for p, c in hist.items()) / simulations, 2),
+            title=round(title_count[t] / simulations * 100, 2),
+            top4=round(top_count[t] / simulations * 100, 2),
+            relegation=round(releg_count[t] / simulations * 100, 2),
+            points_p10=_percentile(hist, simulations, 0.10),
+            points_p50=_percentile(hist, simulations, 0.50),
+            points_p90=_percentile(hist, simulations, 0.90),
+            points_distribution={p: round(c / simulations, 4) for p, c in sorted(hist.items())}
+        ))
+
+    projections.sort(key=lambda p: p.expected_points, reverse=True)
+
+    return {
+        "simulations": simulations,
+        "remaining_fixtures": len(tables),
+        "teams": [asdict(p) for p in projections],
+    }
+
+
+def _percentile(hist: Dict[int, int], total: int, q: float) -> int:
+    """Percentile of an integer histogram"""
+    target = q * total
+    running = 0
+    for value in sorted(hist):
+        running += hist[value]
+        if running >= target:
+            return value
+    return max(hist) if hist else 0
+
+
+def simulate_league(league_code: str, simulations: int, season: str = "2425",
+                    seed: Optional[int] = None) -> Optional[Dict]:
+    """Fetch, build stats and simulate a single league (process-pool worker)"""
+    matches_data = fetch_historical_data(league_code, season)
+    if not matches_data:
+        return None
+
+    team_stats = build_team_stats(matches_data)
+    fixtures = remaining_fixtures(matches_data, team_stats)
+    relegation_spots = SIM_CONFIG["relegation_spots"].get(league_code, 3)
+
+    start = time.perf_counter()
+    result = simulate_season(team_stats, fixtures, simulations,
+                             relegation_spots=relegation_spots, seed=seed)
+    elapsed = time.perf_counter() - start
+
+    result["league"] = CONFIG["leagues"][league_code]["code"]
+    result["league_name"] = CONFIG["leagues"][league_code]["name"]
+    result["elapsed_seconds"] = round(elapsed, 3)
+    result["seasons_per_second"] = round(simulations / max(elapsed, 1e-9), 1)
+    return result
+
+
+def simulate_leagues(league_codes: List[str], simulations: int, workers: Optional[int] = None,
+                     season: str = "2425", seed: Optional[int] = None) -> Dict:
+    """Fan out league simulations across a process pool"""
+    start = time.perf_counter()
+    results = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {code: pool.submit(simulate_league, code, simulations, season, seed)
+                   for code in league_codes}
+        for code, future in futures.items():
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Error simulating {code}: {e}")
+                continue
+            if result:
+                results[code] = result
+
+    elapsed = time.perf_counter() - start
+    total_seasons = simulations * len(results)
+
+    return {
+        "generated_at": datetime.now().isoformat(),
+        "leagues": results,
+        "throughput": {
+            "seasons": total_seasons,
+            "elapsed_seconds": round(elapsed, 3),
+            "seasons_per_second": round(total_seasons / max(elapsed, 1e-9), 1),
+        }
+    }
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="BetWise Monte Carlo season projections")
+    parser.add_argument("--leagues", nargs="*", default=list(CONFIG["leagues"]))
+    parser.add_argument("--sims", type=int, default=SIM_CONFIG["simulations"])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--season", default="2425")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    print("🎲 BetWise Season Simulator - Starting...")
+    output = simulate_leagues(args.leagues, args.sims, args.workers, args.season, args.seed)
+
+    for league in output["leagues"].values():
+        leader = league["teams"][0] if league["teams"] else None
+        print(f"   🏆 {league['league_name']}: {league['seasons_per_second']} seasons/s"
+              + (f" - favorite {leader['team']} ({leader['title']}%)" if leader else ""))
+
+    throughput = output["throughput"]
+    print(f"\n⚡ {throughput['seasons']} seasons in {throughput['elapsed_seconds']}s "
+          f"({throughput['seasons_per_second']} seasons/s)")
+
+    output_path = SIM_CONFIG["output_path"]
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(output, f, indent=2, ensure_ascii=False)
+
+    print(f"✅ Projections saved to {output_path}")
+    return output
+
+
+if __name__ == "__main__":
+    main()
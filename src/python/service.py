@@ -0,0 +1,438 @@
+#!/usr/bin/env python3
+"""
+BetWise Service - Modalità demone con modelli sempre caricati
+Tiene in memoria statistiche squadra, fixture, blender e calibratori di ogni
+lega (caricati tramite la cache della pipeline) ed espone un'API HTTP locale:
+previsione di una partita e costruzione di una schedina con vincoli, per le
+richieste ad-hoc della dashboard (custom builder di app.js). Le previsioni
+sono memorizzate per versione delle statistiche; il refresh periodico
+sostituisce i modelli solo quando i dati sono cambiati.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+from predictor import (CONFIG, MARKET_ODDS_KEYS, TeamStats, drifting_out, market_selections,
+                       predict_fixture, prediction_fields)
+from team_names import league_code, normalize_team_name
+
+# Service configuration
+SERVICE_CONFIG = {
+    "host": "127.0.0.1",
+    "port": int(os.environ.get("BETWISE_SERVICE_PORT", "8765")),
+    "refresh": 3600,  # Seconds between data refreshes (0 = never)
+    "memo_size": 4096,  # Memoized predictions
+    "max_legs": 15,
+    "default_legs": 4,
+    # Browser origins allowed to call the API: the published dashboard and a local copy;
+    # requests from any other page are refused, requests without an Origin (scripts) pass
+    "allow_origins": tuple(o.strip() for o in os.environ.get(
+        "BETWISE_SERVICE_ORIGINS", "https://erold90.github.io,http://localhost:8000,http://127.0.0.1:8000"
+    ).split(",") if o.strip()),
+}
+
+
+class ServiceError(Exception):
+    """Request error reported to the client with an HTTP status"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass
+class LeagueModel:
+    """Resident model of one league"""
+    code: str
+    team_stats: Dict[str, TeamStats]
+    fixtures: List[Tuple[str, str]]
+    version: str
+    blend: Optional[Callable] = None
+    calibrators: Optional[Dict] = None
+    names: Dict[str, str] = field(default_factory=dict)  # Normalized name -> team
+
+    def __post_init__(self):
+        self.names = {normalize_team_name(team): team for team in self.team_stats}
+
+    def team(self, name: str) -> str:
+        if name in self.team_stats:
+            return name
+        team = self.names.get(normalize_team_name(name))
+        if team is None:
+            raise ServiceError(404, f"unknown team {name!r} in {self.code}")
+        return team
+
+
+class PredictionService:
+    """Warm models plus memoized predictions, shared by the server threads"""
+
+    def __init__(self, leagues: List[str] = None, season: str = None):
+        self.leagues = list(leagues or CONFIG["leagues"])
+        self.season = season
+        self.models: Dict[str, LeagueModel] = {}
+        self.movements = None  # odds_store.OddsMovements, refreshed with the models
+        self.memo: "OrderedDict[tuple, Dict]" = OrderedDict()
+        self.memo_hits = 0
+        self.memo_misses = 0
+        self.loaded_at: Optional[float] = None
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def load(self, force: List[str] = ()) -> Dict[str, str]:
+        """
+        (Re)load every league through the pipeline cache and swap in the models
+        whose version changed. Returns the league versions.
+        """
+        # Imported here: the pipeline, ensemble and evaluation modules are only needed to (re)load
+        from ensemble import ENSEMBLE_CONFIG, league_blender
+        from elo_ratings import ELO_CONFIG
+        from evaluation import EVAL_CONFIG, league_calibrator
+        from odds_store import ODDS_CONFIG, load_movements
+        from pipeline import build_pipeline, file_digest
+
+        with self._load_lock:
+            pipeline = build_pipeline(self.leagues, self.season)
+            values, report = pipeline.run([f"fixtures:{code}" for code in self.leagues], force=force)
+            digests = {run.stage: run.digest for run in report}
+            files = "".join(file_digest(path) for path in (ENSEMBLE_CONFIG["weights_path"],
+                                                           EVAL_CONFIG["calibration_path"],
+                                                           ELO_CONFIG["ratings_path"],
+                                                           os.path.join(ODDS_CONFIG["dir"], "odds.log")))
+            self.movements = load_movements()
+
+            models = dict(self.models)
+            for code in self.leagues:
+                team_stats = values[f"team_stats:{code}"]
+                if not team_stats:
+                    print(f"⚠️ No data available for {CONFIG['leagues'][code]['name']}")
+                    continue
+                version = hashlib.sha256((digests[f"team_stats:{code}"] + files).encode('ascii')).hexdigest()[:12]
+                if code in models and models[code].version == version:
+                    continue
+                blend = league_blender(code)
+                models[code] = LeagueModel(code, team_stats, values[f"fixtures:{code}"], version, blend,
+                                           league_calibrator(code, "ensemble" if blend else "poisson"))
+                print(f"📊 {CONFIG['leagues'][code]['name']}: {len(team_stats)} teams, version {version}")
+
+            self.models = models  # Swapped in one assignment: readers see the old or the new set
+            self.loaded_at = time.time()
+            return {code: model.version for code, model in models.items()}
+
+    def model(self, league: str) -> LeagueModel:
+        code = league_code(league or "")
+        if code is None:
+            raise ServiceError(400, f"unknown league {league!r}")
+        model = self.models.get(code)
+        if model is None:
+            raise ServiceError(404, f"no data loaded for {code}")
+        return model
+
+    def _predict(self, model: LeagueModel, home: str, away: str) -> Tuple[Dict, bool]:
+        key = (model.code, model.version, home, away)
+        with self._lock:
+            if key in self.memo:
+                self.memo.move_to_end(key)
+                self.memo_hits += 1
+                return self.memo[key], True
+
+        movements = self.movements
+        movement = movements.get(model.code, home, away) if movements else {}
+        prediction, odds, value_bets, confidence = predict_fixture(
+            model.team_stats[home], model.team_stats[away], model.blend, model.calibrators, movement)
+        info = CONFIG["leagues"][model.code]
+        result = {
+            "league": info["code"],
+            "league_name": info["name"],
+            "league_flag": info["flag"],
+            "home_team": home,
+            "away_team": away,
+            "version": model.version,
+            "prediction": prediction_fields(prediction),
+            "odds": odds,
+            "value_bets": [asdict(vb) for vb in value_bets],
+            "confidence": confidence,
+            "odds_movement": {market: asdict(move) for market, move in movement.items()},
+            "movement": movement,
+            "selections": [(market, prob, market_odds)
+                           for market, prob, market_odds in market_selections(prediction, odds)],
+        }
+
+        with self._lock:
+            self.memo_misses += 1
+            self.memo[key] = result
+            while len(self.memo) > SERVICE_CONFIG["memo_size"]:
+                self.memo.popitem(last=False)
+        return result, False
+
+    def predict(self, league: str, home: str, away: str) -> Dict:
+        """Prediction of home vs away in a league"""
+        model = self.model(league)
+        home, away = model.team(home), model.team(away)
+        if home == away:
+            raise ServiceError(400, "home and away are the same team")
+        result, cached = self._predict(model, home, away)
+        return dict({k: v for k, v in result.items() if k not in ("selections", "movement")}, cached=cached)
+
+    def build_schedina(self, constraints: Dict) -> Dict:
+        """
+        Schedina under constraints: legs, leagues, markets, min_probability (%),
+        min_odds/max_odds per leg, max_total_odds, value_only, stake and an
+        optional list of fixtures ({"league", "home", "away"}; default: the
+        weekend fixtures of the chosen leagues). One leg per match, no team twice;
+        markets whose odds drifted out (odds_store) are left out.
+        """
+        try:
+            legs = int(constraints.get("legs", SERVICE_CONFIG["default_legs"]))
+            min_probability = float(constraints.get("min_probability", 0)) / 100
+            min_odds = float(constraints.get("min_odds", 1.0))
+            max_odds = float(constraints.get("max_odds", 100.0))
+            max_total_odds = float(constraints.get("max_total_odds", 0)) or None
+            stake = float(constraints.get("stake", 1))
+        except (TypeError, ValueError) as e:
+            raise ServiceError(400, f"invalid constraint: {e}")
+        if not 1 <= legs <= SERVICE_CONFIG["max_legs"]:
+            raise ServiceError(400, f"legs must be between 1 and {SERVICE_CONFIG['max_legs']}")
+        value_only = bool(constraints.get("value_only", False))
+        markets = set(_string_list(constraints, "markets"))
+        known_markets = {"1", "X", "2", "Over 2.5", "Under 2.5", "Over 1.5", "BTTS Si", "BTTS No", "DC 1X", "DC X2"}
+        if markets - known_markets:
+            raise ServiceError(400, f"unknown markets: {', '.join(sorted(markets - known_markets))}")
+
+        if constraints.get("fixtures"):
+            items = constraints["fixtures"]
+            if not isinstance(items, list) or not all(
+                    isinstance(item, dict) and all(isinstance(item.get(k, ""), str) for k in ("league", "home", "away"))
+                    for item in items):
+                raise ServiceError(400, "fixtures must be a list of {league, home, away} objects")
+            fixtures = []
+            for item in items:
+                model = self.model(item.get("league"))
+                home, away = model.team(item.get("home", "")), model.team(item.get("away", ""))
+                if home == away:
+                    raise ServiceError(400, f"home and away are the same team in fixture {home} vs {away}")
+                fixtures.append((model, home, away))
+        else:
+            models = ([self.model(league) for league in _string_list(constraints, "leagues")]
+                      if constraints.get("leagues")
+                      else list(self.models.values()))
+            fixtures = [(model, home, away) for model in models for home, away in model.fixtures
+                        if home in model.team_stats and away in model.team_stats]
+
+        # Best admissible selection of each match
+        candidates = []
+        for model, home, away in fixtures:
+            result, _ = self._predict(model, home, away)
+            best = None
+            for market, prob, market_odds in result["selections"]:
+                edge = prob * market_odds - 1
+                if (markets and market not in markets) or prob < min_probability \
+                        or not min_odds <= market_odds <= max_odds \
+                        or (value_only and edge <= CONFIG["min_value_edge"]) \
+                        or drifting_out(result["movement"], MARKET_ODDS_KEYS[market]):
+                    continue
+                rank = (-edge, -prob) if value_only else (-prob, -edge)
+                if best is None or rank < best[0]:
+                    best = (rank, market, prob, market_odds, edge)
+            if best:
+                candidates.append((best, result))
+
+        selections, used_teams, total_odds, win_prob = [], set(), 1.0, 1.0
+        for (rank, market, prob, market_odds, edge), result in sorted(candidates, key=lambda c: c[0][0]):
+            if len(selections) >= legs:
+                break
+            if result["home_team"] in used_teams or result["away_team"] in used_teams:
+                continue
+            if max_total_odds and total_odds * market_odds > max_total_odds:
+                continue
+            selections.append({
+                "match": f"{result['home_team']} vs {result['away_team']}",
+                "league": result["league_name"],
+                "flag": result["league_flag"],
+                "selection": market,
+                "odds": market_odds,
+                "probability": round(prob * 100),
+                "edge": round(edge * 100),
+            })
+            used_teams.update((result["home_team"], result["away_team"]))
+            total_odds *= market_odds
+            win_prob *= prob
+
+        return {
+            "selections": selections,
+            "totalOdds": str(round(total_odds, 2)),
+            "stake": stake,
+            "winRate": round(win_prob * 100, 1) if selections else 0,
+            "complete": len(selections) == legs,
+        }
+
+    def status(self) -> Dict:
+        with self._lock:
+            memo = {"size": len(self.memo), "hits": self.memo_hits, "misses": self.memo_misses}
+        return {
+            "uptime_s": round(time.time() - self.started_at),
+            "loaded_at": self.loaded_at,
+            "leagues": {code: {"version": m.version, "teams": len(m.team_stats), "fixtures": len(m.fixtures)}
+                        for code, m in self.models.items()},
+            "memo": memo,
+        }
+
+    def teams(self, league: str) -> Dict:
+        model = self.model(league)
+        return {"league": model.code, "version": model.version, "teams": sorted(model.team_stats),
+                "fixtures": [list(fixture) for fixture in model.fixtures]}
+
+
+def _string_list(constraints: Dict, key: str) -> List[str]:
+    value = constraints.get(key) or []
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise ServiceError(400, f"{key} must be a list of strings")
+    return value
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    """JSON API: GET /health, /teams, /predict; POST /schedina, /reload"""
+
+    service: PredictionService = None  # Set by make_server
+
+    def _send(self, status: int, payload: Dict):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self._cors_headers()
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _cors_headers(self):
+        origin = self.headers.get("Origin")
+        if origin in SERVICE_CONFIG["allow_origins"]:
+            self.send_header("Access-Control-Allow-Origin", origin)
+        self.send_header("Vary", "Origin")
+
+    def _refused(self) -> bool:
+        """Refuse browser requests from other pages: a POST /reload needs no preflight to run"""
+        origin = self.headers.get("Origin")
+        if origin is None or origin in SERVICE_CONFIG["allow_origins"]:
+            return False
+        self._send(403, {"error": f"origin {origin} not allowed"})
+        return True
+
+    def _dispatch(self, handler: Callable[[], Dict]):
+        try:
+            self._send(200, handler())
+        except ServiceError as e:
+            self._send(e.status, {"error": str(e)})
+        except Exception as e:
+            print(f"❌ {self.command} {self.path}: {e}")
+            self._send(500, {"error": "internal error"})
+
+    def do_OPTIONS(self):
+        if self._refused():
+            return
+        self.send_response(204)
+        self._cors_headers()
+        self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        # The published dashboard is a public site calling a loopback address
+        self.send_header("Access-Control-Allow-Private-Network", "true")
+        self.end_headers()
+
+    def do_GET(self):
+        if self._refused():
+            return
+        url = urllib.parse.urlsplit(self.path)
+        query = {k: v[0] for k, v in urllib.parse.parse_qs(url.query).items()}
+        routes = {
+            "/health": lambda: self.service.status(),
+            "/teams": lambda: self.service.teams(query.get("league", "")),
+            "/predict": lambda: self.service.predict(query.get("league", ""), query.get("home", ""),
+                                                     query.get("away", "")),
+        }
+        if url.path not in routes:
+            return self._send(404, {"error": f"no route {url.path}"})
+        self._dispatch(routes[url.path])
+
+    def do_POST(self):
+        if self._refused():
+            return
+        path = urllib.parse.urlsplit(self.path).path
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(body, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as e:
+            return self._send(400, {"error": f"invalid JSON body: {e}"})
+
+        routes = {
+            "/schedina": lambda: self.service.build_schedina(body),
+            "/reload": lambda: {"versions": self.service.load(force=["fetch"] if body.get("fetch") else [])},
+        }
+        if path not in routes:
+            return self._send(404, {"error": f"no route {path}"})
+        self._dispatch(routes[path])
+
+    def log_message(self, format, *args):
+        pass  # One line per request would drown the refresh messages
+
+
+def make_server(service: PredictionService, host: str = None, port: int = None) -> ThreadingHTTPServer:
+    handler = type("BoundServiceHandler", (ServiceHandler,), {"service": service})
+    server = ThreadingHTTPServer((host or SERVICE_CONFIG["host"], port or SERVICE_CONFIG["port"]), handler)
+    server.daemon_threads = True
+    return server
+
+
+def refresh_loop(service: PredictionService, interval: float, stop: threading.Event):
+    """Reload the data every `interval` seconds; the fetch TTL decides what is downloaded again"""
+    while not stop.wait(interval):
+        try:
+            service.load()
+        except Exception as e:
+            print(f"❌ Refresh failed: {e}")
+
+
+def main():
+    """Main execution"""
+    parser = argparse.ArgumentParser(description="BetWise prediction service (local HTTP API)")
+    parser.add_argument("--host", default=SERVICE_CONFIG["host"])
+    parser.add_argument("--port", type=int, default=SERVICE_CONFIG["port"])
+    parser.add_argument("--leagues", nargs="*", default=list(CONFIG["leagues"]))
+    parser.add_argument("--season", default=None)
+    parser.add_argument("--refresh", type=float, default=SERVICE_CONFIG["refresh"],
+                        help="Seconds between data refreshes (0 = never)")
+    args = parser.parse_args()
+
+    print("🎯 BetWise Service - Loading models...")
+    service = PredictionService(args.leagues, args.season)
+    started = time.perf_counter()
+    service.load()
+    print(f"✅ {len(service.models)} leagues loaded in {time.perf_counter() - started:.2f}s")
+
+    stop = threading.Event()
+    if args.refresh > 0:
+        threading.Thread(target=refresh_loop, args=(service, args.refresh, stop), daemon=True).start()
+
+    server = make_server(service, args.host, args.port)
+    print(f"🌐 Listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Shutting down")
+    finally:
+        stop.set()
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
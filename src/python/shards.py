@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+BetWise Shards - Output della dashboard suddiviso e precompresso
+Scrive un piccolo summary, una shard per vista (schedine, stats, aggregati
+precalcolati) e una per lega con le partite già ordinate, in JSON compatto
+con versione .gz (e .br se brotli è installato), più un manifest con gli
+hash di contenuto. Le shard invariate mantengono hash e file, così Pages e
+cache del browser restano calde.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict
+
+from dashboard_aggregates import build_aggregates
+from output_writer import write_bytes_atomic, write_json_atomic
+
+try:
+    import brotli  # Optional: pip install brotli
+except ImportError:
+    brotli = None
+
+# Shards configuration
+SHARDS_CONFIG = {
+    "output_dir": "src/data/shards",
+    "manifest": "manifest.json",
+}
+
+
+def compact_json(data) -> bytes:
+    """Canonical compact serialization: stable bytes for identical content"""
+    return json.dumps(data, separators=(",", ":"), sort_keys=True, ensure_ascii=False).encode("utf-8")
+
+
+def build_shards(output: Dict) -> Dict[str, object]:
+    """Split a predictions document into summary, per-view and per-league shards"""
+    aggregates = build_aggregates(output)
+    by_league = aggregates.pop("matches")
+
+    summary = {k: v for k, v in output.items() if k not in ("matches", "schedine", "generated_at")}
+    summary["leagues"] = {code: len(items) for code, items in sorted(by_league.items())}
+
+    shards = {
+        "summary": summary,
+        "schedine": output.get("schedine", {}),
+        "stats": output.get("stats", {}),
+        "aggregates": aggregates,
+    }
+    for code, items in by_league.items():
+        shards[f"matches-{code}"] = items
+
+    return shards
+
+
+def write_shards(output: Dict, output_dir: str = None) -> Dict:
+    """
+    Write every shard plus precompressed variants and the manifest.
+
+    Files are only rewritten when their bytes change and shards no longer
+    produced are removed. Returns the manifest.
+    """
+    output_dir = output_dir or SHARDS_CONFIG["output_dir"]
+    os.makedirs(output_dir, exist_ok=True)
+
+    manifest_shards = {}
+    written = 0
+    for name, data in build_shards(output).items():
+        payload = compact_json(data)
+        filename = f"{name}.json"
+        path = os.path.join(output_dir, filename)
+
+        entry = {
+            "file": filename,
+            "hash": hashlib.sha256(payload).hexdigest()[:16],
+            "bytes": len(payload),
+        }
+
+        if write_bytes_atomic(path, payload):
+            written += 1
+        # mtime=0 keeps the gzip bytes identical for identical content
+        gz_payload = gzip.compress(payload, compresslevel=9, mtime=0)
+        write_bytes_atomic(path + ".gz", gz_payload)
+        entry["gz_bytes"] = len(gz_payload)
+
+        if brotli is not None:
+            br_payload = brotli.compress(payload, quality=11)
+            write_bytes_atomic(path + ".br", br_payload)
+            entry["br_bytes"] = len(br_payload)
+
+        manifest_shards[name] = entry
+
+    # Drop shards from leagues that are no longer present
+    current = {entry["file"] for entry in manifest_shards.values()}
+    for filename in os.listdir(output_dir):
+        base = filename[:-3] if filename.endswith((".gz", ".br")) else filename
+        if base.endswith(".json") and base != SHARDS_CONFIG["manifest"] and base not in current:
+            os.remove(os.path.join(output_dir, filename))
+
+    manifest = {
+        "generated_at": output.get("generated_at", datetime.now().isoformat()),
+        "shards": manifest_shards,
+    }
+    write_json_atomic(os.path.join(output_dir, SHARDS_CONFIG["manifest"]), manifest)
+
+    print(f"🧩 {len(manifest_shards)} shards ({written} changed) written to {output_dir}")
+    return manifest
@@ -0,0 +1,184 @@
+"""
+BetWise Subscribers - Invio delle previsioni a una lista di chat Telegram
+Ogni iscritto ha un filtro di leghe: ogni variante del messaggio viene
+generata e impacchettata una sola volta per insieme di leghe, poi inviata
+in parallelo (con un limite di worker) sotto il rate limit globale del
+client condiviso, con un riepilogo di throughput ed errori per chat.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional
+
+from message_packer import pack_messages
+from outbox import send_once
+from team_names import league_code
+
+# Subscribers configuration
+SUBSCRIBERS_CONFIG = {
+    # JSON list of {"chat_id": ..., "leagues": ["Serie A", "E0", ...]} (no "leagues" = all),
+    # inline in TELEGRAM_SUBSCRIBERS or in the file named by TELEGRAM_SUBSCRIBERS_FILE
+    "env_inline": "TELEGRAM_SUBSCRIBERS",
+    "env_file": "TELEGRAM_SUBSCRIBERS_FILE",
+    "max_workers": 8,
+}
+
+LeagueFilter = Optional[FrozenSet[str]]
+
+
+@dataclass
+class Subscriber:
+    """A chat and the league codes it follows (None = every league)"""
+    chat_id: str
+    leagues: LeagueFilter = None
+
+
+def parse_subscribers(entries: Iterable[Dict]) -> List[Subscriber]:
+    """Subscribers from config entries, league names/codes normalized to football-data codes"""
+    subscribers = []
+    for entry in entries:
+        chat_id = str(entry.get("chat_id", "")).strip()
+        if not chat_id:
+            continue
+        leagues = None
+        if entry.get("leagues"):
+            codes = set()
+            for name in entry["leagues"]:
+                code = league_code(name)
+                if code:
+                    codes.add(code)
+                else:
+                    print(f"⚠️ Unknown league {name!r} for chat {chat_id}")
+            if not codes:
+                print(f"⚠️ No known league for chat {chat_id} - skipped")
+                continue
+            leagues = frozenset(codes)
+        subscribers.append(Subscriber(chat_id, leagues))
+    return subscribers
+
+
+def load_subscribers() -> List[Subscriber]:
+    """Subscriber list from the environment (empty when none is configured)"""
+    inline = os.environ.get(SUBSCRIBERS_CONFIG["env_inline"])
+    path = os.environ.get(SUBSCRIBERS_CONFIG["env_file"])
+    try:
+        if inline:
+            return parse_subscribers(json.loads(inline))
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return parse_subscribers(json.load(f))
+    except (ValueError, TypeError) as e:
+        print(f"Error loading subscribers: {e}")
+    return []
+
+
+def _league_of(item: Dict) -> Optional[str]:
+    return (league_code(item.get("league", "")) or league_code(item.get("league_name", ""))
+            or league_code(item.get("leagueName", "")))
+
+
+def _in_filter(item: Dict, leagues: LeagueFilter) -> bool:
+    code = _league_of(item)
+    return code is None or code in leagues  # Items without a recognizable league are kept
+
+
+def filter_predictions(predictions: Dict, leagues: LeagueFilter) -> Dict:
+    """
+    Predictions restricted to `leagues`: matches and value bets outside them are dropped,
+    a schedina is kept if any of its selections is in a followed league
+    (accumulators are sent whole, never resized per subscriber) and the
+    stats are recounted over the followed leagues.
+    """
+    if leagues is None:
+        return predictions
+
+    filtered = dict(predictions)
+    for field in ("matches", "value_bets"):
+        if field in predictions:
+            filtered[field] = [item for item in predictions[field] if _in_filter(item, leagues)]
+    filtered["schedine"] = {
+        key: schedina for key, schedina in (predictions.get("schedine") or {}).items()
+        if isinstance(schedina, dict)
+        and any(_in_filter(sel, leagues) for sel in schedina.get("selections", []))
+    }
+    if "stats" in predictions:
+        filtered["stats"] = _filtered_stats(predictions, filtered, leagues)
+    return filtered
+
+
+def _filtered_stats(predictions: Dict, filtered: Dict, leagues: FrozenSet[str]) -> Dict:
+    """Stats of the followed leagues, from the matches or the streamed per-league counts"""
+    stats = dict(predictions["stats"], leagues_processed=len(leagues))
+    if "matches" in predictions:
+        stats["total_matches"] = len(filtered["matches"])
+        stats["value_bets_found"] = sum(len(m.get("value_bets", m.get("valueBets", [])))
+                                        for m in filtered["matches"])
+    elif "league_stats" in predictions:
+        followed = [counts for league, counts in predictions["league_stats"].items()
+                    if _in_filter({"league": league}, leagues)]
+        stats["total_matches"] = sum(c["matches"] for c in followed)
+        stats["value_bets_found"] = sum(c["value_bets"] for c in followed)
+    return stats
+
+
+def notify_subscribers(bot_token: str, predictions: Dict, render: Callable[[Dict], List[str]],
+                       subscribers: List[Subscriber] = None, exclude: Iterable[str] = ()) -> Dict:
+    """
+    Send each subscriber its variant of `predictions`.
+
+    `render` turns a (filtered) predictions document into message blocks; it
+    runs, and the result is packed, once per distinct league filter. Chats are
+    served concurrently by up to max_workers threads sharing the client's
+    global rate limit, each chat's messages in order, through the outbox so
+    a rerun skips what was already delivered. Returns the report.
+    """
+    subscribers = load_subscribers() if subscribers is None else subscribers
+    excluded = {str(chat) for chat in exclude}
+    subscribers = [s for s in subscribers if s.chat_id not in excluded]
+    if not subscribers:
+        return {}
+
+    variants: Dict[LeagueFilter, List[str]] = {}
+    for subscriber in subscribers:
+        if subscriber.leagues not in variants:
+            variants[subscriber.leagues] = pack_messages(render(filter_predictions(predictions, subscriber.leagues)))
+
+    weekend = predictions.get("weekend", "")
+    print(f"📣 Notifying {len(subscribers)} subscribers ({len(variants)} variants)...")
+    started = time.monotonic()
+
+    def deliver(subscriber: Subscriber) -> Dict:
+        results = send_once(bot_token, subscriber.chat_id, weekend, variants[subscriber.leagues])
+        return {
+            "chat_id": subscriber.chat_id,
+            "sent": sum(1 for r in results if r.ok and r.attempts),
+            "skipped": sum(1 for r in results if r.ok and not r.attempts),  # Delivered by an earlier run
+            "failed": sum(1 for r in results if not r.ok),
+            "errors": sorted({r.error for r in results if not r.ok}),
+        }
+
+    with ThreadPoolExecutor(max_workers=SUBSCRIBERS_CONFIG["max_workers"]) as executor:
+        chats = list(executor.map(deliver, subscribers))
+
+    elapsed = time.monotonic() - started
+    sent = sum(c["sent"] for c in chats)
+    failed_chats = [c for c in chats if c["failed"]]
+    report = {
+        "subscribers": len(subscribers),
+        "variants": len(variants),
+        "messages_sent": sent,
+        "messages_skipped": sum(c["skipped"] for c in chats),
+        "messages_failed": sum(c["failed"] for c in chats),
+        "elapsed_s": round(elapsed, 2),
+        "messages_per_s": round(sent / elapsed, 2) if elapsed else 0,
+        "chats": chats,
+    }
+
+    print(f"✅ {sent} messages to {len(subscribers) - len(failed_chats)}/{len(subscribers)} chats "
+          f"in {report['elapsed_s']}s ({report['messages_per_s']} msg/s, {report['messages_skipped']} already delivered)")
+    for chat in failed_chats[:10]:
+        print(f"   ❌ chat {chat['chat_id']}: {chat['failed']} failed ({'; '.join(chat['errors'])})")
+    return report
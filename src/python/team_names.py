@@ -0,0 +1,104 @@
+"""
+BetWise Team Names - Normalizzazione dei nomi squadra e lega
+Claude, football-data.co.uk e la dashboard scrivono le squadre in modi diversi
+("Bayern Monaco", "Bayern Munich", "FC Bayern München"): qui tutto viene ridotto
+a una chiave canonica usata per join e controlli di duplicati.
+"""
+
+import re
+import unicodedata
+from typing import Optional, Tuple
+
+from predictor import CONFIG
+
+# Tokens that never distinguish two clubs
+NOISE_TOKENS = {"fc", "cf", "ac", "as", "ssc", "afc", "sc", "calcio", "club", "de", "cd", "rc", "ss", "us", "sv", "vfb", "vfl", "tsg", "1", "ogc", "losc", "stade"}
+
+# Italian and common alternative spellings -> football-data.co.uk naming (normalized)
+TEAM_ALIASES = {
+    "bayern monaco": "bayern munich",
+    "bayern munchen": "bayern munich",
+    "bayern": "bayern munich",
+    "borussia dortmund": "dortmund",
+    "bayer leverkusen": "leverkusen",
+    "borussia monchengladbach": "m gladbach",
+    "monchengladbach": "m gladbach",
+    "eintracht francoforte": "ein frankfurt",
+    "eintracht frankfurt": "ein frankfurt",
+    "marsiglia": "marseille",
+    "olympique marsiglia": "marseille",
+    "olympique marseille": "marseille",
+    "psg": "paris sg",
+    "paris saint germain": "paris sg",
+    "lione": "lyon",
+    "olympique lyon": "lyon",
+    "nizza": "nice",
+    "rennais": "rennes",
+    "brestois": "brest",
+    "siviglia": "sevilla",
+    "atletico madrid": "ath madrid",
+    "atletico": "ath madrid",
+    "athletic bilbao": "ath bilbao",
+    "real sociedad": "sociedad",
+    "real betis": "betis",
+    "celta vigo": "celta",
+    "manchester city": "man city",
+    "manchester united": "man united",
+    "man utd": "man united",
+    "tottenham hotspur": "tottenham",
+    "spurs": "tottenham",
+    "wolverhampton": "wolves",
+    "newcastle united": "newcastle",
+    "nottingham forest": "nott m forest",
+    "inter milan": "inter",
+    "internazionale": "inter",
+    "ac milan": "milan",
+    "as roma": "roma",
+    "hellas verona": "verona",
+    "psv": "psv eindhoven",
+    "sporting": "sp lisbon",
+    "sporting cp": "sp lisbon",
+    "sporting lisbona": "sp lisbon",
+}
+
+
+def normalize_team_name(name: str) -> str:
+    """Canonical key for a team name: lowercase, no accents/punctuation/noise tokens, aliases applied"""
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    text = re.sub(r"[^a-z0-9 ]+", " ", text)
+    text = " ".join(text.split())
+
+    if text in TEAM_ALIASES:
+        return TEAM_ALIASES[text]
+
+    stripped = " ".join(t for t in text.split() if t not in NOISE_TOKENS) or text
+    return TEAM_ALIASES.get(stripped, stripped)
+
+
+def split_match(match: str) -> Optional[Tuple[str, str]]:
+    """Split 'Home vs Away' (or 'Home - Away') into its two team names"""
+    for separator in (" vs ", " VS ", " v ", " - "):
+        if separator in match:
+            home, away = match.split(separator, 1)
+            return home.strip(), away.strip()
+    return None
+
+
+def match_key(match: str) -> Optional[Tuple[str, str]]:
+    """Normalized (home, away) key for a 'Home vs Away' string"""
+    teams = split_match(match)
+    if not teams:
+        return None
+    return normalize_team_name(teams[0]), normalize_team_name(teams[1])
+
+
+def league_code(value: str) -> Optional[str]:
+    """football-data.co.uk league code from a code, dashboard code or league name"""
+    if not value:
+        return None
+    wanted = value.strip().lower()
+    for code, info in CONFIG["leagues"].items():
+        if wanted in (code.lower(), info["code"], info["name"].lower()):
+            return code
+    return None
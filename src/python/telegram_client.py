@@ -0,0 +1,248 @@
+"""
+BetWise Telegram Client - Client condiviso per la Bot API di Telegram
+Riusa connessioni keep-alive (http.client) invece di un handshake TLS per
+messaggio, limita l'invio con token bucket per chat e globale, rispetta il
+retry_after delle risposte 429 e offre un invio a lotti con esito per
+messaggio. TELEGRAM_API_BASE può puntare a un server stub locale.
+"""
+
+import http.client
+import json
+import os
+import socket
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from message_packer import pack_messages
+from resilience import backoff_delay
+
+# Telegram configuration
+TELEGRAM_CONFIG = {
+    "api_base": os.environ.get("TELEGRAM_API_BASE", "https://api.telegram.org"),
+    "timeout": 10,
+    "max_attempts": 4,
+    "max_retry_after": 60,  # Longer server waits fail the message instead of stalling the job
+    "pool_size": 4,
+    # Telegram limits: about 1 message/s per chat (short bursts tolerated), 30/s overall
+    "chat_rate": 1.0,
+    "chat_burst": 3,
+    "global_rate": 30.0,
+    "global_burst": 30,
+}
+
+
+@dataclass
+class SendResult:
+    """Outcome of one sendMessage call"""
+    ok: bool
+    message_id: Optional[int] = None
+    error: Optional[str] = None
+    attempts: int = 0
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until it is available"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Drain the bucket so the next token is `seconds` away (after a 429)"""
+        with self._lock:
+            self.tokens = -seconds * self.rate + 1
+            self.updated = time.monotonic()
+
+
+class ConnectionPool:
+    """Idle keep-alive connections to one host, reused across calls and threads"""
+
+    def __init__(self, base_url: str, size: int, timeout: float):
+        parsed = urllib.parse.urlsplit(base_url)
+        self.https = parsed.scheme == "https"
+        self.host = parsed.netloc
+        self.prefix = parsed.path.rstrip("/")
+        self.size = size
+        self.timeout = timeout
+        self.idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def get(self) -> http.client.HTTPConnection:
+        with self._lock:
+            if self.idle:
+                return self.idle.pop()
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return cls(self.host, timeout=self.timeout)
+
+    def put(self, conn: http.client.HTTPConnection):
+        with self._lock:
+            if len(self.idle) < self.size:
+                self.idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self.idle = self.idle, []
+        for conn in idle:
+            conn.close()
+
+
+class TelegramClient:
+    """Bot API client with pooled connections, rate limiting and retries"""
+
+    def __init__(self, bot_token: str, api_base: str = None):
+        self.bot_token = bot_token
+        self.pool = ConnectionPool(api_base or TELEGRAM_CONFIG["api_base"],
+                                   TELEGRAM_CONFIG["pool_size"], TELEGRAM_CONFIG["timeout"])
+        self.global_bucket = TokenBucket(TELEGRAM_CONFIG["global_rate"], TELEGRAM_CONFIG["global_burst"])
+        self.chat_buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _chat_bucket(self, chat_id: str) -> TokenBucket:
+        with self._lock:
+            if chat_id not in self.chat_buckets:
+                self.chat_buckets[chat_id] = TokenBucket(TELEGRAM_CONFIG["chat_rate"], TELEGRAM_CONFIG["chat_burst"])
+            return self.chat_buckets[chat_id]
+
+    def _post(self, method: str, params: Dict) -> tuple:
+        """One POST on a pooled connection: (HTTP status, decoded body)"""
+        body = urllib.parse.urlencode(params).encode('utf-8')
+        path = f"{self.pool.prefix}/bot{self.bot_token}/{method}"
+        headers = {"Content-Type": "application/x-www-form-urlencoded", "Connection": "keep-alive"}
+        conn = self.pool.get()
+        try:
+            try:
+                conn.request("POST", path, body=body, headers=headers)
+                response = conn.getresponse()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                # Idle connection closed by the server: retry once on a fresh one
+                conn.close()
+                conn.request("POST", path, body=body, headers=headers)
+                response = conn.getresponse()
+            payload = response.read()
+        except Exception:
+            conn.close()
+            raise
+        if response.will_close:
+            conn.close()
+        else:
+            self.pool.put(conn)
+
+        try:
+            return response.status, json.loads(payload.decode('utf-8'))
+        except ValueError:
+            return response.status, {"ok": False, "description": payload[:200].decode('utf-8', 'replace')}
+
+    def send_message(self, chat_id: str, text: str, parse_mode: str = "HTML") -> SendResult:
+        """sendMessage with rate limiting; retries 429 (after retry_after), 5xx and network errors"""
+        params = {"chat_id": chat_id, "text": text, "parse_mode": parse_mode,
+                  "disable_web_page_preview": True}
+        chat_bucket = self._chat_bucket(str(chat_id))
+        attempts = TELEGRAM_CONFIG["max_attempts"]
+        error = None
+
+        for attempt in range(attempts):
+            chat_bucket.acquire()
+            self.global_bucket.acquire()
+
+            retry_after = None
+            try:
+                status, result = self._post("sendMessage", params)
+            except (http.client.HTTPException, socket.timeout, OSError) as e:
+                error = f"network error: {e}"
+            else:
+                if result.get("ok"):
+                    return SendResult(True, result.get("result", {}).get("message_id"), attempts=attempt + 1)
+                error = f"HTTP {status}: {result.get('description', '')}"
+                if status == 429:
+                    retry_after = float(result.get("parameters", {}).get("retry_after", 1))
+                    if retry_after > TELEGRAM_CONFIG["max_retry_after"]:
+                        return SendResult(False, error=error, attempts=attempt + 1)
+                    chat_bucket.pause(retry_after)
+                elif status < 500:
+                    return SendResult(False, error=error, attempts=attempt + 1)
+
+            if attempt < attempts - 1:
+                delay = retry_after if retry_after is not None else backoff_delay(attempt)
+                print(f"   ↻ Telegram: {error}, retry {attempt + 2}/{attempts} in {delay:.1f}s")
+                time.sleep(delay)
+
+        return SendResult(False, error=error, attempts=attempts)
+
+    def send_batch(self, chat_id: str, messages: List[str], parse_mode: str = "HTML") -> List[SendResult]:
+        """Send messages in order on the pooled connection; one result per message"""
+        return [self.send_message(chat_id, text, parse_mode) for text in messages]
+
+    def close(self):
+        self.pool.close()
+
+
+_clients: Dict[str, TelegramClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(bot_token: str) -> TelegramClient:
+    """Shared client for a bot token, so every sender reuses its pool and buckets"""
+    with _clients_lock:
+        if bot_token not in _clients:
+            _clients[bot_token] = TelegramClient(bot_token)
+        return _clients[bot_token]
+
+
+def send_telegram_message(bot_token: str, chat_id: str, message: str, parse_mode: str = "HTML",
+                          weekend: Optional[str] = None) -> bool:
+    """Send message via Telegram Bot API (through the outbox, once per weekend, when `weekend` is given)"""
+    if weekend is not None:
+        from outbox import send_once  # outbox builds on this module
+        result = send_once(bot_token, chat_id, weekend, [message])[0]
+    else:
+        result = get_client(bot_token).send_message(chat_id, message, parse_mode)
+    if not result.ok:
+        print(f"Error sending Telegram message: {result.error}")
+    return result.ok
+
+
+def send_packed(bot_token: str, chat_id: str, blocks: List[Optional[str]],
+                weekend: Optional[str] = None) -> List[SendResult]:
+    """
+    Pack blocks into as few messages as fit (see message_packer) and send them
+    as a batch; with `weekend`, through the outbox so reruns skip delivered ones.
+    """
+    blocks = [b for b in blocks if b]
+    messages = pack_messages(blocks)
+    if not messages:
+        return []
+    if weekend is not None:
+        from outbox import send_once  # outbox builds on this module
+        results = send_once(bot_token, chat_id, weekend, messages)
+    else:
+        results = get_client(bot_token).send_batch(chat_id, messages)
+
+    sent = sum(1 for r in results if r.ok and r.attempts)
+    skipped = sum(1 for r in results if r.ok and not r.attempts)
+    already = f", {skipped} already delivered" if skipped else ""
+    print(f"📦 {len(blocks)} blocks packed into {len(messages)} messages, {sent} sent{already}")
+    for i, result in enumerate(results, 1):
+        if not result.ok:
+            print(f"❌ Failed to send message {i}/{len(results)}: {result.error}")
+    return results
@@ -5,32 +5,16 @@ Sends weekend predictions to Telegram
 Updated for 4 Jackpot structure
 """
 
-import json
 import os
-import urllib.request
-import urllib.parse
 from datetime import datetime
+from typing import Dict, Optional
 
+from predictions_reader import read_summary, top_value_bets
+from subscribers import load_subscribers, notify_subscribers
+from telegram_client import send_packed
 
-def send_telegram_message(bot_token: str, chat_id: str, message: str, parse_mode: str = "HTML") -> bool:
-    """Send message via Telegram Bot API"""
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-
-    data = urllib.parse.urlencode({
-        "chat_id": chat_id,
-        "text": message,
-        "parse_mode": parse_mode,
-        "disable_web_page_preview": True
-    }).encode('utf-8')
-
-    try:
-        req = urllib.request.Request(url, data=data)
-        with urllib.request.urlopen(req, timeout=10) as response:
-            result = json.loads(response.read().decode('utf-8'))
-            return result.get("ok", False)
-    except Exception as e:
-        print(f"Error sending Telegram message: {e}")
-        return False
+TOP_VALUE_BETS = 5
+VALUE_BETS_PER_MATCH = 2
 
 
 def format_schedina(schedina: dict, nome: str, emoji: str) -> str:
@@ -52,24 +36,8 @@ def format_schedina(schedina: dict, nome: str, emoji: str) -> str:
     return "\n".join(lines)
 
 
-def main():
-    """Main execution"""
-    bot_token = os.environ.get("TELEGRAM_BOT_TOKEN")
-    chat_id = os.environ.get("TELEGRAM_CHAT_ID")
-
-    if not bot_token or not chat_id:
-        print("⚠️ Telegram credentials not configured")
-        print("Set TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID in GitHub Secrets")
-        return
-
-    # Load predictions
-    try:
-        with open("src/data/predictions.json", "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except FileNotFoundError:
-        print("❌ predictions.json not found")
-        return
-
+def build_messages(data: dict) -> list:
+    """Header, schedine, top value bets and footer as (label, text) pairs"""
     # Format header message
     header = f"""🎯 <b>BETWISE - Previsioni Weekend</b>
 📅 {data.get('weekend', 'N/A')}
@@ -82,11 +50,8 @@ def main():
 🔗 Dashboard: https://erold90.github.io/betwise-dashboard/
 """
 
-    # Send header
-    if send_telegram_message(bot_token, chat_id, header):
-        print("✅ Header sent")
-    else:
-        print("❌ Failed to send header")
+    # Messages to send in order: (label, text)
+    messages = [("Header", header)]
 
     # Get schedine
     schedine = data.get("schedine", {})
@@ -103,44 +68,77 @@ def main():
     for key, nome, emoji in schedine_config:
         if key in schedine and schedine[key].get("selections"):
             message = format_schedina(schedine[key], nome, emoji)
-            if message and send_telegram_message(bot_token, chat_id, message):
-                print(f"✅ {nome} sent")
-            else:
-                print(f"❌ Failed to send {nome}")
-
-    # Send top value bets
-    matches = data.get("matches", [])
-    value_bets = []
-
-    for match in matches:
-        for vb in match.get("value_bets", [])[:2]:
-            value_bets.append({
-                "match": f"{match.get('home_team', match.get('homeTeam', 'N/A'))} vs {match.get('away_team', match.get('awayTeam', 'N/A'))}",
-                "league": match.get("league_flag", match.get("leagueFlag", "")),
-                "market": vb["market"],
-                "odds": vb["odds"],
-                "edge": vb["edge"]
-            })
-
-    # Sort by edge and take top 5
-    value_bets = sorted(value_bets, key=lambda x: x["edge"], reverse=True)[:5]
+            if message:
+                messages.append((nome, message))
+
+    # Send top value bets: precomputed candidates (streaming read) or from the matches
+    if "value_bets" in data:
+        value_bets = data["value_bets"][:TOP_VALUE_BETS]
+    else:
+        value_bets = top_value_bets(data.get("matches", []), TOP_VALUE_BETS, VALUE_BETS_PER_MATCH)
 
     if value_bets:
         vb_message = "\n💎 <b>TOP VALUE BETS</b>\n\n"
         for i, vb in enumerate(value_bets, 1):
-            vb_message += f"{i}. {vb['league']} {vb['match']}\n"
+            vb_message += f"{i}. {vb['leagueFlag']} {vb['match']}\n"
             vb_message += f"   ➤ <b>{vb['market']}</b> @{vb['odds']} (+{vb['edge']}% edge)\n\n"
 
-        if send_telegram_message(bot_token, chat_id, vb_message):
-            print("✅ Value bets sent")
+        messages.append(("Value bets", vb_message))
 
     # Final message
     footer = """⚠️ <i>Gioca responsabilmente. Le previsioni sono basate su modelli statistici e non garantiscono vincite.</i>
 
 🤖 Generato automaticamente da BetWise"""
-    send_telegram_message(bot_token, chat_id, footer)
+    messages.append(("Footer", footer))
+    return messages
+
+
+def render_blocks(data: dict) -> list:
+    """Message texts for a (possibly league-filtered) predictions file"""
+    return [text for _, text in build_messages(data)]
+
+
+def main() -> Optional[Dict]:
+    """Main execution; returns the delivered and failed message counts (None when nothing was attempted)"""
+    bot_token = os.environ.get("TELEGRAM_BOT_TOKEN")
+    chat_id = os.environ.get("TELEGRAM_CHAT_ID")
+    subscribers = load_subscribers()
 
-    print("\n✅ All notifications sent successfully!")
+    if not bot_token or not (chat_id or subscribers):
+        print("⚠️ Telegram credentials not configured")
+        print("Set TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID in GitHub Secrets")
+        return
+
+    # Load predictions: one streaming pass, keeping only the top value bets per league
+    try:
+        data, ranking = read_summary("src/data/predictions.json", TOP_VALUE_BETS, VALUE_BETS_PER_MATCH)
+    except FileNotFoundError:
+        print("❌ predictions.json not found")
+        return
+    data["value_bets"] = ranking.candidates()
+    data["league_stats"] = ranking.league_stats()  # Lets league-filtered variants recount their stats
+    delivery = {"delivered": 0, "failed": 0}
+
+    if chat_id:
+        messages = build_messages(data)
+
+        # Pack into as few messages as fit and send them on one pooled connection
+        print(f"📱 Sending {', '.join(label for label, _ in messages)}...")
+        results = send_packed(bot_token, chat_id, [text for _, text in messages], weekend=data.get('weekend', ''))
+
+        sent = sum(1 for r in results if r.ok)
+        print(f"\n✅ {sent}/{len(results)} notifications sent")
+        delivery["delivered"] += sent
+        delivery["failed"] += len(results) - sent
+
+    # Subscribers get their league-filtered variant
+    if subscribers:
+        report = notify_subscribers(bot_token, data, render_blocks, subscribers,
+                                    exclude=[chat_id] if chat_id else [])
+        delivery["delivered"] += report.get("messages_sent", 0) + report.get("messages_skipped", 0)
+        delivery["failed"] += report.get("messages_failed", 0)
+
+    return delivery
 
 
 if __name__ == "__main__":